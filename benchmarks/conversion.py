@@ -0,0 +1,343 @@
+"""Benchmarks of the conversion hot paths.
+
+Measures reading, map_tags(), map_tags_batch(), tags_to_bibtex(),
+writing, convert(), conversion in pools of processes and of threads,
+each of the default tag-functions and each hook on
+the bundled test records and on a generated corpus, and reports
+per-stage timings and records/sec.
+Results can be saved as a baseline and compared against later, e.g.
+before and after a change to core.py or hooks.py. Run from the
+repository root:
+
+    $ python benchmarks/conversion.py --save baseline.json
+    $ # ...make some changes...
+    $ python benchmarks/conversion.py --compare baseline.json
+"""
+
+import argparse
+import atexit
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import warnings
+from typing import Callable, Dict, List, NamedTuple
+
+from pymarc import MARCReader  # type: ignore
+
+import marc2bib
+from marc2bib import Converter, hooks, map_tags, tags_to_bibtex
+from marc2bib.columnar import map_tags_batch
+from marc2bib.core import BOOK_OPT_TAGFUNCS, BOOK_REQ_TAGFUNCS
+from marc2bib.fieldindex import FieldIndex
+from marc2bib.iso2709 import iter_raw_records
+from marc2bib.mapped import MappedFile
+from marc2bib.parallel import POOLS, iter_convert_parallel
+from marc2bib.writer import EntryWriter
+
+from corpus import INCLUDE, bundled_records, convertible, generate_corpus
+
+
+class Benchmark(NamedTuple):
+    name: str
+    # The number of items (records, tags or values) per run.
+    items: int
+    unit: str
+    func: Callable[[], object]
+
+
+OPTIONS = dict(include=INCLUDE)
+
+WORKERS = min(4, os.cpu_count() or 1)
+
+TAG_ORDER = ["author", "editor", "title", "subtitle", "year", "publisher"]
+
+HOOKS = {
+    "remove_isbd_punctuation_hook": hooks.remove_isbd_punctuation_hook,
+    "latexify_hook": hooks.latexify_hook,
+    "escape_special_characters_hook": hooks.escape_special_characters_hook,
+    "normalize_ranges_hook": hooks.normalize_ranges_hook,
+    "strip_outer_square_brackets_hook": (
+        hooks.strip_outer_square_brackets_hook
+    ),
+    "protect_uppercase_letters_hook": hooks.protect_uppercase_letters_hook,
+}
+
+
+def write_entries(stream, entries):
+    with EntryWriter(stream) as writer:
+        for bibtex in entries:
+            writer.write(bibtex)
+
+
+def temp_file(data: bytes) -> str:
+    # Removed at exit; memory-mapped reading needs a file.
+    fd, path = tempfile.mkstemp(suffix=".mrc")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    atexit.register(os.remove, path)
+    return path
+
+
+def read_mapped(path: str, index=None) -> int:
+    with MappedFile(path, index) as mapped:
+        return sum(1 for _ in iter_raw_records(mapped))
+
+
+def make_benchmarks(name: str, data: bytes) -> List[Benchmark]:
+    records = convertible(list(MARCReader(data)))
+    data = b"".join(record.as_marc() for record in records)
+    n = len(records)
+    path = temp_file(data)
+    with MappedFile(path) as mapped:
+        index = mapped.build_index()
+
+    converter = Converter(include=INCLUDE)
+    tags = [converter.map_tags(record) for record in records]
+    indexes = [FieldIndex(record) for record in records]
+    entries = [tags_to_bibtex(t) for t in tags]
+
+    # Values as returned by tag-functions, before any hook.
+    raw_converter = Converter(
+        include=INCLUDE, remove_punctuation=False, latexify=False
+    )
+    values = [
+        (tag, value)
+        for record in records
+        for tag, value in raw_converter.map_tags(record).items()
+    ]
+
+    benchmarks = [
+        Benchmark(
+            "read/pymarc",
+            n,
+            "records",
+            lambda: list(MARCReader(data)),
+        ),
+        Benchmark(
+            "read/lazy",
+            n,
+            "records",
+            lambda: list(iter_raw_records(io.BytesIO(data))),
+        ),
+        Benchmark(
+            "read/mapped",
+            n,
+            "records",
+            lambda: read_mapped(path),
+        ),
+        Benchmark(
+            "read/mapped/indexed",
+            n,
+            "records",
+            lambda: read_mapped(path, index),
+        ),
+        Benchmark(
+            "map_tags",
+            n,
+            "records",
+            lambda: [map_tags(r, include=INCLUDE) for r in records],
+        ),
+        Benchmark(
+            "Converter.map_tags",
+            n,
+            "records",
+            lambda: [converter.map_tags(r) for r in records],
+        ),
+        Benchmark(
+            "map_tags_batch",
+            n,
+            "records",
+            lambda: map_tags_batch(records, **OPTIONS),
+        ),
+        Benchmark(
+            "tags_to_bibtex",
+            n,
+            "records",
+            lambda: [tags_to_bibtex(t) for t in tags],
+        ),
+        Benchmark(
+            "tags_to_bibtex/tag_order",
+            n,
+            "records",
+            lambda: [tags_to_bibtex(t, tag_order=TAG_ORDER) for t in tags],
+        ),
+        Benchmark(
+            "EntryWriter",
+            n,
+            "records",
+            lambda: write_entries(io.StringIO(), entries),
+        ),
+        Benchmark(
+            "convert",
+            n,
+            "records",
+            lambda: [marc2bib.convert(r, include=INCLUDE) for r in records],
+        ),
+        Benchmark(
+            "Converter.convert",
+            n,
+            "records",
+            lambda: [converter.convert(r) for r in records],
+        ),
+        Benchmark(
+            "iter_convert",
+            n,
+            "records",
+            lambda: list(marc2bib.iter_convert(io.BytesIO(data), **OPTIONS)),
+        ),
+        Benchmark(
+            "iter_convert/lazy",
+            n,
+            "records",
+            lambda: list(
+                marc2bib.iter_convert(io.BytesIO(data), lazy=True, **OPTIONS)
+            ),
+        ),
+    ]
+
+    # The start-up of the pool is included, as in a single conversion.
+    for pool in POOLS:
+        benchmarks.append(
+            Benchmark(
+                f"iter_convert_parallel/{pool}",
+                n,
+                "records",
+                lambda pool=pool: list(
+                    iter_convert_parallel(
+                        io.BytesIO(data),
+                        WORKERS,
+                        lazy=True,
+                        pool=pool,
+                        **OPTIONS,
+                    )
+                ),
+            )
+        )
+
+    tagfuncs = {**BOOK_REQ_TAGFUNCS, **BOOK_OPT_TAGFUNCS}
+    del tagfuncs["note"]
+    for tag, func in tagfuncs.items():
+        benchmarks.append(
+            Benchmark(
+                f"tagfunc/{tag}/{func.__name__}",
+                n,
+                "records",
+                # Bind the current function.
+                lambda func=func: [func(index) for index in indexes],
+            )
+        )
+
+    for hook_name, hook in HOOKS.items():
+        benchmarks.append(
+            Benchmark(
+                f"hook/{hook_name}",
+                len(values),
+                "values",
+                lambda hook=hook: [hook(t, v) for t, v in values],
+            )
+        )
+
+    return [b._replace(name=f"{name}/{b.name}") for b in benchmarks]
+
+
+def run(benchmark: Benchmark, repeat: int) -> float:
+    timer = timeit.Timer(benchmark.func)
+    return min(timer.repeat(repeat=repeat, number=1))
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict]) -> float:
+    """Print the change against the baseline; return the worst one."""
+    worst = 0.0
+    print(
+        f"\n{'benchmark':<60} {'baseline':>10} {'current':>10} {'change':>8}"
+    )
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["seconds"]
+        after = result["seconds"]
+        change = after / before - 1
+        worst = max(worst, change)
+        print(
+            f"{name:<60} {before * 1e3:8.2f}ms {after * 1e3:8.2f}ms "
+            f"{change:+8.1%}"
+        )
+    return worst
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "-k",
+        "--filter",
+        default="",
+        help="run only benchmarks with the given substring in the name",
+    )
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=5000,
+        help="the number of records in the generated corpus",
+    )
+    parser.add_argument("--save", help="save results to a JSON file")
+    parser.add_argument("--compare", help="compare with a saved baseline")
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        help=(
+            "with --compare, exit with an error if a benchmark is slower "
+            "by more than this fraction, e.g. 0.1"
+        ),
+    )
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter("ignore")
+
+    bundled = b"".join(record.as_marc() for record in bundled_records())
+    benchmarks = make_benchmarks("bundled", bundled)
+    benchmarks += make_benchmarks("corpus", generate_corpus(args.size))
+
+    results = {}
+    print(f"{'benchmark':<60} {'total':>10} {'per item':>10} {'rate':>16}")
+    for benchmark in benchmarks:
+        if args.filter not in benchmark.name:
+            continue
+        seconds = run(benchmark, args.repeat)
+        results[benchmark.name] = {
+            "seconds": seconds,
+            "items": benchmark.items,
+            "unit": benchmark.unit,
+        }
+        rate = benchmark.items / seconds if seconds else float("inf")
+        print(
+            f"{benchmark.name:<60} {seconds * 1e3:8.2f}ms "
+            f"{seconds / benchmark.items * 1e6:8.2f}us "
+            f"{rate:>9.0f} {benchmark.unit}/s"
+        )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {"python": platform.python_version(), "results": results},
+                f,
+                indent=2,
+            )
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        worst = compare(results, baseline)
+        if args.max_slowdown is not None and worst > args.max_slowdown:
+            print(f"\nslower than the baseline by {worst:.1%}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
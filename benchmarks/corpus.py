@@ -0,0 +1,92 @@
+"""Records to run benchmarks on.
+
+Besides the bundled test records, a corpus of any size is generated
+from the records of the validation set by varying titles and years, so
+that values are not all the same. Run from the repository root.
+"""
+
+import glob
+import io
+import random
+import warnings
+from typing import List
+
+from pymarc import MARCReader, Record  # type: ignore
+
+from marc2bib import Converter, MARC2BibError
+
+
+BUNDLED_RECORDS = sorted(glob.glob("tests/records/*.mrc"))
+VALIDATION_RECORDS = "tests/validation/TestBibsWithIsbdPunctuation.mrc"
+
+# All of the optional tags except note, which is not implemented.
+INCLUDE = [
+    "address",
+    "editor",
+    "edition",
+    "volume",
+    "volumes",
+    "number",
+    "pages",
+    "series",
+    "subtitle",
+    "isbn",
+]
+
+# fmt: off
+WORDS = [
+    "theory", "history", "introduction", "methods", "studies", "notes",
+    "analysis", "essays", "principles", "handbook", "survey", "letters",
+]
+# fmt: on
+
+
+def read_records(*paths: str) -> List[Record]:
+    records = []
+    for path in paths:
+        with open(path, "rb") as f:
+            records.extend(MARCReader(f))
+    return records
+
+
+def convertible(records: List[Record]) -> List[Record]:
+    """Return only records which convert with all the tags included."""
+    converter = Converter(include=INCLUDE)
+    result = []
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for record in records:
+            try:
+                converter.convert(record)
+            except (MARC2BibError, AttributeError, KeyError):
+                continue
+            result.append(record)
+    return result
+
+
+def bundled_records() -> List[Record]:
+    return read_records(*BUNDLED_RECORDS)
+
+
+def generate_corpus(size: int, seed: int = 0) -> bytes:
+    """Generate a MARC file of ``size`` records."""
+    base = [
+        record.as_marc()
+        for record in convertible(read_records(VALIDATION_RECORDS))
+    ]
+    rng = random.Random(seed)
+    output = io.BytesIO()
+    for _ in range(size):
+        record = Record(rng.choice(base))
+        title = record["245"]
+        if title and rng.random() < 0.5:
+            title["a"] = f"{title['a'].rstrip(' /:.')} {rng.choice(WORDS)} :"
+        for field in record.get_fields("260", "264"):
+            if field["c"]:
+                field["c"] = f"{rng.randint(1950, 2022)}."
+        output.write(record.as_marc())
+    return output.getvalue()
+
+
+def corpus_records(size: int, seed: int = 0) -> List[Record]:
+    return list(MARCReader(generate_corpus(size, seed)))
@@ -0,0 +1,135 @@
+"""Benchmarks of the startup of short-lived processes.
+
+Measures the wall time of fresh interpreters importing marc2bib and
+converting a single record, against a bare interpreter, e.g. as in
+per-request web workers or per-file jobs. With ``--modules``, also
+lists the modules with the highest import time of each scenario, as
+reported by ``python -X importtime``. Run from the repository root:
+
+    $ python benchmarks/import_time.py --save baseline.json
+    $ python benchmarks/import_time.py --compare baseline.json --modules
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from conversion import compare
+
+
+RECORD = "tests/records/tsing2015.mrc"
+
+# Name -> the code run by a fresh interpreter.
+SCENARIOS = {
+    "python": "pass",
+    "import": "import marc2bib",
+    "import/pymarc": "import pymarc, marc2bib",
+    "import/cli": "import marc2bib.cli",
+    "convert": (
+        "from pymarc import MARCReader\n"
+        "import marc2bib\n"
+        f"with open({RECORD!r}, 'rb') as f:\n"
+        "    marc2bib.convert(next(MARCReader(f)))"
+    ),
+    "convert/lazy": (
+        "import marc2bib\n"
+        f"next(marc2bib.iter_convert({RECORD!r}, lazy=True))"
+    ),
+}
+
+
+def _env() -> Dict[str, str]:
+    env = dict(os.environ)
+    # The bytecode should be cached, as in a deployed package.
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def run(code: str, repeat: int) -> float:
+    """Return the best wall time of a fresh interpreter running code."""
+    env = _env()
+    command = [sys.executable, "-c", code]
+    # Warm up, also writing the bytecode of the imported modules.
+    subprocess.run(command, env=env, check=True)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, check=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def slowest_modules(code: str, limit: int) -> List[Tuple[str, int]]:
+    """Return the modules with the highest self import time in us."""
+    command = [sys.executable, "-X", "importtime", "-c", code]
+    stderr = subprocess.run(
+        command, env=_env(), check=True, capture_output=True, text=True
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        modules.append((name.strip(), int(self_us)))
+    return sorted(modules, key=lambda item: -item[1])[:limit]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "-k",
+        "--filter",
+        default="",
+        help="run only scenarios with the given substring in the name",
+    )
+    parser.add_argument("-n", "--repeat", type=int, default=20)
+    parser.add_argument(
+        "--modules",
+        type=int,
+        nargs="?",
+        const=5,
+        default=0,
+        help="list this many slowest modules to import (default: 5)",
+    )
+    parser.add_argument("--save", help="save results to a JSON file")
+    parser.add_argument("--compare", help="compare with a saved baseline")
+    args = parser.parse_args(argv)
+
+    results = {}
+    baseline_python = None
+    print(f"{'scenario':<60} {'total':>10} {'extra':>10}")
+    for name, code in SCENARIOS.items():
+        if args.filter not in name and name != "python":
+            continue
+        seconds = run(code, args.repeat)
+        if name == "python":
+            baseline_python = seconds
+        results[name] = {"seconds": seconds, "items": 1, "unit": "run"}
+        extra = seconds - baseline_python
+        print(f"{name:<60} {seconds * 1e3:8.2f}ms {extra * 1e3:8.2f}ms")
+        if args.modules and name != "python":
+            for module, self_us in slowest_modules(code, args.modules):
+                print(f"    {module:<56} {self_us / 1e3:8.2f}ms")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {"python": platform.python_version(), "results": results},
+                f,
+                indent=2,
+            )
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["results"])
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
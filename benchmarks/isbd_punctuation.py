@@ -0,0 +1,101 @@
+"""Micro-benchmark of the removal of ISBD punctuation.
+
+Compares the current ``remove_isbd_punctuation_hook`` against the
+previous regex-based implementation, copied below, on the subfield
+values of the NLM test records used by the validation test
+(tests/validation/test_removal_of_isbd_punctuation.py) and on the
+cases of tests/test_remove_punctuation.py. Run from the repository
+root:
+
+    $ python benchmarks/isbd_punctuation.py
+"""
+
+import argparse
+import re
+import timeit
+
+from pymarc import MARCReader  # type: ignore
+
+from marc2bib.hooks import COMMON_ABBREVIATIONS, remove_isbd_punctuation_hook
+
+
+VALIDATION_RECORDS = "tests/validation/TestBibsWithIsbdPunctuation.mrc"
+
+# fmt: off
+UNIT_TEST_CASES = [
+    "Test .", "Test ,", "Test :", "Test ;", "Test +", "Test /", "Test =",
+    "Test.", "2022.", "A.B.", "A.B.,", "Jane Doe, Sr.", "John Doe, Jr.",
+    "Test...", "1st.", "2nd.", "3rd.", "4th.", "ed.", "Co.",
+]
+# fmt: on
+
+
+def reference_remove_isbd_punctuation_hook(tag, value, *, abbreviations=None):
+    # The implementation before precompiling, kept for comparison.
+    terminal_chars = ".,:;+=/"
+
+    value = re.sub(rf"\s([{terminal_chars}])$", "", value)
+
+    ends_with_suffix = bool(re.search(r"[JS]r\.$", value))
+    ends_with_initials = bool(re.search(r"[A-Z]\.$", value))
+    ends_with_ordinal = bool(re.search(r"\d(st|nd|rd|th)\.$", value))
+    ends_with_ellipsis = bool(re.search(r"\w\.{3}$", value))
+
+    abbreviations = abbreviations or COMMON_ABBREVIATIONS
+    ends_with_abbrev = value.lower().endswith(abbreviations)
+
+    # fmt: off
+    if not (ends_with_suffix or ends_with_initials or ends_with_ordinal or
+            ends_with_ellipsis or ends_with_abbrev):
+        value = re.sub(fr"[{terminal_chars}]$", "", value)
+    # fmt: on
+
+    return value
+
+
+def load_cases():
+    cases = [("", value) for value in UNIT_TEST_CASES]
+    with open(VALIDATION_RECORDS, "rb") as f:
+        for record in MARCReader(f):
+            for field in record.fields:
+                if field.is_control_field():
+                    continue
+                for value in field.subfields[1::2]:
+                    cases.append((field.tag, value))
+    return cases
+
+
+def run(func, cases):
+    for tag, value in cases:
+        func(tag, value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = load_cases()
+    for tag, value in cases:
+        expected = reference_remove_isbd_punctuation_hook(tag, value)
+        assert remove_isbd_punctuation_hook(tag, value) == expected, value
+
+    timings = {}
+    for name, func in (
+        ("reference", reference_remove_isbd_punctuation_hook),
+        ("current", remove_isbd_punctuation_hook),
+    ):
+        timer = timeit.Timer(lambda: run(func, cases))
+        best = min(timer.repeat(repeat=args.repeat, number=1))
+        timings[name] = best
+        print(
+            f"{name:>10}: {best * 1e3:8.2f} ms per {len(cases)} values, "
+            f"{best / len(cases) * 1e9:6.0f} ns per value"
+        )
+
+    speedup = timings["reference"] / timings["current"]
+    print(f"{'speedup':>10}: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
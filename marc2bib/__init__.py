@@ -1 +1,48 @@
 from .core import *
+
+
+# Modules with optional subsystems, imported on the first access as
+# an attribute (e.g. marc2bib.parallel), so that `import marc2bib`
+# stays cheap for short-lived processes.
+_SUBMODULES = frozenset(
+    (
+        "aio",
+        "bibkeys",
+        "cache",
+        "cli",
+        "columnar",
+        "dedup",
+        "diagnostics",
+        "errors",
+        "fieldindex",
+        "formats",
+        "hooks",
+        "incremental",
+        "iso2709",
+        "mapped",
+        "parallel",
+        "stats",
+        "tagfuncs",
+        "writer",
+    )
+)
+
+# Names of pymarc formerly imported into the package namespace. pymarc
+# is now imported only when reading MARC files.
+_PYMARC_NAMES = frozenset(("MARCReader", "Record"))
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        import importlib
+
+        return importlib.import_module(f".{name}", __name__)
+    if name in _PYMARC_NAMES:
+        import pymarc  # type: ignore
+
+        return getattr(pymarc, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted({*globals(), *_SUBMODULES})
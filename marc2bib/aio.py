@@ -0,0 +1,191 @@
+"""Conversion of records from asynchronous sources.
+
+Converting a record is CPU-bound work, so calling
+:func:`marc2bib.convert()` in a coroutine blocks the event loop. The
+functions here run the conversion in an executor instead::
+
+    async for bibtex in aconvert_stream(harvester.records(), concurrency=8):
+        ...
+
+By default, the default executor of the event loop (a thread pool) is
+used, which keeps the event loop responsive. Pass a
+:class:`concurrent.futures.ProcessPoolExecutor` to also convert
+records in parallel; the conversion arguments should be picklable
+then (see :mod:`marc2bib.parallel`).
+
+A :class:`marc2bib.bibkeys.BibkeyRegistry` given as the ``bibkey`` is
+not called in the executor: the keys are made with its template there,
+and made unique in the event loop in the order the entries are
+yielded.
+"""
+
+import asyncio
+import pickle
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Deque, Dict, Optional, Union
+
+from pymarc import Record  # type: ignore
+
+from .bibkeys import BibkeyRegistry, split_registry
+from .core import Converter
+from .iso2709 import decode_record
+
+
+# The default number of records converted at once.
+DEFAULT_CONCURRENCY = 4
+
+RecordOrBytes = Union[Record, bytes]
+
+# Converters of a worker process by the pickled arguments, see
+# _convert_with_options().
+_converters: Dict[bytes, Converter] = {}
+
+
+def _convert(converter: Converter, record: RecordOrBytes, lazy: bool) -> str:
+    if isinstance(record, (bytes, bytearray, memoryview)):
+        record = decode_record(bytes(record), converter.marc_tags, lazy)
+    return converter.convert(record)
+
+
+def _convert_with_options(
+    key: bytes, record: RecordOrBytes, lazy: bool
+) -> str:
+    # Run in a worker process, where a converter is created once for
+    # the same arguments.
+    try:
+        converter = _converters[key]
+    except KeyError:
+        converter = _converters[key] = Converter(**pickle.loads(key))
+    return _convert(converter, record, lazy)
+
+
+class _Runner:
+    """Submit conversions of records to an executor."""
+
+    def __init__(
+        self, executor: Optional[Executor], lazy: bool, options: dict
+    ) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.executor = executor
+        self.lazy = lazy
+        # The keys are made unique here, in the order of the entries,
+        # not by each worker process or concurrently by threads.
+        self.registry: Optional[BibkeyRegistry]
+        options, self.registry = split_registry(options)
+        if isinstance(executor, ProcessPoolExecutor):
+            for name in ("stats", "diagnostics"):
+                if options.get(name) is not None:
+                    raise ValueError(
+                        f"{name} cannot be collected in worker processes"
+                    )
+            # Fail early in the event loop instead of in a worker.
+            Converter(**options)
+            self.key: Optional[bytes] = pickle.dumps(options)
+        else:
+            self.key = None
+            self.converter = Converter(**options)
+
+    def submit(self, record: RecordOrBytes) -> "asyncio.Future[str]":
+        if self.key is not None:
+            return self.loop.run_in_executor(
+                self.executor,
+                _convert_with_options,
+                self.key,
+                record,
+                self.lazy,
+            )
+        return self.loop.run_in_executor(
+            self.executor, _convert, self.converter, record, self.lazy
+        )
+
+    def rekey(self, bibtex: str) -> str:
+        # Make the keys unique in the order the entries are returned.
+        if self.registry is None:
+            return bibtex
+        return self.registry.rekey(bibtex)
+
+
+async def aconvert(
+    record: RecordOrBytes,
+    *,
+    executor: Optional[Executor] = None,
+    lazy: bool = False,
+    **options,
+) -> str:
+    """Converts a record to a BibTeX entry in an executor.
+
+    Args:
+        record: An instance of :class:`pymarc.Record` or a raw record.
+        executor: An executor to run the conversion in. Defaults to
+            the default executor of the event loop.
+        lazy: If True, decode a raw record with
+            :class:`marc2bib.iso2709.RawRecord`.
+        **options: Keyword arguments passed to
+            :class:`marc2bib.Converter`.
+    """
+    runner = _Runner(executor, lazy, options)
+    return runner.rekey(await runner.submit(record))
+
+
+async def aconvert_stream(
+    records: AsyncIterable[RecordOrBytes],
+    *,
+    executor: Optional[Executor] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ordered: bool = True,
+    lazy: bool = False,
+    **options,
+) -> AsyncIterator[str]:
+    """Converts records from an asynchronous iterable in an executor.
+
+    At most ``concurrency`` records are converted at once. The next
+    record is not taken from ``records`` until one of them is done,
+    so a slow consumer slows down the source as well.
+
+    Args:
+        records: An asynchronous iterable of instances of
+            :class:`pymarc.Record` or raw records (bytes).
+        executor: An executor to run the conversion in. Defaults to
+            the default executor of the event loop.
+        concurrency: The maximum number of records converted at once.
+        ordered: If True, yield entries in the input order. Otherwise,
+            yield them as soon as they are ready.
+        lazy: If True, decode raw records with
+            :class:`marc2bib.iso2709.RawRecord`.
+        **options: Keyword arguments passed to
+            :class:`marc2bib.Converter`.
+
+    Yields:
+        A BibTeX-formatted string for each record.
+
+    Raises:
+        MARC2BibError: If a record cannot be decoded or converted.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency should be positive, got {concurrency}")
+
+    runner = _Runner(executor, lazy, options)
+    pending: Deque["asyncio.Future[str]"] = deque()
+    try:
+        async for record in records:
+            pending.append(runner.submit(record))
+            while len(pending) >= concurrency:
+                yield runner.rekey(await _next_done(pending, ordered))
+        while pending:
+            yield runner.rekey(await _next_done(pending, ordered))
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def _next_done(
+    pending: Deque["asyncio.Future[str]"], ordered: bool
+) -> str:
+    if ordered:
+        return await pending.popleft()
+    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    # Keep the rest in the input order.
+    future = next(future for future in pending if future in done)
+    pending.remove(future)
+    return future.result()
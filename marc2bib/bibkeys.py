@@ -0,0 +1,263 @@
+"""Unique citation keys for many records.
+
+The default bibkey, the surname of the first author followed by the
+year, repeats across a large catalogue (``smith2001``), and BibTeX
+needs unique keys. A :class:`BibkeyRegistry` passed as the ``bibkey``
+argument of :class:`marc2bib.Converter` (or
+:func:`marc2bib.iter_convert()`, :func:`marc2bib.convert_file()`)
+makes a base key of each record with a :class:`BibkeyTemplate` and
+appends a suffix to repeated ones: ``smith2001``, ``smith2001a``,
+``smith2001b`` and so on, in the order of the records::
+
+    registry = BibkeyRegistry("{author}{year}{title}")
+    convert_file("file.mrc", "file.bib", bibkey=registry)
+
+Non-ASCII letters of the keys are transliterated to ASCII, e.g.
+``Schrödinger`` to ``schrodinger``.
+
+With workers, the base keys are made in the workers, and the final
+keys are assigned in the main process in the input order, so they do
+not depend on the number of workers (see :meth:`BibkeyRegistry.rekey`).
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, Optional
+
+
+DEFAULT_TEMPLATE = "{author}{year}"
+
+# Letters which are not decomposed by NFKD.
+# fmt: off
+_TRANSLITERATIONS = str.maketrans({
+    "ß": "ss", "æ": "ae", "Æ": "AE", "œ": "oe", "Œ": "OE", "ø": "o",
+    "Ø": "O", "ł": "l", "Ł": "L", "đ": "d", "Đ": "D", "ð": "d", "Ð": "D",
+    "þ": "th", "Þ": "TH", "ı": "i",
+})
+# fmt: on
+
+_ARTICLES = frozenset(("a", "an", "the"))
+_year_re = re.compile(r"\d{4}")
+
+
+@lru_cache(maxsize=10_000)
+def normalize_key(text: str) -> str:
+    """Return the lowercase ASCII letters and digits of a text.
+
+    Accents are removed and some other letters are transliterated,
+    e.g. "Dvořák" becomes "dvorak" and "Groß" becomes "gross". A text
+    with no such characters at all (e.g. in a non-Latin script) keeps
+    its lowercase letters and digits as is.
+    """
+    decomposed = unicodedata.normalize(
+        "NFKD", text.translate(_TRANSLITERATIONS)
+    )
+    key = "".join(c for c in decomposed if c.isascii() and c.isalnum())
+    if not key:
+        key = "".join(c for c in text if c.isalnum())
+    return key.lower()
+
+
+def _first_surname(tags: Dict[str, str]) -> str:
+    names = tags["author"] if "author" in tags else tags.get("editor", "")
+    return normalize_key(names.split(",")[0])
+
+
+def _year(tags: Dict[str, str]) -> str:
+    year = tags.get("year", "")
+    m = _year_re.search(year)
+    return m.group() if m else normalize_key(year)
+
+
+def _first_title_word(tags: Dict[str, str]) -> str:
+    words = tags.get("title", "").split()
+    if len(words) > 1 and words[0].lower() in _ARTICLES:
+        words = words[1:]
+    return normalize_key(words[0]) if words else ""
+
+
+# Template fields besides the tags themselves.
+_FIELDS = {
+    "author": _first_surname,
+    "year": _year,
+    "title": _first_title_word,
+}
+
+
+class BibkeyTemplate:
+    """A bibkey made of the tags of a record.
+
+    The template is a format string (see :meth:`str.format`) with the
+    following fields:
+
+    * ``{author}`` -- the surname of the first author (or editor);
+    * ``{year}`` -- the four-digit year;
+    * ``{title}`` -- the first word of the title, skipping an article;
+    * any other tag, e.g. ``{edition}`` -- the value of the tag.
+
+    All values are normalized with :func:`normalize_key`, and missing
+    tags are empty. Format specs apply, e.g. ``{title:.5}`` keeps the
+    first five letters.
+
+    Args:
+        template: A format string, by default "{author}{year}".
+    """
+
+    def __init__(self, template: str = DEFAULT_TEMPLATE) -> None:
+        self.template = template
+        fields = [
+            name
+            for _, name, _, _ in Formatter().parse(template)
+            if name is not None
+        ]
+        for name in fields:
+            if not name.isidentifier():
+                raise ValueError(
+                    f"invalid bibkey template field {name!r} in {template!r}"
+                )
+        self.fields = tuple(dict.fromkeys(fields))
+
+    def __repr__(self) -> str:
+        return f"BibkeyTemplate({self.template!r})"
+
+    def __call__(self, tags: Dict[str, str]) -> str:
+        values = {}
+        for name in self.fields:
+            func = _FIELDS.get(name)
+            if func is not None:
+                values[name] = func(tags)
+            else:
+                values[name] = normalize_key(tags.get(name, ""))
+        return self.template.format_map(values)
+
+
+def _suffix(n: int) -> str:
+    # 1 -> "a", 26 -> "z", 27 -> "aa", ...
+    letters = []
+    while n > 0:
+        n, rest = divmod(n - 1, 26)
+        letters.append(chr(ord("a") + rest))
+    return "".join(reversed(letters))
+
+
+def _suffix_number(suffix: str) -> int:
+    n = 0
+    for letter in suffix:
+        n = n * 26 + ord(letter) - ord("a") + 1
+    return n
+
+
+class BibkeyRegistry:
+    """Unique bibkeys made with a template and letter suffixes.
+
+    A registry is a callable usable as the ``bibkey`` argument. The
+    first record with a base key gets it as is, and the next ones get
+    it with a suffix ``a``, ``b``, ..., ``z``, ``aa``, ``ab``, ... A
+    key is never given twice, even if a base key looks like another
+    key with a suffix.
+
+    Only the number of uses of each base key is kept, and assigning a
+    key takes a constant number of dict lookups on average.
+
+    Args:
+        template: A :class:`BibkeyTemplate` or a template string, or
+            any callable making a base key of the tags of a record.
+
+    Attributes:
+        duplicates: The number of keys given with a suffix.
+    """
+
+    def __init__(self, template=DEFAULT_TEMPLATE) -> None:
+        if isinstance(template, str):
+            template = BibkeyTemplate(template)
+        self.template = template
+        # Base key -> the number of suffixes tried so far, plus one for
+        # the base key itself.
+        self._next: Dict[str, int] = {}
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        """Return the number of distinct base keys."""
+        return len(self._next)
+
+    def __call__(self, tags: Dict[str, str]) -> str:
+        return self.assign(self.template(tags))
+
+    def _is_suffixed_key(self, key: str) -> bool:
+        # Check if a key was given as some base key with a suffix.
+        for length in range(1, len(key)):
+            suffix = key[-length:]
+            if not ("a" <= suffix[0] <= "z"):
+                break
+            n = _suffix_number(suffix)
+            if 0 < n < self._next.get(key[:-length], 0):
+                return True
+        return False
+
+    def _is_taken(self, key: str) -> bool:
+        return key in self._next or self._is_suffixed_key(key)
+
+    def assign(self, base: str) -> str:
+        """Return a unique key for a base key."""
+        n = self._next.get(base)
+        if n is None:
+            if not self._is_suffixed_key(base):
+                self._next[base] = 1
+                return base
+            n = 1
+        key = base + _suffix(n)
+        while self._is_taken(key):
+            n += 1
+            key = base + _suffix(n)
+        self._next[base] = n + 1
+        self.duplicates += 1
+        return key
+
+    def rekey(self, entry: str) -> str:
+        """Replace the key of a BibTeX entry with a unique one.
+
+        The key found in the entry is used as the base key. This is
+        how the keys of entries converted with the template alone,
+        e.g. in workers, are made unique afterwards.
+
+        Raises:
+            ValueError: If the entry has no key.
+        """
+        start = entry.find("{") + 1
+        end = entry.find(",", start)
+        if start == 0 or end == -1:
+            raise ValueError(f"no bibkey found in the entry: {entry[:50]!r}")
+        base = entry[start:end]
+        key = self.assign(base)
+        if key == base:
+            return entry
+        return entry[:start] + key + entry[end:]
+
+    def clear(self) -> None:
+        self._next.clear()
+        self.duplicates = 0
+
+
+def split_registry(options: dict) -> tuple:
+    """Return the options with a registry replaced by its template.
+
+    Returns:
+        The options to convert records with in workers, and the
+        registry to apply to the entries with :meth:`rekey`, or None.
+
+    Raises:
+        ValueError: If the output format has no BibTeX keys.
+    """
+    registry: Optional[BibkeyRegistry] = options.get("bibkey")
+    if not isinstance(registry, BibkeyRegistry):
+        return options, None
+    output_format = options.get("output_format")
+    name = getattr(output_format, "name", output_format)
+    if name not in (None, "bibtex", "biblatex"):
+        raise ValueError(
+            "a bibkey registry is supported with workers only for the "
+            "BibTeX and BibLaTeX formats"
+        )
+    return {**options, "bibkey": registry.template}, registry
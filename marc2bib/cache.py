@@ -0,0 +1,99 @@
+"""A cache of hook results shared across records.
+
+Many values repeat across the records of a file, e.g. publishers
+("Springer,"), places ("New York :"), series and editions, while each
+of them goes through the same hooks again. Pass an instance of
+:class:`HookCache` as the ``hook_cache`` argument of
+:class:`marc2bib.Converter` (or :func:`marc2bib.iter_convert()`,
+:func:`marc2bib.convert_file()`) to compute the hooks only once for
+a repeated value::
+
+    cache = HookCache(maxsize=10_000)
+    convert_file("file.mrc", "file.bib", hook_cache=cache)
+    print(cache.info())
+
+The cache is used only if all of the hooks are pure (see
+:func:`marc2bib.hooks.pure`), as the default ones are.
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, NamedTuple, Sequence, Tuple
+
+
+DEFAULT_CACHE_SIZE = 10_000
+
+HookSig = Callable[[str, str], str]
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class HookCache:
+    """A bounded least recently used (LRU) cache of hook results.
+
+    The results are keyed on the tag, the value before the hooks and
+    the hooks applied, so a cache can be shared between converters.
+    Each distinct sequence of hooks (a pipeline) has its own
+    :func:`functools.lru_cache` of ``maxsize`` results.
+
+    Args:
+        maxsize: The maximum number of the cached results per pipeline.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        if maxsize < 1:
+            raise ValueError(f"maxsize should be positive, got {maxsize}")
+        self.maxsize = maxsize
+        self._pipelines: Dict[Tuple[HookSig, ...], HookSig] = {}
+
+    def __len__(self) -> int:
+        return self.info().currsize
+
+    def info(self) -> CacheInfo:
+        """Return the hit and miss counts and the size of the cache."""
+        hits = misses = currsize = 0
+        for cached in self._pipelines.values():
+            info = cached.cache_info()
+            hits += info.hits
+            misses += info.misses
+            currsize += info.currsize
+        return CacheInfo(hits, misses, self.maxsize, currsize)
+
+    @property
+    def hits(self) -> int:
+        return self.info().hits
+
+    @property
+    def misses(self) -> int:
+        return self.info().misses
+
+    def clear(self) -> None:
+        """Remove all of the cached results and reset the counts."""
+        for cached in self._pipelines.values():
+            cached.cache_clear()
+
+    def wrap(self, hooks: Sequence[HookSig]) -> HookSig:
+        """Return a hook applying the hooks in a row with caching."""
+        hooks = tuple(hooks)
+        try:
+            return self._pipelines[hooks]
+        except KeyError:
+            pass
+
+        def apply_hooks(tag: str, value: str) -> str:
+            for hook in hooks:
+                value = hook(tag, value)
+            return value
+
+        cached = lru_cache(maxsize=self.maxsize)(apply_hooks)
+        # Converters created in several threads get the same cache.
+        return self._pipelines.setdefault(hooks, cached)
+
+    def __getstate__(self) -> dict:
+        # The cached functions are not picklable, e.g. to be sent to
+        # worker processes, so the copy starts empty.
+        return {"maxsize": self.maxsize, "_pipelines": {}}
@@ -0,0 +1,460 @@
+"""The command-line interface of marc2bib.
+
+Reads MARC files (or the standard input) as a stream of records and
+writes BibTeX entries (or another format) to the standard output or a
+file:
+
+    $ marc2bib records.mrc -o records.bib
+    $ cat records.mrc | marc2bib --include edition,pages --workers 4
+    $ marc2bib records.mrc --to csl-json -o records.json
+
+A summary with the number of records, errors, elapsed time and
+throughput is reported to the standard error at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, TextIO
+
+from .cache import HookCache
+from .core import DEFAULT_CHUNK_SIZE, BOOK_OPT_TAGFUNCS, POOLS, Converter
+from .diagnostics import Diagnostics
+from .errors import DeadLetterFile, FailedRecord
+from .formats import FORMATS, make_format
+from .stats import ConversionStats
+from .writer import EntryWriter
+
+if TYPE_CHECKING:
+    from .incremental import IncrementalConverter
+    from .parallel import RecordResult
+
+
+# Bibkey styles. The functions are defined at the top level of the
+# module to be picklable when used with workers.
+
+
+def authoryeartitle_bibkey(tags: Dict[str, str]) -> str:
+    # E.g. "hargittai2009symmetry": the default key followed by the
+    # first word of the title, skipping the leading article.
+    name = tags["author"] if "author" in tags else tags["editor"]
+    surname = name.split(",")[0]
+    words = tags.get("title", "").lower().split()
+    if len(words) > 1 and words[0] in ("a", "an", "the"):
+        words = words[1:]
+    first_word = "".join(c for c in words[0] if c.isalnum()) if words else ""
+    return surname.lower() + tags["year"] + first_word
+
+
+BIBKEY_STYLES = {
+    "authoryear": None,
+    "authoryeartitle": authoryeartitle_bibkey,
+}
+
+# The bibkey templates of the styles for --unique-keys.
+BIBKEY_TEMPLATES = {
+    "authoryear": "{author}{year}",
+    "authoryeartitle": "{author}{year}{title}",
+}
+
+
+# Optional tags whose default tag-functions are not implemented yet,
+# left out of --include all.
+UNIMPLEMENTED_TAGS = ("note",)
+
+
+def _parse_include(value: str):
+    if value == "required":
+        return value
+    if value == "all":
+        return [
+            tag for tag in BOOK_OPT_TAGFUNCS if tag not in UNIMPLEMENTED_TAGS
+        ]
+    include = [tag.strip() for tag in value.split(",") if tag.strip()]
+    unknown = [tag for tag in include if tag not in BOOK_OPT_TAGFUNCS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown optional tag(s): {', '.join(unknown)}"
+        )
+    return include
+
+
+def _positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"should be positive, got {value}")
+    return number
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="marc2bib",
+        description="Convert MARC 21 bibliographic records to BibTeX.",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        default=["-"],
+        metavar="INPUT",
+        help="MARC files to read, or - for the standard input (default)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        help="a file to write to, or - for the standard output (default)",
+    )
+
+    group = parser.add_argument_group("conversion options")
+    group.add_argument(
+        "-t",
+        "--to",
+        choices=FORMATS,
+        default="bibtex",
+        help="output format (default: bibtex)",
+    )
+    group.add_argument(
+        "--bibtype", default="book", help="BibTeX entry type (default: book)"
+    )
+    group.add_argument(
+        "--include",
+        type=_parse_include,
+        default="required",
+        help=(
+            "'required', 'all' (except note, not implemented yet), or a "
+            "comma-separated list of optional tags to include "
+            "(default: required)"
+        ),
+    )
+    group.add_argument(
+        "--bibkey-style",
+        choices=BIBKEY_STYLES,
+        default="authoryear",
+        help="citation key style (default: authoryear)",
+    )
+    group.add_argument(
+        "--unique-keys",
+        action="store_true",
+        help=(
+            "append a, b, c, ... to repeated citation keys and "
+            "transliterate them to ASCII (not supported with --state)"
+        ),
+    )
+    group.add_argument(
+        "--indent",
+        type=int,
+        default=1,
+        help="tag line indentation (default: 1)",
+    )
+    group.add_argument(
+        "--align",
+        action="store_true",
+        help="align tag values by the longest tag",
+    )
+    group.add_argument(
+        "--keep-punctuation",
+        action="store_true",
+        help="do not remove ending ISBD punctuation",
+    )
+    group.add_argument(
+        "--no-latexify",
+        action="store_true",
+        help="do not convert values for use with LaTeX",
+    )
+
+    group = parser.add_argument_group("processing options")
+    group.add_argument(
+        "-j",
+        "--workers",
+        type=_positive_int,
+        default=1,
+        help="the number of workers (default: 1)",
+    )
+    group.add_argument(
+        "--pool",
+        choices=POOLS,
+        default="process",
+        help=(
+            "run the workers as processes or as threads sharing one "
+            "converter (default: process)"
+        ),
+    )
+    group.add_argument(
+        "--chunk-size",
+        type=_positive_int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=(
+            "the number of records read and converted at once "
+            f"(default: {DEFAULT_CHUNK_SIZE})"
+        ),
+    )
+    group.add_argument(
+        "--lazy",
+        action="store_true",
+        help="decode only the fields used by the tag-functions",
+    )
+    group.add_argument(
+        "--unordered",
+        action="store_true",
+        help="with workers, write entries as soon as they are ready",
+    )
+    group.add_argument(
+        "--state",
+        metavar="FILE",
+        help=(
+            "convert only records changed since the run with the same "
+            "state FILE and reuse the rest (not supported with workers)"
+        ),
+    )
+    group.add_argument(
+        "--deleted",
+        metavar="FILE",
+        help=(
+            "with --state, write the control numbers of records deleted "
+            "since the last run to FILE"
+        ),
+    )
+    group.add_argument(
+        "--cache-size",
+        type=int,
+        default=0,
+        help=(
+            "cache the results of the hooks for this many repeated values "
+            "(default: 0, no cache)"
+        ),
+    )
+    group.add_argument(
+        "--stats",
+        metavar="FILE",
+        help=(
+            "write timings of the tag-functions and hooks as JSON to FILE "
+            "(not supported with worker processes)"
+        ),
+    )
+    group.add_argument(
+        "--dead-letter",
+        metavar="FILE",
+        help=(
+            "write the records which cannot be converted, with their "
+            "errors, to FILE as JSON lines"
+        ),
+    )
+    group.add_argument(
+        "--progress",
+        action="store_true",
+        help="report progress to the standard error while converting",
+    )
+    group.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="do not report errors and the summary",
+    )
+
+    return parser
+
+
+class Progress:
+    """Count converted records and errors and report the throughput."""
+
+    # Report progress no more than once per this number of seconds.
+    interval = 1.0
+
+    def __init__(self, stream: TextIO, show: bool = False) -> None:
+        self.stream = stream
+        self.show = show
+        self.records = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self._reported = self.started
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def rate(self) -> float:
+        elapsed = self.elapsed
+        return self.records / elapsed if elapsed > 0 else 0.0
+
+    def update(self, records: int, errors: int) -> None:
+        self.records += records
+        self.errors += errors
+        if self.show:
+            now = time.perf_counter()
+            if now - self._reported >= self.interval:
+                self._reported = now
+                self.stream.write(f"\r{self.status()}")
+                self.stream.flush()
+
+    def status(self) -> str:
+        return (
+            f"{self.records} records, {self.errors} errors, "
+            f"{self.elapsed:.1f} s, {self.rate():.1f} records/s"
+        )
+
+    def summary(self) -> str:
+        prefix = "\r" if self.show else ""
+        return f"{prefix}Converted {self.status()}\n"
+
+
+def _convert_incremental(
+    incremental: IncrementalConverter, chunk: List[bytes], start: int
+) -> Iterator[RecordResult]:
+    from .parallel import RecordResult
+
+    for index, raw in enumerate(chunk, start):
+        try:
+            bibtex = incremental.convert_raw(raw)
+        except Exception as e:
+            failed = FailedRecord.from_exception(index, raw, e)
+            yield RecordResult(index, None, e, failed)
+        else:
+            yield RecordResult(index, bibtex, None)
+
+
+def _iter_results(
+    inputs: List[str],
+    args,
+    options,
+    incremental: Optional[IncrementalConverter] = None,
+) -> Iterator[RecordResult]:
+    from .parallel import convert_chunk, iter_chunks, iter_convert_parallel
+
+    start = 0
+    converter = Converter(**options)
+    for name in inputs:
+        stream = sys.stdin.buffer if name == "-" else open(name, "rb")
+        try:
+            if args.workers > 1:
+                results = iter_convert_parallel(
+                    stream,
+                    args.workers,
+                    args.chunk_size,
+                    not args.unordered,
+                    args.lazy,
+                    args.pool,
+                    **options,
+                )
+                count = 0
+                for result in results:
+                    count += 1
+                    yield result._replace(index=result.index + start)
+                start += count
+            else:
+                for chunk in iter_chunks(stream, args.chunk_size):
+                    if incremental is not None:
+                        yield from _convert_incremental(
+                            incremental, chunk, start
+                        )
+                    else:
+                        yield from convert_chunk(
+                            converter, chunk, start, args.lazy
+                        )
+                    start += len(chunk)
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = make_parser().parse_args(argv)
+
+    options = dict(
+        bibtype=args.bibtype,
+        bibkey=BIBKEY_STYLES[args.bibkey_style],
+        include=args.include,
+        remove_punctuation=not args.keep_punctuation,
+        latexify=not args.no_latexify,
+        indent=args.indent,
+        do_align=args.align,
+    )
+    if args.unique_keys:
+        from .bibkeys import BibkeyRegistry
+
+        options["bibkey"] = BibkeyRegistry(BIBKEY_TEMPLATES[args.bibkey_style])
+    if args.to != "bibtex":
+        options["output_format"] = args.to
+    if args.cache_size > 0:
+        options["hook_cache"] = HookCache(args.cache_size)
+    if args.stats:
+        options["stats"] = ConversionStats()
+    # Counted instead of a warning per record.
+    options["diagnostics"] = Diagnostics()
+
+    to_stdout = args.output == "-"
+    output = sys.stdout.buffer if to_stdout else open(args.output, "wb")
+
+    progress = Progress(sys.stderr, args.progress and not args.quiet)
+    writer = EntryWriter(output, output_format=make_format(args.to))
+    incremental = None
+    dead_letter = None
+    try:
+        if args.dead_letter:
+            dead_letter = DeadLetterFile(args.dead_letter)
+        if args.state:
+            from .incremental import IncrementalConverter
+
+            if args.workers > 1:
+                raise ValueError("--state is not supported with workers")
+            incremental = IncrementalConverter(
+                args.state, args.lazy, **options
+            )
+        results = _iter_results(args.inputs, args, options, incremental)
+        for result in results:
+            if result.error is None:
+                writer.write(result.bibtex)
+                progress.update(1, 0)
+            else:
+                progress.update(0, 1)
+                if dead_letter is not None:
+                    dead_letter.append(result.failed)
+                if not args.quiet:
+                    # With the type, e.g. of errors without a message.
+                    error = result.failed.error
+                    sys.stderr.write(
+                        f"marc2bib: record {result.index}: {error}\n"
+                    )
+        writer.close()
+        if incremental is not None:
+            incremental.finish()
+    except Exception as e:
+        if incremental is not None:
+            incremental.close()
+        sys.stderr.write(f"marc2bib: error: {e}\n")
+        return 2
+    finally:
+        # Also write out the entries converted before an error, as
+        # convert_file() does.
+        writer.close()
+        if to_stdout:
+            # Keep the standard output open for the caller.
+            output.flush()
+        else:
+            output.close()
+        if dead_letter is not None:
+            dead_letter.close()
+
+    if args.stats:
+        with open(args.stats, "w", encoding="utf-8") as f:
+            f.write(options["stats"].to_json(indent=2))
+
+    if incremental is not None:
+        report = incremental.report
+        if args.deleted:
+            with open(args.deleted, "w", encoding="utf-8") as f:
+                f.writelines(f"{number}\n" for number in report.deleted)
+        if not args.quiet:
+            sys.stderr.write(
+                f"Reused {report.reused} records, converted "
+                f"{report.converted}, deleted {len(report.deleted)}\n"
+            )
+
+    if not args.quiet:
+        sys.stderr.write(progress.summary())
+        diagnostics = options.get("diagnostics")
+        if diagnostics:
+            sys.stderr.write(f"Empty tags:\n{diagnostics.summary()}\n")
+
+    return 1 if progress.errors else 0
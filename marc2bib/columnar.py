@@ -0,0 +1,284 @@
+"""Columnar mapping of many records at once.
+
+:func:`map_tags_batch` maps records into columns, i.e. a list of
+values per BibTeX tag, instead of a dict of tags per record::
+
+    columns = map_tags_batch("file.mrc", include=["edition"])
+    columns["year"]  # ['2009', '2015', None, ...]
+
+The tag-functions are still called once per record, but the hooks are
+applied to a whole column at once (see
+:func:`marc2bib.hooks.apply_hook_to_column`): the default LaTeX
+conversion makes a single regex pass over all values of a tag, and the
+rest of the pure hooks are called once per distinct value, which saves
+a lot of calls on repeated publishers, places, series and so on.
+
+The columns can also be returned as a :class:`pandas.DataFrame` or a
+:class:`pyarrow.Table` to be analysed further. pandas and pyarrow are
+optional dependencies (``pip install marc2bib[pandas]``).
+
+To keep the tags of a whole catalogue in memory, e.g. to generate keys
+or serialize them again, return them as a compact :class:`TagTable`
+(``table="tags"``), which reads each record as a dict-like
+:class:`TagRow`::
+
+    table = map_tags_batch("file.mrc", table="tags")
+    for tags in table:
+        print(tags_to_bibtex(tags))
+"""
+
+import os
+import sys
+from array import array
+from collections.abc import Mapping
+from typing import (
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pymarc import Record  # type: ignore
+
+from .core import Converter, _read_records, _tag_sort_key
+from .hooks import apply_hook_to_column
+
+
+Columns = Dict[str, List[Optional[str]]]
+
+TABLES = ("pandas", "pyarrow", "tags")
+
+
+def map_tags_batch(
+    records: Union[str, os.PathLike, BinaryIO, Iterable[Record]],
+    *,
+    lazy: bool = False,
+    table: Optional[str] = None,
+    **options,
+):
+    """Map MARC fields of many records into columns of BibTeX tags.
+
+    The values are the same as returned by :func:`marc2bib.map_tags()`
+    for each of the records, except that hooks are applied per column.
+
+    Args:
+        records: An iterable of records (instances of
+            :class:`pymarc.Record` or
+            :class:`marc2bib.iso2709.RawRecord`), or a path to a MARC
+            file or a binary stream to read them from.
+        lazy: If True, read records from a file with
+            :class:`marc2bib.iso2709.RawRecord`.
+        table: If 'pandas' or 'pyarrow', return the columns as
+            a :class:`pandas.DataFrame` or a :class:`pyarrow.Table`. If
+            'tags', return them as a :class:`TagTable`.
+        **options: Keyword arguments passed to
+            :class:`marc2bib.Converter`, except ``stats``.
+
+    Returns:
+        A dict of the columns, ordered as the tags of an entry. Each
+        column has a value for each of the records, or None if the tag
+        is blank (or missing) in the record. Or a table, see
+        ``table``.
+
+    Raises:
+        MARC2BibError: If a record cannot be read or converted.
+    """
+    if table is not None and table not in TABLES:
+        raise ValueError(f"unknown table {table!r}, expected one of {TABLES}")
+    if options.get("stats") is not None:
+        raise ValueError("stats are not supported in the batch mode")
+
+    converter = Converter(**options)
+    if isinstance(records, (str, os.PathLike)) or hasattr(records, "read"):
+        if lazy:
+            from .iso2709 import iter_raw_records
+
+            records = iter_raw_records(records, converter.marc_tags)
+        else:
+            records = _read_records(records)
+
+    columns = _map_columns(converter, records)
+    if table is None:
+        return columns
+    return to_table(columns, table)
+
+
+def _map_columns(converter: Converter, records: Iterable[Record]) -> Columns:
+    # The rows and values of each tag before the hooks.
+    raw: Dict[str, Tuple[List[int], List[str]]] = {}
+    hooks_by_tag = {}
+    count = 0
+    for row, record in enumerate(records):
+        pipeline, values = converter._tag_values(record)
+        for (tag, _, _, hooks), value in zip(pipeline, values):
+            try:
+                rows, column = raw[tag]
+            except KeyError:
+                rows, column = raw[tag] = ([], [])
+                hooks_by_tag[tag] = hooks
+            rows.append(row)
+            column.append(value)
+        count = row + 1
+
+    allow_blank = converter.allow_blank
+    columns: Columns = {}
+    for tag in sorted(raw, key=_tag_sort_key(converter.tag_order)):
+        rows, values = raw[tag]
+        for hook in hooks_by_tag[tag]:
+            values = apply_hook_to_column(hook, tag, values)
+
+        result: List[Optional[str]] = [None] * count
+        for row, value in zip(rows, values):
+            if allow_blank or value.strip():
+                result[row] = value
+        columns[tag] = result
+    return columns
+
+
+def to_table(columns: Columns, table: str = "pandas"):
+    """Convert the columns to a pandas DataFrame or a pyarrow Table.
+
+    Or to a :class:`TagTable` with ``table="tags"``.
+    """
+    if table == "tags":
+        return TagTable.from_columns(columns)
+    if table == "pandas":
+        import pandas  # type: ignore
+
+        return pandas.DataFrame(columns, dtype=object)
+    if table == "pyarrow":
+        import pyarrow  # type: ignore
+
+        return pyarrow.table(
+            {
+                tag: pyarrow.array(column, type=pyarrow.string())
+                for tag, column in columns.items()
+            }
+        )
+    raise ValueError(f"unknown table {table!r}, expected one of {TABLES}")
+
+
+class TagRow(Mapping):
+    """The tags of a record in a :class:`TagTable`, a read-only mapping.
+
+    A row is a view of the table: no dict is built for it. It can be
+    passed to :func:`marc2bib.tags_to_bibtex()` as is.
+    """
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "TagTable", row: int) -> None:
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, tag: str) -> str:
+        code = self._table._columns[tag][self._row]
+        if not code:
+            raise KeyError(tag)
+        return self._table._strings[code]
+
+    def __iter__(self) -> Iterator[str]:
+        row = self._row
+        for tag, codes in self._table._columns.items():
+            if codes[row]:
+                yield tag
+
+    def __len__(self) -> int:
+        row = self._row
+        return sum(1 for codes in self._table._columns.values() if codes[row])
+
+    def __repr__(self) -> str:
+        return f"TagRow({dict(self)!r})"
+
+
+class TagTable:
+    """The tags of many records stored column-wise.
+
+    Each tag is a column of 32-bit codes, one per record, into a
+    single table of distinct values, so a value repeated across
+    records (e.g. a publisher or a place) is stored once, and a tag
+    missing from a record takes 4 bytes. Tag names are interned.
+
+    Indexing and iterating over the table yields :class:`TagRow` views
+    with the tags of each record in the column order.
+
+    Args:
+        rows: The tags of records to append, e.g. dicts returned by
+            :func:`marc2bib.map_tags()`.
+    """
+
+    def __init__(self, rows: Iterable[Mapping] = ()) -> None:
+        self._columns: Dict[str, array] = {}
+        # Code 0 stands for a missing tag.
+        self._strings: List[Optional[str]] = [None]
+        self._codes: Dict[str, int] = {}
+        self._count = 0
+        for tags in rows:
+            self.append(tags)
+
+    @classmethod
+    def from_columns(cls, columns: Columns) -> "TagTable":
+        """Create a table of columns returned by :func:`map_tags_batch`."""
+        table = cls()
+        for tag, column in columns.items():
+            table._columns[sys.intern(tag)] = array(
+                "I", map(table._code, column)
+            )
+            table._count = len(column)
+        return table
+
+    def _code(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    def append(self, tags: Mapping) -> None:
+        """Append the tags of a record."""
+        columns = self._columns
+        for tag in tags:
+            if tag not in columns:
+                columns[sys.intern(tag)] = array("I", [0]) * self._count
+        for tag, codes in columns.items():
+            value = tags.get(tag)
+            codes.append(0 if value is None else self._code(value))
+        self._count += 1
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, row: int) -> TagRow:
+        if row < 0:
+            row += self._count
+        if not 0 <= row < self._count:
+            raise IndexError(f"row index out of range: {row}")
+        return TagRow(self, row)
+
+    def __iter__(self) -> Iterator[TagRow]:
+        for row in range(self._count):
+            yield TagRow(self, row)
+
+    @property
+    def tags(self) -> List[str]:
+        """The tags of the columns in order."""
+        return list(self._columns)
+
+    @property
+    def distinct_values(self) -> int:
+        """The number of distinct values stored."""
+        return len(self._strings) - 1
+
+    def column(self, tag: str) -> List[Optional[str]]:
+        """Return the values of a tag, None where it is missing."""
+        strings = self._strings
+        return [strings[code] for code in self._columns[tag]]
+
+    def to_columns(self) -> Columns:
+        return {tag: self.column(tag) for tag in self._columns}
@@ -16,14 +16,48 @@ original manual dated 1988 [5].
 [5] http://ctan.uni-altai.ru/biblio/bibtex/base/btxdoc.pdf
 """
 
+from __future__ import annotations
+
+import os
 import re
 import warnings
-from typing import Callable, Dict, Iterable, Optional, Union
-
-from pymarc import MARCReader, Record  # type: ignore
+from functools import lru_cache
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    Optional,
+    Sequence,
+    TextIO,
+    TYPE_CHECKING,
+    Tuple,
+    Union,
+)
 
 from . import tagfuncs as default_tagfuncs
-from .hooks import compose_hooks, remove_isbd_punctuation_hook, latexify_hook
+from .fieldindex import FieldIndex
+from .hooks import (
+    COMMON_ABBREVIATIONS,
+    compose_hooks,
+    is_pure,
+    remove_isbd_punctuation_hook,
+    latexify_hook,
+)
+from .cache import HookCache
+from .diagnostics import NONE_VALUE, Diagnostics
+from .errors import FailedRecord, check_error_policy
+from .stats import ConversionStats
+
+if TYPE_CHECKING:
+    # pymarc is imported only to read MARC files, see _read_records();
+    # records are duck-typed otherwise.
+    from pymarc import Record  # type: ignore
+
+    from .dedup import Deduplicator
+    from .formats import OutputFormat
 
 
 BOOK_REQ_TAGFUNCS = {
@@ -44,40 +78,76 @@ BOOK_OPT_TAGFUNCS = {
     "pages": default_tagfuncs.get_pages,
     "series": default_tagfuncs.get_series,
     "subtitle": default_tagfuncs.get_subtitle,
-    "isbn": Record.isbn,
+    "isbn": default_tagfuncs.get_isbn,
+}
+
+
+# The BibTeX tags named differently in BibLaTeX.
+BIBLATEX_TAGS = {
+    "address": "location",
+    # The total number of pages of a book, not a page range.
+    "pages": "pagetotal",
 }
 
+VERSIONS = ("bibtex", "biblatex")
+
 
 class MARC2BibError(Exception):
     pass
 
 
-# fmt: off
-COMMON_ABBREVIATIONS = (
-    "co.", "ed.", "eds.", "et al.", "v.", "vol.", "vols.", "inc.", "p.",
-)
-# fmt: on
+TagfunctionsSig = Dict[str, Callable[["Record"], str]]
+PostHookSig = Callable[[str, str], str]
 
+# The number of records read and sent to a worker at once.
+DEFAULT_CHUNK_SIZE = 1000
+
+# The kinds of worker pools, see marc2bib.parallel.
+POOLS = ("process", "thread")
 
-TagfunctionsSig = Dict[str, Callable[[Record], str]]
-PostHookSig = Callable[[str, str], str]
+
+@lru_cache(maxsize=None)
+def _tag_prefix(indent: int) -> str:
+    # Ends the previous line and indents a tag line.
+    return ",\n" + " " * indent
+
+
+def _tag_sort_key(
+    tag_order: Optional[Sequence[str]],
+) -> Callable[[str], Tuple[int, str]]:
+    # Tags missing from the order follow in alphabetical order.
+    ranks = {tag: rank for rank, tag in enumerate(tag_order or ())}
+    last = len(ranks)
+    return lambda tag: (ranks.get(tag, last), tag)
 
 
 def _as_bibtex(
     bibtype: str,
     bibkey: str,
-    tags: Dict[str, str],
+    tags: Mapping[str, str],
     indent: int,
     do_align: bool,
+    tag_order: Optional[Sequence[str]] = None,
+    presorted: bool = False,
 ) -> str:
-    tag_width = max(map(len, tags)) if do_align else 0
-
-    bibtex = f"@{bibtype}{{{bibkey}"
-    for tag, value in sorted(tags.items()):
-        bibtex += f',\n{" " * indent}{tag:<{tag_width}} = {{{value}}}'
-    bibtex += "\n}\n"
-
-    return bibtex
+    if presorted:
+        # E.g. by Converter, which maps tags in the output order.
+        items: Iterable[Tuple[str, str]] = tags.items()
+    elif tag_order is None:
+        items = sorted(tags.items())
+    else:
+        key = _tag_sort_key(tag_order)
+        items = sorted(tags.items(), key=lambda item: key(item[0]))
+
+    prefix = _tag_prefix(indent)
+    if do_align:
+        tag_width = max(map(len, tags))
+        lines = [
+            f"{prefix}{tag:<{tag_width}} = {{{value}}}" for tag, value in items
+        ]
+    else:
+        lines = [f"{prefix}{tag} = {{{value}}}" for tag, value in items]
+    return f"@{bibtype}{{{bibkey}{''.join(lines)}\n}}\n"
 
 
 def map_tags(
@@ -89,14 +159,41 @@ def map_tags(
     latexify: bool = True,
     post_hooks: Optional[list[PostHookSig]] = None,
     version: str = "bibtex",
+    stats: Optional[ConversionStats] = None,
 ) -> Dict[str, str]:
     """Map MARC fields of a record into the BibTeX tags.
 
     See docstring of :obj:`marc2bib.core.convert()` for the arguments.
     """
+    converter = Converter(
+        tagfuncs=tagfuncs,
+        include=include,
+        allow_blank=allow_blank,
+        remove_punctuation=remove_punctuation,
+        latexify=latexify,
+        post_hooks=post_hooks,
+        version=version,
+        stats=stats,
+    )
+    return converter.map_tags(record)
+
+
+def _resolve_tagfuncs(
+    tagfuncs: Optional[TagfunctionsSig] = None,
+    include: Union[str, Iterable[str]] = "required",
+    version: str = "bibtex",
+) -> TagfunctionsSig:
+    """Resolve the tag-functions to use for the given arguments.
+
+    The result does not depend on a record, so it is computed once per
+    :class:`Converter`.
+    """
+    if version not in VERSIONS:
+        raise ValueError(
+            f"version argument should be one of {VERSIONS}, got {version}"
+        )
+
     ctx_tagfuncs = BOOK_REQ_TAGFUNCS.copy()
-    if version == "biblatex":
-        ctx_tagfuncs["location"] = ctx_tagfuncs.pop("address")
 
     if include == "all":
         ctx_tagfuncs.update(BOOK_OPT_TAGFUNCS)
@@ -124,92 +221,56 @@ def map_tags(
             for tag in include:
                 ctx_tagfuncs[tag] = BOOK_OPT_TAGFUNCS[tag]
 
+    if version == "biblatex":
+        ctx_tagfuncs = {
+            BIBLATEX_TAGS.get(tag, tag): func
+            for tag, func in ctx_tagfuncs.items()
+        }
+
     if tagfuncs:
         ctx_tagfuncs.update(tagfuncs)
 
-    ctx_tags = {}
-
-    # Check for author tag first, then editor.
-    author = ctx_tagfuncs["author"](record)
-    if not author:
-        # If so, remove the author tag-function from the context and
-        # try to get editor using user-provided or default tag-function.
-        ctx_tagfuncs.pop("author")
-
-        try:
-            editor_tagfunc = ctx_tagfuncs["editor"]
-        except KeyError:
-            editor_tagfunc = BOOK_OPT_TAGFUNCS["editor"]
-
-        editor = editor_tagfunc(record)
-        if editor:
-            ctx_tagfuncs["editor"] = editor_tagfunc
-        else:
-            msg = "both author and editor (required) tags are treated empty."
-            raise MARC2BibError(msg)
-
-    for tag, func in ctx_tagfuncs.items():
-        tag_value = func(record)
-        if not isinstance(tag_value, str) and tag_value is not None:
-            msg = (
-                f"Returned value from {func} for {tag} tag "
-                "should be a string or None"
-            )
-            raise TypeError(msg)
-
-        if tag_value is None:
-            msg = (
-                f"The content of tag `{tag}` is None, "
-                "replacing it with an empty value"
-            )
-            warnings.warn(UserWarning(msg))
-            tag_value = ""
-
-        if remove_punctuation:
-            tag_value = remove_isbd_punctuation_hook(tag, tag_value)
-
-        if latexify:
-            tag_value = latexify_hook(tag, tag_value)
-
-        if post_hooks:
-            composed = compose_hooks(*post_hooks)
-            tag_value = composed(tag, tag_value)
-
-        blank_and_allowed = tag_value.strip() == "" and allow_blank
-        if tag_value.strip() or blank_and_allowed:
-            # Above all, we only accept non-blank field values and
-            # empty values if they are allowed by the given argument.
-            ctx_tags[tag] = tag_value
-
-    return ctx_tags
+    return ctx_tagfuncs
 
 
 def tags_to_bibtex(
-    tags: Dict[str, str],
+    tags: Mapping[str, str],
     bibtype: str = "book",
     bibkey: Optional[Union[str, Callable[[Record], str]]] = None,
     indent: int = 1,
     do_align: bool = False,
+    tag_order: Optional[Sequence[str]] = None,
 ) -> str:
     """Translate BibTeX tags into a BibTeX-formatted string.
 
+    The tags can be any mapping, e.g. a row of
+    a :class:`marc2bib.columnar.TagTable`.
+
     See docstring of :obj:`marc2bib.core.convert()'` for the arguments.
     """
+    bibkey_value = _bibkey_value(tags, bibkey)
+    bibtex = _as_bibtex(
+        bibtype, bibkey_value, tags, indent, do_align, tag_order
+    )
+
+    return bibtex
+
+
+def _bibkey_value(
+    tags: Mapping[str, str],
+    bibkey: Optional[Union[str, Callable[[Record], str]]],
+) -> str:
     if bibkey is None:
         try:
             authors_or_editors = tags["author"]
         except KeyError:
             authors_or_editors = tags["editor"]
         surname = authors_or_editors.split(",")[0]
-        bibkey_value = surname.lower() + tags["year"]
+        return surname.lower() + tags["year"]
     elif callable(bibkey):
-        bibkey_value = bibkey(tags)
+        return bibkey(tags)
     else:
-        bibkey_value = bibkey
-
-    bibtex = _as_bibtex(bibtype, bibkey_value, tags, indent, do_align)
-
-    return bibtex
+        return bibkey
 
 
 def convert(
@@ -224,6 +285,9 @@ def convert(
     post_hooks: Optional[list[PostHookSig]] = None,
     indent: int = 1,
     do_align: bool = False,
+    version: str = "bibtex",
+    tag_order: Optional[Sequence[str]] = None,
+    stats: Optional[ConversionStats] = None,
 ) -> str:
     """Converts an instance of :class:`pymarc.Record` to a BibTeX entry.
 
@@ -266,20 +330,560 @@ def convert(
         indent (int): The tag line indentation. Defaults to 1.
         do_align: If True, align tag values by the longest tag.
             Defaults to False.
+        version: Either 'bibtex' or 'biblatex'. With 'biblatex', the
+            tags are named as BibLaTeX fields (see
+            :data:`BIBLATEX_TAGS`), e.g. 'location' for 'address'.
+            Defaults to 'bibtex'.
+        tag_order: If given, the order of tags in the output. The
+            tags not in it follow in alphabetical order. Defaults to
+            None, i.e. all tags are sorted alphabetically.
+        stats: If given, an instance of
+            :class:`marc2bib.stats.ConversionStats` to collect timings
+            of the tag-functions and hooks in. Defaults to None.
 
     Returns:
         A BibTeX-formatted string.
 
     """
-    ctx_tags = map_tags(
-        record,
+    converter = Converter(
+        bibtype,
+        bibkey,
         tagfuncs,
         include,
         allow_blank,
         remove_punctuation,
         latexify,
         post_hooks,
+        indent,
+        do_align,
+        version,
+        tag_order=tag_order,
+        stats=stats,
     )
-    bibtex = tags_to_bibtex(ctx_tags, bibtype, bibkey, indent, do_align)
+    return converter.convert(record)
 
-    return bibtex
+
+def _uses_field_index(func: Callable) -> bool:
+    # See marc2bib.tagfuncs.indexed().
+    return getattr(func, "uses_field_index", False)
+
+
+def _make_pipeline(
+    tagfuncs: TagfunctionsSig,
+    hooks: Tuple[PostHookSig, ...],
+    sort_key: Callable[[str], Tuple[int, str]],
+) -> tuple:
+    return tuple(
+        (tag, tagfuncs[tag], _uses_field_index(tagfuncs[tag]), hooks)
+        for tag in sorted(tagfuncs, key=sort_key)
+    )
+
+
+class Converter:
+    """A reusable converter with the fixed conversion arguments.
+
+    The arguments are validated, and the tag-functions and hooks are
+    resolved into a fixed per-tag pipeline once on creation. Thus,
+    :meth:`map_tags()` and :meth:`convert()` do no per-call setup,
+    which pays off when converting many records in a row::
+
+        converter = Converter(include=["edition"], do_align=True)
+        for record in reader:
+            print(converter.convert(record))
+
+    See docstring of :obj:`marc2bib.core.convert()` for the arguments.
+
+    Args:
+        hook_cache: If given, an instance of
+            :class:`marc2bib.cache.HookCache` to cache the results of
+            the hooks in across records. It is used only if all of the
+            hooks are pure (see :func:`marc2bib.hooks.pure`).
+        output_format: If given, an output format or its name to
+            convert records to instead of BibTeX, e.g. 'csl-json'; see
+            :mod:`marc2bib.formats`. ``latexify`` applies only to the
+            formats read by LaTeX.
+        diagnostics: If given, an instance of
+            :class:`marc2bib.diagnostics.Diagnostics` to count the
+            tag-functions returning None in, instead of issuing
+            a :class:`UserWarning` each time.
+
+    Attributes:
+        marc_tags: The tags of all MARC fields read by the
+            tag-functions, or None if some of them do not declare
+            their fields (see :func:`marc2bib.tagfuncs.reads`).
+        caches_hooks: True if the results of the hooks are cached.
+    """
+
+    def __init__(
+        self,
+        bibtype: str = "book",
+        bibkey: Optional[Union[str, Callable[[Record], str]]] = None,
+        tagfuncs: Optional[TagfunctionsSig] = None,
+        include: Union[str, Iterable[str]] = "required",
+        allow_blank: bool = False,
+        remove_punctuation: bool = True,
+        latexify: bool = True,
+        post_hooks: Optional[list[PostHookSig]] = None,
+        indent: int = 1,
+        do_align: bool = False,
+        version: str = "bibtex",
+        tag_order: Optional[Sequence[str]] = None,
+        stats: Optional[ConversionStats] = None,
+        hook_cache: Optional[HookCache] = None,
+        output_format: Optional[Union[str, "OutputFormat"]] = None,
+        diagnostics: Optional[Diagnostics] = None,
+    ) -> None:
+        self.bibtype = bibtype
+        self.bibkey = bibkey
+        self.allow_blank = allow_blank
+        self.indent = indent
+        self.do_align = do_align
+        self.tag_order = None if tag_order is None else tuple(tag_order)
+
+        if isinstance(output_format, str):
+            from .formats import make_format
+
+            output_format = make_format(
+                output_format, indent, do_align, self.tag_order
+            )
+        self.output_format = output_format
+        if output_format is not None and not output_format.latex:
+            latexify = False
+
+        self.stats = stats
+        self.diagnostics = diagnostics
+
+        ctx_tagfuncs = _resolve_tagfuncs(tagfuncs, include, version)
+
+        hooks = []
+        if remove_punctuation:
+            hooks.append(remove_isbd_punctuation_hook)
+        if latexify:
+            hooks.append(latexify_hook)
+        # Results of the hooks are cached only if all of them are pure.
+        self.caches_hooks = hook_cache is not None and all(
+            map(is_pure, [*hooks, *(post_hooks or ())])
+        )
+        if stats is not None:
+            # Time each of the post hooks, not their composition.
+            hooks = [stats.timed_hook(hook) for hook in hooks]
+            post_hooks = [stats.timed_hook(hook) for hook in post_hooks or ()]
+        if post_hooks:
+            hooks.append(compose_hooks(*post_hooks))
+        hooks = tuple(hooks)
+        if self.caches_hooks and hooks:
+            hooks = (hook_cache.wrap(hooks),)
+
+        # If a record has no author, the author tag-function is
+        # replaced by the user-provided or default editor one.
+        editor_tagfuncs = ctx_tagfuncs.copy()
+        editor_tagfuncs.pop("author")
+        if "editor" not in editor_tagfuncs:
+            editor_tagfuncs["editor"] = BOOK_OPT_TAGFUNCS["editor"]
+
+        if stats is not None:
+            ctx_tagfuncs = {
+                tag: stats.timed_tagfunc(tag, func)
+                for tag, func in ctx_tagfuncs.items()
+            }
+            editor_tagfuncs = {
+                tag: stats.timed_tagfunc(tag, func)
+                for tag, func in editor_tagfuncs.items()
+            }
+
+        self._author_tagfunc = ctx_tagfuncs["author"]
+        self._editor_tagfunc = editor_tagfuncs["editor"]
+        # Tags are mapped in the output order, so that entries are
+        # serialized without sorting them each time.
+        sort_key = _tag_sort_key(self.tag_order)
+        self._pipeline = _make_pipeline(ctx_tagfuncs, hooks, sort_key)
+        self._editor_pipeline = _make_pipeline(
+            editor_tagfuncs, hooks, sort_key
+        )
+        all_tagfuncs = [*ctx_tagfuncs.values(), self._editor_tagfunc]
+        # A field index is built only if some tag-function uses it.
+        self._uses_field_index = any(map(_uses_field_index, all_tagfuncs))
+        self.marc_tags = default_tagfuncs.declared_tags(all_tagfuncs)
+
+        if stats is not None or diagnostics is not None:
+            # Records are identified by the control number.
+            if self.marc_tags is not None:
+                self.marc_tags |= {"001"}
+        if stats is not None:
+            self.map_tags = self._timed_map_tags  # type: ignore
+
+    def _timed_map_tags(self, record: Record) -> Dict[str, str]:
+        self.stats.start_record(record)
+        try:
+            return Converter.map_tags(self, record)
+        finally:
+            self.stats.end_record()
+
+    def map_tags(self, record: Record) -> Dict[str, str]:
+        """Map MARC fields of a record into the BibTeX tags."""
+        return self._apply_hooks(*self._tag_values(record))
+
+    def _apply_hooks(self, pipeline: tuple, values: list) -> Dict[str, str]:
+        # Return the tags of the values returned by _tag_values().
+        ctx_tags = {}
+        allow_blank = self.allow_blank
+
+        for (tag, _, _, hooks), tag_value in zip(pipeline, values):
+            for hook in hooks:
+                tag_value = hook(tag, tag_value)
+
+            blank_and_allowed = tag_value.strip() == "" and allow_blank
+            if tag_value.strip() or blank_and_allowed:
+                # Above all, we only accept non-blank field values and
+                # empty values if they are allowed by the given argument.
+                ctx_tags[tag] = tag_value
+
+        return ctx_tags
+
+    def _tag_values(self, record: Record) -> Tuple[tuple, list]:
+        # Return the pipeline used for a record and the values of its
+        # tag-functions before the hooks, in the pipeline order.
+        if isinstance(record, FieldIndex):
+            # E.g. a lazily decoded marc2bib.iso2709.RawRecord.
+            index = record
+        elif self._uses_field_index:
+            index = FieldIndex(record, self.marc_tags)
+        else:
+            index = None
+
+        # Check for author tag first, then editor. The found value is
+        # reused below instead of calling its tag-function again.
+        pipeline = self._pipeline
+        name_tag = "author"
+        name_tagfunc = self._author_tagfunc
+        name_value = name_tagfunc(
+            index if _uses_field_index(name_tagfunc) else record
+        )
+        if not name_value:
+            pipeline = self._editor_pipeline
+            name_tag = "editor"
+            name_tagfunc = self._editor_tagfunc
+            name_value = name_tagfunc(
+                index if _uses_field_index(name_tagfunc) else record
+            )
+            if not name_value:
+                msg = (
+                    "both author and editor (required) tags are "
+                    "treated empty."
+                )
+                raise MARC2BibError(msg)
+
+        values = []
+        for tag, func, uses_index, _ in pipeline:
+            if tag == name_tag:
+                tag_value = name_value
+            elif uses_index:
+                tag_value = func(index)
+            else:
+                tag_value = func(record)
+
+            if not isinstance(tag_value, str) and tag_value is not None:
+                msg = (
+                    f"Returned value from {func} for {tag} tag "
+                    "should be a string or None"
+                )
+                raise TypeError(msg)
+
+            if tag_value is None:
+                if self.diagnostics is not None:
+                    self.diagnostics.report(NONE_VALUE, tag, record)
+                else:
+                    msg = (
+                        f"The content of tag `{tag}` is None, "
+                        "replacing it with an empty value"
+                    )
+                    warnings.warn(UserWarning(msg))
+                tag_value = ""
+
+            values.append(tag_value)
+
+        return pipeline, values
+
+    def convert(self, record: Record) -> str:
+        """Converts an instance of :class:`pymarc.Record` to a BibTeX entry."""
+        return self.format_tags(self.map_tags(record))
+
+    def format_tags(self, ctx_tags: Dict[str, str]) -> str:
+        """Format tags returned by :meth:`map_tags()` as an entry."""
+        if self.output_format is not None:
+            return self.output_format.format_entry(
+                ctx_tags, self.bibtype, _bibkey_value(ctx_tags, self.bibkey)
+            )
+        return _as_bibtex(
+            self.bibtype,
+            _bibkey_value(ctx_tags, self.bibkey),
+            ctx_tags,
+            self.indent,
+            self.do_align,
+            presorted=True,
+        )
+
+
+def _read_records(
+    source: Union[str, os.PathLike, BinaryIO, Iterable[bytes]],
+) -> Iterator[Record]:
+    """Yield records one by one from a MARC file path or binary stream."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from _read_records(f)
+        return
+
+    if not hasattr(source, "read"):
+        # Raw records, e.g. of a marc2bib.mapped.MappedFile.
+        from .iso2709 import decode_record
+
+        for data in source:
+            yield decode_record(data)
+        return
+
+    from pymarc import MARCReader  # type: ignore
+
+    reader = MARCReader(source)
+    for record in reader:
+        if record is None:
+            msg = f"cannot read a record: {reader.current_exception!r}"
+            raise MARC2BibError(msg)
+        yield record
+
+
+def iter_convert(
+    source: Union[str, os.PathLike, BinaryIO],
+    bibtype: str = "book",
+    bibkey: Optional[Union[str, Callable[[Record], str]]] = None,
+    tagfuncs: Optional[TagfunctionsSig] = None,
+    include: Union[str, Iterable[str]] = "required",
+    allow_blank: bool = False,
+    remove_punctuation: bool = True,
+    latexify: bool = True,
+    post_hooks: Optional[list[PostHookSig]] = None,
+    indent: int = 1,
+    do_align: bool = False,
+    lazy: bool = False,
+    version: str = "bibtex",
+    tag_order: Optional[Sequence[str]] = None,
+    stats: Optional[ConversionStats] = None,
+    hook_cache: Optional[HookCache] = None,
+    output_format: Optional[Union[str, "OutputFormat"]] = None,
+    errors: str = "raise",
+    dead_letter=None,
+    diagnostics: Optional[Diagnostics] = None,
+    dedup: Optional["Deduplicator"] = None,
+) -> Iterator[str]:
+    """Converts all records from a MARC file to BibTeX entries.
+
+    Records are read and converted one at a time, so the memory usage
+    does not depend on the size of the input. The arguments are
+    resolved once per run, not once per record.
+
+    Args:
+        source: A path to a MARC file or a binary stream to read
+            records from, or an iterable of raw records, e.g.
+            a :class:`marc2bib.mapped.MappedFile`.
+        lazy: If True, read records with a lightweight reader, which
+            decodes only the fields looked up by the tag-functions.
+            See :mod:`marc2bib.iso2709` for details.
+        hook_cache: See :class:`Converter`.
+        output_format: See :class:`Converter`.
+        errors: What to do with a record which cannot be read or
+            converted: 'raise' an error, 'skip' it, or 'collect' it
+            into ``dead_letter``. See :mod:`marc2bib.errors`.
+        dead_letter: With ``errors="collect"``, a list or
+            a :class:`marc2bib.errors.DeadLetterFile` to append
+            a :class:`marc2bib.errors.FailedRecord` to for each failed
+            record.
+        diagnostics: See :class:`Converter`.
+        dedup: If given, an instance of
+            :class:`marc2bib.dedup.Deduplicator` to leave out the
+            duplicate records with. See :mod:`marc2bib.dedup`.
+
+    See docstring of :obj:`marc2bib.core.convert()` for the rest of
+    the arguments.
+
+    Yields:
+        A BibTeX-formatted string for each record.
+    """
+    check_error_policy(errors, dead_letter)
+    converter = Converter(
+        bibtype,
+        bibkey,
+        tagfuncs,
+        include,
+        allow_blank,
+        remove_punctuation,
+        latexify,
+        post_hooks,
+        indent,
+        do_align,
+        version,
+        tag_order=tag_order,
+        stats=stats,
+        hook_cache=hook_cache,
+        output_format=output_format,
+        diagnostics=diagnostics,
+    )
+    if dedup is not None:
+        from .dedup import iter_deduplicated
+
+        yield from iter_deduplicated(
+            converter, source, dedup, lazy, errors, dead_letter
+        )
+        return
+
+    if errors != "raise":
+        yield from _iter_convert_isolated(
+            converter, source, lazy, errors, dead_letter
+        )
+        return
+
+    if lazy:
+        from .iso2709 import iter_raw_records
+
+        records = iter_raw_records(source, converter.marc_tags)
+    else:
+        records = _read_records(source)
+
+    for record in records:
+        yield converter.convert(record)
+
+
+def _iter_convert_isolated(
+    converter: Converter,
+    source: Union[str, os.PathLike, BinaryIO],
+    lazy: bool,
+    errors: str,
+    dead_letter,
+) -> Iterator[str]:
+    # Records are split first to keep the raw bytes of failed ones.
+    from .iso2709 import decode_record, iter_raw_data
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from _iter_convert_isolated(
+                converter, f, lazy, errors, dead_letter
+            )
+        return
+
+    for index, data in enumerate(iter_raw_data(source)):
+        try:
+            record = decode_record(data, converter.marc_tags, lazy)
+            bibtex = converter.convert(record)
+        except Exception as e:
+            if errors == "collect":
+                dead_letter.append(FailedRecord.from_exception(index, data, e))
+            continue
+        yield bibtex
+
+
+def convert_file(
+    src: Union[str, os.PathLike, BinaryIO],
+    dst: Union[str, os.PathLike, TextIO, BinaryIO],
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    ordered: bool = True,
+    pool: str = "process",
+    buffer_size: Optional[int] = None,
+    errors: str = "raise",
+    dead_letter=None,
+    **options,
+) -> int:
+    """Converts all records from a MARC file and writes them to a file.
+
+    The entries are separated by a blank line and written through a
+    buffer, see :class:`marc2bib.writer.EntryWriter`.
+
+    Args:
+        src: A path to a MARC file or a binary stream to read from.
+        dst: A path to an output file or a text or binary stream to
+            write to.
+        chunk_size: With workers, the number of records sent to a
+            worker at once.
+        workers: If given, convert records in a pool of that many
+            processes. See :mod:`marc2bib.parallel` for details.
+        ordered: If False, write entries converted in workers as soon
+            as they are ready, not in the input order.
+        pool: With workers, 'process' or 'thread'. See
+            :func:`marc2bib.parallel.iter_convert_parallel()`.
+        buffer_size: The number of characters buffered before writing
+            them out. Defaults to
+            :data:`marc2bib.writer.DEFAULT_BUFFER_SIZE`.
+        errors: See :obj:`marc2bib.core.iter_convert()`.
+        dead_letter: See :obj:`marc2bib.core.iter_convert()`.
+        **options: Keyword arguments passed to
+            :obj:`marc2bib.core.iter_convert()`.
+
+    Returns:
+        The number of converted records.
+
+    Raises:
+        MARC2BibError: If a record cannot be read or converted, unless
+            ``errors`` is 'skip' or 'collect'. With workers, other
+            per-record errors are re-raised as is.
+    """
+    from .formats import make_format
+    from .writer import DEFAULT_BUFFER_SIZE, EntryWriter
+
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size should be positive, got {chunk_size}")
+    check_error_policy(errors, dead_letter)
+
+    if isinstance(dst, (str, os.PathLike)):
+        with open(dst, "w", encoding="utf-8") as f:
+            return convert_file(
+                src,
+                f,
+                chunk_size=chunk_size,
+                workers=workers,
+                ordered=ordered,
+                pool=pool,
+                buffer_size=buffer_size,
+                errors=errors,
+                dead_letter=dead_letter,
+                **options,
+            )
+
+    if workers:
+        from .parallel import iter_convert_parallel
+
+        if options.pop("dedup", None) is not None:
+            raise ValueError("dedup is not supported with workers")
+
+        results = iter_convert_parallel(
+            src, workers, chunk_size, ordered, pool=pool, **options
+        )
+        entries = _handle_results(results, errors, dead_letter)
+    else:
+        entries = iter_convert(
+            src, errors=errors, dead_letter=dead_letter, **options
+        )
+
+    output_format = options.get("output_format")
+    if isinstance(output_format, str):
+        # Only the header, separator and footer are used below.
+        output_format = make_format(output_format)
+
+    with EntryWriter(
+        dst,
+        buffer_size=buffer_size or DEFAULT_BUFFER_SIZE,
+        output_format=output_format,
+    ) as writer:
+        for bibtex in entries:
+            writer.write(bibtex)
+
+    return writer.count
+
+
+def _handle_results(results, errors: str, dead_letter) -> Iterator[str]:
+    # Apply the error policy to the results of workers.
+    for result in results:
+        if result.error is None:
+            yield result.bibtex
+        elif errors == "raise":
+            raise result.error
+        elif errors == "collect":
+            dead_letter.append(result.failed)
@@ -0,0 +1,401 @@
+"""Detection of duplicate records during conversion.
+
+Merged catalogues hold the same work many times. Pass
+a :class:`Deduplicator` as the ``dedup`` argument of
+:func:`marc2bib.iter_convert()` or :func:`marc2bib.convert_file()` to
+leave the duplicates out as the records stream past, instead of
+deduplicating the entries in a second pass::
+
+    dedup = Deduplicator(keys=("isbn", "lccn", "work"))
+    convert_file("merged.mrc", "merged.bib", dedup=dedup)
+    print(dedup.summary())
+
+A record is a duplicate of the first record sharing any of its keys:
+
+* ``isbn`` -- the ISBN (field 020), as ISBN-13;
+* ``lccn`` -- the normalized LCCN (field 010);
+* ``work`` -- the title, the surname of the first author (or editor)
+  and the year of the mapped tags, normalized with
+  :func:`marc2bib.bibkeys.normalize_key`, so that records differing
+  in case, punctuation or accents match.
+
+With ``mode="drop"``, duplicates are dropped and the entries are
+yielded as they are converted. With ``mode="merge"``, the tags missing
+from the first record are filled in from its duplicates, so the
+entries are yielded once all of the records are read, and the tags
+of the kept records are held in memory until then.
+
+The keys are indexed in a dict, or in an SQLite database if ``index``
+is a path, to bound the memory usage for very large inputs.
+"""
+
+import os
+import re
+import sqlite3
+from collections import Counter
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from pymarc import Record  # type: ignore
+
+from .bibkeys import BibkeyRegistry, normalize_key
+from .core import Converter, _bibkey_value, _tag_sort_key
+from .errors import FailedRecord
+
+
+DEDUP_MODES = ("drop", "merge")
+
+KeyFunction = Callable[[Record, Dict[str, str]], Optional[str]]
+
+
+def normalize_isbn(value: str) -> Optional[str]:
+    """Return an ISBN as ISBN-13 digits, or None if it is not an ISBN."""
+    digits = "".join(c for c in value.upper() if c.isdigit() or c == "X")
+    if len(digits) == 10:
+        body = "978" + digits[:9]
+        total = sum(int(d) * (3 if i % 2 else 1) for i, d in enumerate(body))
+        return body + str(-total % 10)
+    if len(digits) == 13 and digits.isdigit():
+        return digits
+    return None
+
+
+_lccn_re = re.compile(r"^([a-z]*)(\d+)(?:-(\d+))?")
+
+
+def normalize_lccn(value: str) -> Optional[str]:
+    """Return a normalized LCCN [1], or None if it is not an LCCN.
+
+    [1] https://www.loc.gov/marc/lccn-namespace.html#normalization
+    """
+    value = value.replace(" ", "").split("/")[0].lower()
+    m = _lccn_re.match(value)
+    if m is None:
+        return None
+    prefix, year, serial = m.groups()
+    if serial is not None:
+        return prefix + year + serial.zfill(6)
+    return prefix + year
+
+
+def isbn_key(record: Record, tags: Dict[str, str]) -> Optional[str]:
+    isbn = record.isbn()
+    return normalize_isbn(isbn) if isbn else None
+
+
+isbn_key.marc_tags = frozenset(("020",))  # type: ignore
+
+
+def lccn_key(record: Record, tags: Dict[str, str]) -> Optional[str]:
+    field = record["010"]
+    lccn = field["a"] if field else None
+    return normalize_lccn(lccn) if lccn else None
+
+
+lccn_key.marc_tags = frozenset(("010",))  # type: ignore
+
+
+def work_key(record: Record, tags: Dict[str, str]) -> Optional[str]:
+    title = normalize_key(tags.get("title", ""))
+    if not title:
+        return None
+    names = tags["author"] if "author" in tags else tags.get("editor", "")
+    surname = normalize_key(names.split(",")[0])
+    return f"{title}/{surname}/{normalize_key(tags.get('year', ''))}"
+
+
+# Only the mapped tags are read.
+work_key.marc_tags = frozenset()  # type: ignore
+
+
+DEDUP_KEYS: Dict[str, KeyFunction] = {
+    "isbn": isbn_key,
+    "lccn": lccn_key,
+    "work": work_key,
+}
+
+
+class Duplicate(NamedTuple):
+    """A record left out as a duplicate of an earlier one."""
+
+    # The positions of the record and of the kept one in the input.
+    index: int
+    kept: int
+    # The name of the key and the value shared by the records.
+    key: str
+    value: str
+
+
+class _MemoryIndex:
+    def __init__(self) -> None:
+        self._keys: Dict[tuple, int] = {}
+
+    def get(self, key: tuple) -> Optional[int]:
+        return self._keys.get(key)
+
+    def setdefault(self, key: tuple, index: int) -> int:
+        return self._keys.setdefault(key, index)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def close(self) -> None:
+        pass
+
+
+class _SQLiteIndex:
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self._db = sqlite3.connect(os.fspath(path))
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS keys "
+            "(name TEXT, value TEXT, record INTEGER, "
+            "PRIMARY KEY (name, value)) WITHOUT ROWID"
+        )
+        # Keys of an earlier run would match records not in this one.
+        self._db.execute("DELETE FROM keys")
+
+    def get(self, key: tuple) -> Optional[int]:
+        row = self._db.execute(
+            "SELECT record FROM keys WHERE name = ? AND value = ?", key
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def setdefault(self, key: tuple, index: int) -> int:
+        cursor = self._db.execute(
+            "INSERT OR IGNORE INTO keys VALUES (?, ?, ?)", (*key, index)
+        )
+        if cursor.rowcount:
+            return index
+        return self.get(key)  # type: ignore
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+
+    def close(self) -> None:
+        self._db.commit()
+        self._db.close()
+
+
+class Deduplicator:
+    """Finds duplicate records by their keys.
+
+    Args:
+        keys: The names of the keys in :data:`DEDUP_KEYS`, or
+            functions taking a record and its mapped tags and returning
+            a key or None. A function may declare the MARC fields it
+            reads as a ``marc_tags`` attribute, like the tag-functions
+            (see :func:`marc2bib.tagfuncs.reads`); otherwise, all
+            fields are decoded with ``lazy=True``.
+        mode: 'drop' the duplicates or 'merge' them into the first
+            record.
+        index: A path to an SQLite database to index the keys in. The
+            keys of an earlier run are removed from it. By default, the
+            keys are indexed in memory.
+
+    Attributes:
+        duplicates: A :class:`Duplicate` for each record left out.
+        counts: A :class:`collections.Counter` of the duplicates by the
+            name of the key.
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[Union[str, KeyFunction]] = ("isbn", "lccn", "work"),
+        mode: str = "drop",
+        index: Optional[Union[str, os.PathLike]] = None,
+    ) -> None:
+        if mode not in DEDUP_MODES:
+            raise ValueError(
+                f"mode should be one of {DEDUP_MODES}, got {mode!r}"
+            )
+        self.mode = mode
+        self.keys: List[tuple] = []
+        marc_tags: Optional[FrozenSet[str]] = frozenset()
+        for key in keys:
+            if isinstance(key, str):
+                if key not in DEDUP_KEYS:
+                    raise ValueError(
+                        f"unknown dedup key {key!r}, expected one of "
+                        f"{tuple(DEDUP_KEYS)} or a function"
+                    )
+                name, func = key, DEDUP_KEYS[key]
+            else:
+                name, func = key.__name__, key
+            self.keys.append((name, func))
+            func_tags = getattr(func, "marc_tags", None)
+            if func_tags is None:
+                marc_tags = None
+            elif marc_tags is not None:
+                marc_tags |= func_tags
+        if not self.keys:
+            raise ValueError("at least one dedup key should be given")
+        # The MARC fields to decode besides the ones of the tag-functions,
+        # or None if all of them may be read.
+        self.marc_tags = marc_tags
+
+        self._index = _MemoryIndex() if index is None else _SQLiteIndex(index)
+        self.duplicates: List[Duplicate] = []
+        self.counts: Counter = Counter()
+
+    def __len__(self) -> int:
+        return len(self.duplicates)
+
+    def check(
+        self, index: int, record: Record, tags: Dict[str, str]
+    ) -> Optional[Duplicate]:
+        """Index the keys of a record and find the record it duplicates.
+
+        Args:
+            index: The position of the record in the input. Records
+                should be checked in the input order.
+
+        Returns:
+            A :class:`Duplicate` if a record with any of the same keys
+            was checked before, otherwise None.
+        """
+        keys, duplicate = self._find(index, record, tags)
+        self._add(keys, index, duplicate)
+        return duplicate
+
+    def _find(
+        self, index: int, record: Record, tags: Dict[str, str]
+    ) -> Tuple[List[tuple], Optional[Duplicate]]:
+        # The keys of a record and the first one already indexed.
+        keys = []
+        for name, func in self.keys:
+            value = func(record, tags)
+            if value is not None:
+                keys.append((name, value))
+        for name, value in keys:
+            kept = self._index.get((name, value))
+            if kept is not None:
+                return keys, Duplicate(index, kept, name, value)
+        return keys, None
+
+    def _add(
+        self, keys: List[tuple], index: int, duplicate: Optional[Duplicate]
+    ) -> None:
+        # The other keys of a duplicate lead to the kept record.
+        owner = index if duplicate is None else duplicate.kept
+        for key in keys:
+            self._index.setdefault(key, owner)
+        if duplicate is not None:
+            self.duplicates.append(duplicate)
+            self.counts[duplicate.key] += 1
+
+    def close(self) -> None:
+        self._index.close()
+
+    def summary(self) -> str:
+        """Return a summary with a line per key."""
+        lines = [
+            f"{name}: {count} duplicate(s)"
+            for name, count in sorted(self.counts.items())
+        ]
+        return "\n".join(lines)
+
+
+def _merge_tags(
+    kept: Dict[str, str], other: Dict[str, str], converter: Converter
+) -> Dict[str, str]:
+    # Fill in the tags missing from the kept ones, keeping the tags in
+    # the order the converter maps them in.
+    missing = [tag for tag, value in other.items() if not kept.get(tag)]
+    if not missing:
+        return kept
+    merged = {**kept, **{tag: other[tag] for tag in missing}}
+    sort_key = _tag_sort_key(converter.tag_order)
+    return {tag: merged[tag] for tag in sorted(merged, key=sort_key)}
+
+
+def _check_bibkey(converter: Converter, tags: Dict[str, str]) -> None:
+    # Make the key of an entry formatted later, raising the same errors,
+    # but without registering it.
+    bibkey = converter.bibkey
+    if isinstance(bibkey, BibkeyRegistry):
+        bibkey = bibkey.template
+    _bibkey_value(tags, bibkey)
+
+
+def iter_deduplicated(
+    converter: Converter,
+    source,
+    dedup: Deduplicator,
+    lazy: bool = False,
+    errors: str = "raise",
+    dead_letter=None,
+) -> Iterator[str]:
+    """Convert records leaving out the duplicates.
+
+    See :func:`marc2bib.iter_convert()` for the arguments.
+    """
+    from .iso2709 import decode_record, iter_raw_data
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from iter_deduplicated(
+                converter, f, dedup, lazy, errors, dead_letter
+            )
+        return
+
+    marc_tags = converter.marc_tags
+    if marc_tags is not None and dedup.marc_tags is not None:
+        marc_tags = marc_tags | dedup.marc_tags
+    else:
+        marc_tags = None
+    merge = dedup.mode == "merge"
+    # With mode="merge", the tags of the kept records (and the records
+    # themselves if collecting failures) by position.
+    kept: Dict[int, tuple] = {}
+
+    for index, data in enumerate(iter_raw_data(source)):
+        try:
+            record = decode_record(data, marc_tags, lazy)
+            tags = converter.map_tags(record)
+            keys, duplicate = dedup._find(index, record, tags)
+            if duplicate is None:
+                # A record failing here is not indexed, so that its
+                # copies are not dropped as duplicates of it.
+                if merge:
+                    _check_bibkey(converter, tags)
+                else:
+                    bibtex = converter.format_tags(tags)
+            dedup._add(keys, index, duplicate)
+            if duplicate is not None:
+                if merge:
+                    first, first_data = kept[duplicate.kept]
+                    first = _merge_tags(first, tags, converter)
+                    kept[duplicate.kept] = (first, first_data)
+                continue
+            if merge:
+                copy = bytes(data) if errors == "collect" else None
+                kept[index] = (tags, copy)
+                continue
+        except Exception as e:
+            if errors == "raise":
+                raise
+            if errors == "collect":
+                dead_letter.append(FailedRecord.from_exception(index, data, e))
+            continue
+        yield bibtex
+
+    for index, (tags, data) in kept.items():
+        try:
+            bibtex = converter.format_tags(tags)
+        except Exception as e:
+            if errors == "raise":
+                raise
+            if errors == "collect":
+                dead_letter.append(FailedRecord.from_exception(index, data, e))
+            continue
+        yield bibtex
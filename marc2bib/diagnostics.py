@@ -0,0 +1,140 @@
+"""Diagnostics of the conversion collected as counters.
+
+By default, :func:`marc2bib.map_tags()` issues a :class:`UserWarning`
+each time a tag-function returns None, which is costly when converting
+millions of records and gives no overview at the end. Pass an instance
+of :class:`Diagnostics` as the ``diagnostics`` argument of
+:class:`marc2bib.Converter` (or :func:`marc2bib.iter_convert()`,
+:func:`marc2bib.convert_file()`) to count such events per kind and tag
+instead::
+
+    diagnostics = Diagnostics(samples=3)
+    convert_file("file.mrc", "file.bib", diagnostics=diagnostics)
+    print(diagnostics.summary())
+
+Each event costs a counter increment, plus looking up the control
+number of the record for the first ``samples`` events of a kind and
+tag, plus a call of ``callback`` if given. The counters are updated
+under a lock, so the diagnostics can be shared by converters running in
+several threads. Worker processes collect their own diagnostics, which
+are merged with :meth:`Diagnostics.update` (see
+:mod:`marc2bib.parallel`).
+"""
+
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# A tag-function returned None, replaced with an empty value.
+NONE_VALUE = "none-value"
+
+DESCRIPTIONS = {
+    NONE_VALUE: "the tag-function returned None",
+}
+
+EventKey = Tuple[str, str]
+
+
+def _control_number(record) -> Optional[str]:
+    try:
+        return record["001"].value()
+    except (AttributeError, KeyError, TypeError):
+        return None
+
+
+class Diagnostics:
+    """Counts conversion events per kind and tag.
+
+    Args:
+        samples: The number of the first records to keep the control
+            numbers of for each kind and tag.
+        callback: If given, called with the kind, tag and record for
+            each event.
+
+    Attributes:
+        counts: A :class:`collections.Counter` of events by
+            ``(kind, tag)``.
+        examples: The control numbers of the sampled records by
+            ``(kind, tag)``. None for a record without field 001.
+    """
+
+    def __init__(
+        self,
+        samples: int = 5,
+        callback: Optional[Callable[[str, str, object], None]] = None,
+    ) -> None:
+        self.samples = samples
+        self.callback = callback
+        self.counts: Counter = Counter()
+        self.examples: Dict[EventKey, List[Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(self.counts.values())
+
+    def report(self, kind: str, tag: str, record=None) -> None:
+        """Count an event of a record."""
+        key = (kind, tag)
+        with self._lock:
+            self.counts[key] += 1
+            if self.counts[key] <= self.samples:
+                number = _control_number(record)
+                self.examples.setdefault(key, []).append(number)
+        if self.callback is not None:
+            self.callback(kind, tag, record)
+
+    def update(self, other: "Diagnostics") -> None:
+        """Add the events counted by another instance, e.g. a worker's.
+
+        The examples are kept up to ``samples`` per kind and tag, in the
+        order the instances are added.
+        """
+        with self._lock:
+            for key, count in other.counts.items():
+                self.counts[key] += count
+                sampled = other.examples.get(key)
+                if sampled:
+                    examples = self.examples.setdefault(key, [])
+                    free = max(self.samples - len(examples), 0)
+                    examples.extend(sampled[:free])
+
+    def clear(self) -> None:
+        with self._lock:
+            self.counts.clear()
+            self.examples.clear()
+
+    def __getstate__(self) -> dict:
+        # E.g. to be sent to or from worker processes.
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def as_dict(self) -> dict:
+        """Return the counts and examples as a JSON-serializable dict."""
+        result: Dict[str, dict] = {}
+        for (kind, tag), count in sorted(self.counts.items()):
+            result.setdefault(kind, {})[tag] = {
+                "count": count,
+                "examples": self.examples.get((kind, tag), []),
+            }
+        return result
+
+    def summary(self) -> str:
+        """Return a summary with a line per kind and tag."""
+        lines = []
+        for (kind, tag), count in sorted(self.counts.items()):
+            examples = [
+                number
+                for number in self.examples.get((kind, tag), [])
+                if number is not None
+            ]
+            line = f"{tag}: {count} record(s), {DESCRIPTIONS.get(kind, kind)}"
+            if examples:
+                line += f" (e.g. {', '.join(examples)})"
+            lines.append(line)
+        return "\n".join(lines)
@@ -0,0 +1,161 @@
+"""Handling of records which cannot be converted.
+
+By default, the conversion of a MARC file stops at the first record
+which cannot be read or converted. Pass ``errors="skip"`` to
+:func:`marc2bib.iter_convert()` or :func:`marc2bib.convert_file()` to
+leave such records out and go on, or ``errors="collect"`` to also
+append a :class:`FailedRecord` for each of them to a dead-letter sink,
+e.g. a list or a :class:`DeadLetterFile`::
+
+    with DeadLetterFile("failed.jsonl") as dead_letter:
+        convert_file(
+            "file.mrc", "file.bib", errors="collect", dead_letter=dead_letter
+        )
+
+The failed records keep their raw bytes, so they can be converted
+again once fixed, see :func:`read_dead_letters`.
+"""
+
+import os
+from typing import Iterator, NamedTuple, Optional, TextIO, Union
+
+
+ERROR_POLICIES = ("raise", "skip", "collect")
+
+# The number of the innermost stack frames kept in a failed record.
+TRACEBACK_LIMIT = 3
+
+
+def check_error_policy(errors: str, dead_letter) -> None:
+    if errors not in ERROR_POLICIES:
+        raise ValueError(
+            f"unknown error policy {errors!r}, expected one of "
+            f"{ERROR_POLICIES}"
+        )
+    if errors == "collect" and dead_letter is None:
+        raise ValueError("errors='collect' requires a dead_letter sink")
+
+
+def _control_number(data: bytes) -> Optional[str]:
+    from .iso2709 import RawRecord
+
+    try:
+        field = RawRecord(data, ("001",))["001"]
+        if field is None:
+            return None
+        return field.value().strip() or None
+    except Exception:
+        # The record is broken beyond that.
+        return None
+
+
+class FailedRecord(NamedTuple):
+    """A record which cannot be read or converted."""
+
+    # The position of the record in the input, starting from zero.
+    index: int
+    # The control number (field 001), if it can be read.
+    control_number: Optional[str]
+    # The raw bytes of the record.
+    data: bytes
+    # The exception type and message, e.g. "TypeError: ...".
+    error: str
+    # The innermost frames of the traceback.
+    traceback: str
+
+    @classmethod
+    def from_exception(
+        cls, index: int, data: bytes, error: BaseException
+    ) -> "FailedRecord":
+        import traceback
+
+        summary = "".join(
+            traceback.format_exception_only(type(error), error)
+        ).strip()
+        frames = traceback.format_tb(
+            error.__traceback__, limit=-TRACEBACK_LIMIT
+        )
+        return cls(
+            index,
+            _control_number(data),
+            bytes(data),
+            summary,
+            "".join(frames),
+        )
+
+    def to_json(self) -> str:
+        import base64
+        import json
+
+        fields = self._asdict()
+        fields["data"] = base64.b64encode(self.data).decode("ascii")
+        return json.dumps(fields, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, line: str) -> "FailedRecord":
+        import base64
+        import json
+
+        fields = json.loads(line)
+        fields["data"] = base64.b64decode(fields["data"])
+        return cls(**fields)
+
+
+class DeadLetterFile:
+    """Writes failed records to a file, one JSON object per line.
+
+    The raw bytes of the records are encoded in Base64. Use it as a
+    context manager, or call :meth:`close` at the end.
+
+    Args:
+        file: A path to the file or a text stream to write to.
+
+    Attributes:
+        count: The number of the written records.
+    """
+
+    def __init__(self, file: Union[str, os.PathLike, TextIO]) -> None:
+        if isinstance(file, (str, os.PathLike)):
+            self.stream = open(file, "w", encoding="utf-8")
+            self._owns_stream = True
+        else:
+            self.stream = file
+            self._owns_stream = False
+        self.count = 0
+
+    def __enter__(self) -> "DeadLetterFile":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def append(self, failed: FailedRecord) -> None:
+        self.stream.write(failed.to_json() + "\n")
+        self.count += 1
+
+    def close(self) -> None:
+        if self._owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+
+
+def read_dead_letters(
+    file: Union[str, os.PathLike, TextIO],
+) -> Iterator[FailedRecord]:
+    """Read failed records written by :class:`DeadLetterFile`.
+
+    For example, to write the failed records to a MARC file::
+
+        with open("failed.mrc", "wb") as f:
+            for failed in read_dead_letters("failed.jsonl"):
+                f.write(failed.data)
+    """
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, encoding="utf-8") as f:
+            yield from read_dead_letters(f)
+        return
+
+    for line in file:
+        if line.strip():
+            yield FailedRecord.from_json(line)
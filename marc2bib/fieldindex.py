@@ -0,0 +1,123 @@
+"""A per-record index of MARC fields keyed by tag.
+
+Looking up fields of a :class:`pymarc.Record` by tag scans all of its
+fields each time. The default tag-functions look up the same fields
+over and over again (e.g. 245 for title and subtitle, 260/264 for
+address, publisher and year), so :func:`marc2bib.map_tags()` builds a
+:class:`FieldIndex` once per record, in a single pass over the fields,
+and passes it to the tag-functions marked with
+:func:`marc2bib.tagfuncs.indexed`.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, AbstractSet, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from pymarc import Field, Record  # type: ignore
+
+
+# The same as pymarc.record.isbn_regex.
+_isbn_re = re.compile(r"([0-9\-xX]+)")
+
+
+class FieldIndex:
+    """A read-only view of a record with the fields indexed by tag.
+
+    It supports the part of the :class:`pymarc.Record` interface used
+    by the tag-functions: :meth:`get_fields`, item access and
+    membership test by tag, :meth:`publisher`, :meth:`pubyear` and
+    :meth:`isbn`. The rest of the attributes are taken from the
+    original record, which is also available as ``record``.
+
+    Args:
+        record: An instance of :class:`pymarc.Record`.
+        tags: If given, only fields with these tags are indexed; see
+            :func:`marc2bib.tagfuncs.reads`.
+    """
+
+    __slots__ = ("record", "_fields")
+
+    def __init__(
+        self, record: Record, tags: Optional[AbstractSet[str]] = None
+    ) -> None:
+        self.record = record
+        fields: Dict[str, List[Field]] = {}
+        for field in record.fields:
+            tag = field.tag
+            if tag in fields:
+                fields[tag].append(field)
+            elif tags is None or tag in tags:
+                fields[tag] = [field]
+        self._fields = fields
+
+    def __getattr__(self, name: str):
+        return getattr(self.record, name)
+
+    def __getitem__(self, tag: str) -> Optional[Field]:
+        fields = self._get(tag)
+        return fields[0] if fields else None
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self._fields
+
+    def _get(self, tag: str) -> Optional[List[Field]]:
+        # Return the (non-empty) list of fields with the tag or None.
+        return self._fields.get(tag)
+
+    def _in_record_order(self, tags: tuple[str, ...]) -> List[Field]:
+        return [f for f in self.record.fields if f.tag in tags]
+
+    def get_fields(self, *tags: str) -> List[Field]:
+        """Return a list of the fields with the given tags.
+
+        As with :meth:`pymarc.Record.get_fields`, the fields are in
+        the record order, and all fields are returned if no tags given.
+        """
+        if not tags:
+            return self.record.fields
+
+        found = None
+        for tag in tags:
+            fields = self._get(tag)
+            if fields:
+                if found is None or found is fields:
+                    found = fields
+                else:
+                    # Fields of several tags are present. It is rare
+                    # enough to just scan the record to keep the order.
+                    return self._in_record_order(tags)
+        return list(found) if found else []
+
+    # The following methods mirror the ones of pymarc.Record.
+
+    def publisher(self) -> Optional[str]:
+        """Return publisher from 260 or 264."""
+        for f in self.get_fields("260", "264"):
+            if self["260"]:
+                return self["260"]["b"]
+            if self["264"] and f.indicator2 == "1":
+                return self["264"]["b"]
+        return None
+
+    def pubyear(self) -> Optional[str]:
+        """Return publication year from 260 or 264."""
+        for f in self.get_fields("260", "264"):
+            if self["260"]:
+                return self["260"]["c"]
+            if self["264"] and f.indicator2 == "1":
+                return self["264"]["c"]
+        return None
+
+    def isbn(self) -> Optional[str]:
+        """Return the first ISBN in the record or None."""
+        try:
+            isbn_number = self["020"]["a"]
+            match = _isbn_re.search(isbn_number)
+            if match:
+                return match.group(1).replace("-", "")
+        except TypeError:
+            # ISBN not set
+            pass
+        return None
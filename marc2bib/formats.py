@@ -0,0 +1,340 @@
+"""Output formats of the converted records.
+
+Besides BibTeX, the tags mapped by :class:`marc2bib.Converter` can be
+formatted as BibLaTeX entries, CSL-JSON items [1] or newline-delimited
+JSON (NDJSON) objects of the tags as is. Pass a format (or its name)
+as ``output_format`` to :class:`marc2bib.Converter` to convert records
+to it, or use :func:`write_formats` to write several formats at once
+from a single pass over the records::
+
+    write_formats(
+        "file.mrc",
+        {"file.bib": "bibtex", "file.json": "csl-json"},
+        include=["edition"],
+    )
+
+The LaTeX conversion (see ``latexify``) is applied only to the formats
+read by LaTeX, i.e. BibTeX and BibLaTeX, so the JSON formats have the
+values as is.
+
+[1] https://citeproc-js.readthedocs.io/en/latest/csl-json/markup.html
+"""
+
+import os
+from contextlib import ExitStack
+from typing import (
+    BinaryIO,
+    Dict,
+    Mapping,
+    Optional,
+    Sequence,
+    TextIO,
+    Union,
+)
+
+from .core import (
+    BIBLATEX_TAGS,
+    Converter,
+    _as_bibtex,
+    _bibkey_value,
+    _read_records,
+)
+
+
+class OutputFormat:
+    """The base class of output formats.
+
+    Entries are written between ``header`` and ``footer`` and are
+    separated by ``separator``.
+    """
+
+    name = ""
+    # If True, the values are expected to be converted for LaTeX.
+    latex = False
+    header = ""
+    separator = "\n"
+    footer = ""
+
+    def format_entry(
+        self, tags: Dict[str, str], bibtype: str, bibkey: str
+    ) -> str:
+        """Format the tags of a record as an entry."""
+        raise NotImplementedError
+
+
+class BibTeXFormat(OutputFormat):
+    """BibTeX entries, the same as returned by :func:`marc2bib.convert`.
+
+    See docstring of :obj:`marc2bib.core.convert()` for the arguments.
+    """
+
+    name = "bibtex"
+    latex = True
+
+    def __init__(
+        self,
+        indent: int = 1,
+        do_align: bool = False,
+        tag_order: Optional[Sequence[str]] = None,
+    ) -> None:
+        self.indent = indent
+        self.do_align = do_align
+        self.tag_order = None if tag_order is None else tuple(tag_order)
+
+    def format_entry(
+        self, tags: Dict[str, str], bibtype: str, bibkey: str
+    ) -> str:
+        return _as_bibtex(
+            bibtype, bibkey, tags, self.indent, self.do_align, self.tag_order
+        )
+
+
+class BibLaTeXFormat(BibTeXFormat):
+    """BibLaTeX entries with the tags renamed to BibLaTeX fields.
+
+    See :data:`marc2bib.core.BIBLATEX_TAGS` for the renamed tags.
+    """
+
+    name = "biblatex"
+
+    def format_entry(
+        self, tags: Dict[str, str], bibtype: str, bibkey: str
+    ) -> str:
+        fields = {
+            BIBLATEX_TAGS.get(tag, tag): value for tag, value in tags.items()
+        }
+        return super().format_entry(fields, bibtype, bibkey)
+
+
+# BibTeX entry types -> CSL item types.
+CSL_TYPES = {
+    "article": "article-journal",
+    "book": "book",
+    "booklet": "pamphlet",
+    "inbook": "chapter",
+    "incollection": "chapter",
+    "inproceedings": "paper-conference",
+    "manual": "book",
+    "mastersthesis": "thesis",
+    "misc": "document",
+    "phdthesis": "thesis",
+    "proceedings": "book",
+    "techreport": "report",
+    "unpublished": "manuscript",
+}
+
+# BibTeX (and BibLaTeX) tags -> CSL variables. The name and date
+# tags (author, editor, year) and subtitle are handled separately.
+CSL_VARIABLES = {
+    "address": "publisher-place",
+    "edition": "edition",
+    "isbn": "ISBN",
+    "location": "publisher-place",
+    "note": "note",
+    "number": "collection-number",
+    "pages": "number-of-pages",
+    "pagetotal": "number-of-pages",
+    "publisher": "publisher",
+    "series": "collection-title",
+    "title": "title",
+    "volume": "volume",
+    "volumes": "number-of-volumes",
+}
+
+
+def _csl_names(value: str) -> list:
+    names = []
+    for name in value.split(" and "):
+        family, sep, given = name.partition(", ")
+        if sep:
+            names.append({"family": family, "given": given})
+        else:
+            # E.g. a corporate name.
+            names.append({"literal": name})
+    return names
+
+
+class CSLJSONFormat(OutputFormat):
+    """CSL-JSON items, written as a JSON array.
+
+    The tags without a corresponding CSL variable are kept as is.
+    """
+
+    name = "csl-json"
+    header = "[\n"
+    separator = ",\n"
+    footer = "\n]\n"
+
+    def format_entry(
+        self, tags: Dict[str, str], bibtype: str, bibkey: str
+    ) -> str:
+        import json
+
+        item: Dict[str, object] = {
+            "id": bibkey,
+            "type": CSL_TYPES.get(bibtype, "document"),
+        }
+        for tag, value in tags.items():
+            if tag in ("author", "editor"):
+                item[tag] = _csl_names(value)
+            elif tag == "year":
+                if value.isdigit():
+                    item["issued"] = {"date-parts": [[int(value)]]}
+                else:
+                    item["issued"] = {"literal": value}
+            elif tag == "subtitle":
+                continue
+            else:
+                item[CSL_VARIABLES.get(tag, tag)] = value
+        if "subtitle" in tags:
+            parts = (tags.get("title"), tags["subtitle"])
+            item["title"] = ": ".join(part for part in parts if part)
+        return json.dumps(item, ensure_ascii=False)
+
+
+class NDJSONFormat(OutputFormat):
+    """JSON objects with the entry type, key and tags, one per line."""
+
+    name = "ndjson"
+    separator = ""
+
+    def format_entry(
+        self, tags: Dict[str, str], bibtype: str, bibkey: str
+    ) -> str:
+        import json
+
+        entry = {"bibtype": bibtype, "bibkey": bibkey, "tags": tags}
+        return json.dumps(entry, ensure_ascii=False) + "\n"
+
+
+FORMATS = {
+    cls.name: cls
+    for cls in (BibTeXFormat, BibLaTeXFormat, CSLJSONFormat, NDJSONFormat)
+}
+
+
+def make_format(
+    name: str,
+    indent: int = 1,
+    do_align: bool = False,
+    tag_order: Optional[Sequence[str]] = None,
+) -> OutputFormat:
+    """Create an output format by name, e.g. 'csl-json'.
+
+    The rest of the arguments apply only to BibTeX and BibLaTeX.
+    """
+    try:
+        cls = FORMATS[name]
+    except KeyError:
+        raise ValueError(
+            f"unknown output format {name!r}, expected one of "
+            f"{tuple(FORMATS)}"
+        )
+    if issubclass(cls, BibTeXFormat):
+        return cls(indent, do_align, tag_order)
+    return cls()
+
+
+def write_formats(
+    source: Union[str, os.PathLike, BinaryIO],
+    outputs: Mapping[
+        Union[str, os.PathLike, TextIO, BinaryIO], Union[str, OutputFormat]
+    ],
+    *,
+    lazy: bool = False,
+    buffer_size: Optional[int] = None,
+    **options,
+) -> int:
+    """Converts all records from a MARC file to several formats at once.
+
+    The tag-functions are run once per record. Their values go through
+    the hooks once for the formats read by LaTeX and once for the rest,
+    as with :func:`marc2bib.convert()` for each of the formats.
+
+    Args:
+        source: A path to a MARC file or a binary stream to read
+            records from.
+        outputs: A mapping of paths or streams to write to to formats
+            or their names; see :data:`FORMATS`.
+        lazy: See :func:`marc2bib.iter_convert()`.
+        buffer_size: See :func:`marc2bib.convert_file()`.
+        **options: Keyword arguments passed to
+            :class:`marc2bib.Converter`.
+
+    Returns:
+        The number of converted records.
+    """
+    from .writer import DEFAULT_BUFFER_SIZE, EntryWriter
+
+    # The tag-functions are run by the converter without the LaTeX
+    # conversion, and the values are passed through the hooks of the
+    # other one for the formats which need it.
+    latexify = options.pop("latexify", True)
+    converter = Converter(latexify=False, **options)
+    latex_converter = Converter(**options) if latexify else converter
+    stats = converter.stats
+    format_options = dict(
+        indent=converter.indent,
+        do_align=converter.do_align,
+        tag_order=converter.tag_order,
+    )
+
+    if lazy:
+        from .iso2709 import iter_raw_records
+
+        records = iter_raw_records(source, converter.marc_tags)
+    else:
+        records = _read_records(source)
+
+    count = 0
+    with ExitStack() as stack:
+        writers = []
+        for dst, output_format in outputs.items():
+            if isinstance(output_format, str):
+                output_format = make_format(output_format, **format_options)
+            if isinstance(dst, (str, os.PathLike)):
+                dst = stack.enter_context(open(dst, "w", encoding="utf-8"))
+            writer = EntryWriter(
+                dst,
+                output_format=output_format,
+                buffer_size=buffer_size or DEFAULT_BUFFER_SIZE,
+            )
+            writers.append(stack.enter_context(writer))
+
+        formats = [writer.output_format for writer in writers]
+        needs_latex = latexify and any(f.latex for f in formats)
+        needs_plain = not needs_latex or not all(f.latex for f in formats)
+        for record in records:
+            if stats is not None:
+                stats.start_record(record)
+            try:
+                pipeline, values = converter._tag_values(record)
+                tags = latex_tags = None
+                if needs_plain:
+                    tags = latex_tags = converter._apply_hooks(
+                        pipeline, values
+                    )
+                if needs_latex:
+                    if pipeline is converter._pipeline:
+                        pipeline = latex_converter._pipeline
+                    else:
+                        pipeline = latex_converter._editor_pipeline
+                    latex_tags = latex_converter._apply_hooks(pipeline, values)
+            finally:
+                if stats is not None:
+                    stats.end_record()
+            # The key is made once per record, so that a bibkey registry
+            # gives the same key in every format, from the tags as
+            # convert() would make it.
+            bibkey = _bibkey_value(latex_tags, converter.bibkey)
+            for writer in writers:
+                output_format = writer.output_format
+                entry = output_format.format_entry(
+                    latex_tags if output_format.latex else tags,
+                    converter.bibtype,
+                    bibkey,
+                )
+                writer.write(entry)
+            count += 1
+
+    return count
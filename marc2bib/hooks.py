@@ -1,5 +1,5 @@
 import re
-from functools import partial
+from functools import lru_cache, partial
 from typing import Optional, Callable
 
 
@@ -29,6 +29,11 @@ def compose_hooks(
                 raise ValueError("hook's function must be callable")
         return value
 
+    if all(map(is_pure, hooks)):
+        pure(inner)
+    # Applied one by one to columns, see apply_hook_to_column().
+    inner.hooks = hooks
+
     return inner
 
 
@@ -45,71 +50,301 @@ def apply_not_for(hook, tags: list[str]) -> Callable[[str, str], str]:
         else:
             return hook(tag, value)
 
+    if is_pure(hook):
+        pure(new_conditional_hook)
+
     return new_conditional_hook
 
 
+def pure(hook: Callable[[str, str], str]) -> Callable[[str, str], str]:
+    """Mark a hook as pure, i.e. depending only on its arguments.
+
+    The result of a pure hook is the same for the same tag and value
+    and it has no side effects, so it can be cached across records
+    (see :class:`marc2bib.cache.HookCache`). All of the default hooks
+    are pure. Usage::
+
+        @pure
+        def hook(tag: str, value: str) -> str:
+            ...
+    """
+    hook.pure = True
+    return hook
+
+
+def is_pure(hook: Callable) -> bool:
+    """Check if a hook is marked as pure, including partial ones."""
+    while isinstance(hook, partial):
+        hook = hook.func
+    return getattr(hook, "pure", False)
+
+
+def column_variant(column_hook: Callable[[str, list[str]], list[str]]):
+    """Attach a variant of a hook applied to a column of values at once.
+
+    A column hook takes a tag and the values of the tag from many
+    records and returns the new values in the same order, e.g. by
+    making a single regex pass over all of them. It is used by
+    :func:`marc2bib.columnar.map_tags_batch`. Usage::
+
+        @column_variant(hook_column)
+        def hook(tag: str, value: str) -> str:
+            ...
+    """
+
+    def decorator(hook: Callable[[str, str], str]):
+        hook.column = column_hook
+        return hook
+
+    return decorator
+
+
+def apply_hook_to_column(
+    hook: Callable[[str, str], str], tag: str, values: list[str]
+) -> list[str]:
+    """Apply a hook to a column of values of the same tag.
+
+    The column variant of the hook is used if there is one (see
+    :func:`column_variant`). Otherwise, a pure hook is called once
+    per distinct value, and any other hook once per value.
+    """
+    composed = getattr(hook, "hooks", None)
+    if composed is not None:
+        # Composed hooks check the types of the results.
+        for inner_hook in composed:
+            values = apply_hook_to_column(inner_hook, tag, values)
+            if not all(isinstance(value, str) for value in values):
+                raise TypeError("hook's function must return a string")
+        return values
+
+    column_hook = getattr(hook, "column", None)
+    if column_hook is not None:
+        return column_hook(tag, values)
+    if is_pure(hook):
+        results: dict[str, str] = {}
+        for value in values:
+            if value not in results:
+                results[value] = hook(tag, value)
+        return [results[value] for value in values]
+    return [hook(tag, value) for value in values]
+
+
+# Values of a column are joined with it to make a single regex pass.
+_COLUMN_SEP = "\x00"
+
+
+def _sub_column(
+    pattern: re.Pattern,
+    repl,
+    hook: Callable[[str, str], str],
+    tag: str,
+    values: list[str],
+) -> list[str]:
+    joined = _COLUMN_SEP.join(values)
+    if not pattern.search(joined):
+        return values
+    if joined.count(_COLUMN_SEP) != len(values) - 1:
+        # The separator occurs in the values themselves.
+        return [hook(tag, value) for value in values]
+    return pattern.sub(repl, joined).split(_COLUMN_SEP)
+
+
 # Default hooks
 
 
-def remove_isbd_punctuation_hook(
-    tag: str, value: str, *, abbreviations: Optional[list[str]] = None
-) -> str:
-    terminal_chars = ".,:;+=/"
+# fmt: off
+COMMON_ABBREVIATIONS = (
+    "co.", "ed.", "eds.", "et al.", "v.", "vol.", "vols.", "inc.", "p.",
+)
+# fmt: on
+
+ISBD_TERMINAL_CHARS = ".,:;+=/"
+
+# Used only for values ending with a newline, where "$" also matches
+# before the newline. All other values are checked by their last
+# characters without regular expressions.
+_terminal_space_and_char_re = re.compile(rf"\s([{ISBD_TERMINAL_CHARS}])$")
+_terminal_char_re = re.compile(rf"[{ISBD_TERMINAL_CHARS}]$")
+_kept_period_re = re.compile(r"[JS]r\.$|[A-Z]\.$|\d(st|nd|rd|th)\.$|\w\.{3}$")
 
-    value = re.sub(rf"\s([{terminal_chars}])$", "", value)
 
-    ends_with_suffix = bool(re.search(r"[JS]r\.$", value))
-    ends_with_initials = bool(re.search(r"[A-Z]\.$", value))
-    ends_with_ordinal = bool(re.search(r"\d(st|nd|rd|th)\.$", value))
-    ends_with_ellipsis = bool(re.search(r"\w\.{3}$", value))
+class _AbbreviationIndex:
+    """A suffix index of abbreviations keyed by their last character."""
 
-    from .core import COMMON_ABBREVIATIONS
+    def __init__(self, abbreviations: tuple[str, ...]) -> None:
+        self.max_len = max(map(len, abbreviations), default=0)
+        # An empty abbreviation matches the end of any value.
+        self.matches_any = "" in abbreviations
+        by_last_char: dict[str, list[str]] = {}
+        for abbrev in abbreviations:
+            if abbrev:
+                by_last_char.setdefault(abbrev[-1], []).append(abbrev)
+        self.by_last_char = {
+            char: tuple(abbrevs) for char, abbrevs in by_last_char.items()
+        }
 
-    abbreviations = abbreviations or COMMON_ABBREVIATIONS
-    ends_with_abbrev = value.lower().endswith(abbreviations)
+    def endswith(self, value: str) -> bool:
+        # Only the tail of the value, which could contain an
+        # abbreviation, is lowercased.
+        if self.matches_any:
+            return True
+        tail = value[-self.max_len :].lower()
+        candidates = self.by_last_char.get(tail[-1:])
+        return bool(candidates) and tail.endswith(candidates)
 
+
+@lru_cache(maxsize=32)
+def _abbreviation_index(abbreviations: tuple[str, ...]) -> _AbbreviationIndex:
+    return _AbbreviationIndex(abbreviations)
+
+
+_common_abbreviation_index = _abbreviation_index(COMMON_ABBREVIATIONS)
+
+
+def _ends_with_kept_period(value: str) -> bool:
+    # Name suffixes, initials, ordinal numbers and ellipses.
     # fmt: off
-    if not (ends_with_suffix or ends_with_initials or ends_with_ordinal or
-            ends_with_ellipsis or ends_with_abbrev):
-        value = re.sub(fr"[{terminal_chars}]$", "", value)
+    before = value[-2:-1]
+    return (
+        "A" <= before <= "Z"
+        or (before == "r" and value[-3:-2] in ("J", "S"))
+        or (value[-3:-1] in ("st", "nd", "rd", "th")
+            and value[-4:-3].isdecimal())
+        or (value.endswith("...") and (value[-4:-3].isalnum()
+                                       or value[-4:-3] == "_"))
+    )
     # fmt: on
 
+
+def _remove_terminal_char_multiline(
+    value: str, index: _AbbreviationIndex
+) -> str:
+    if not (_kept_period_re.search(value) or index.endswith(value)):
+        value = _terminal_char_re.sub("", value)
     return value
 
 
+@pure
+def remove_isbd_punctuation_hook(
+    tag: str, value: str, *, abbreviations: Optional[list[str]] = None
+) -> str:
+    """Remove ending ISBD punctuation from tag's value.
+
+    Initials, name suffixes, ordinal numbers, ellipses and
+    ``abbreviations`` (:obj:`COMMON_ABBREVIATIONS` by default) keep
+    their periods.
+    """
+    if abbreviations:
+        if isinstance(abbreviations, str):
+            abbreviations = (abbreviations,)
+        index = _abbreviation_index(tuple(abbreviations))
+    else:
+        index = _common_abbreviation_index
+
+    if value[-1:] == "\n":
+        value = _terminal_space_and_char_re.sub("", value)
+        return _remove_terminal_char_multiline(value, index)
+
+    if not value or value[-1] not in ISBD_TERMINAL_CHARS:
+        return value
+
+    # A terminal character preceded by a space is always removed.
+    if value[-2:-1].isspace():
+        value = value[:-2]
+        if value[-1:] == "\n":
+            return _remove_terminal_char_multiline(value, index)
+        if not value or value[-1] not in ISBD_TERMINAL_CHARS:
+            return value
+
+    if value[-1] == "." and _ends_with_kept_period(value):
+        return value
+    if index.endswith(value):
+        return value
+
+    return value[:-1]
+
+
+# Either a LaTeX special character or a number range.
+_latex_re = re.compile(r"([&%#])|(\d+)-(\d+)")
+# A quick check whether a value needs latexifying at all.
+_latex_needed_re = re.compile(r"[&%#]|\d-\d")
+_special_char_re = re.compile(r"([&%#])")
+_range_re = re.compile(r"(\d+)-(\d+)")
+
+
+def _latexify_repl(m: re.Match) -> str:
+    if m.group(1):
+        return "\\" + m.group(1)
+    return m.group(2) + "--" + m.group(3)
+
+
+def _latexify_date_repl(m: re.Match) -> str:
+    if m.group(1):
+        return "\\" + m.group(1)
+    return m.group(2) + "/" + m.group(3)
+
+
+def _latexify_column(tag: str, values: list[str]) -> list[str]:
+    repl = _latexify_date_repl if tag == "date" else _latexify_repl
+    return _sub_column(_latex_re, repl, latexify_hook, tag, values)
+
+
+@column_variant(_latexify_column)
+@pure
 def latexify_hook(tag: str, value: str) -> str:
     """Convert tag's value to make it suitable for LaTeX.
 
     Currently, it escapes LaTeX special characters and normalizes
-    number ranges by replacing hyphens with en-dashes.
+    number ranges by replacing hyphens with en-dashes (with slashes
+    for the date tag). Both are done in a single pass, and values
+    with nothing to convert are returned as is.
     """
+    if not _latex_needed_re.search(value):
+        return value
     if tag == "date":
-        normalize_ranges_call = partial(normalize_ranges_hook, sep="/")
-    else:
-        normalize_ranges_call = partial(normalize_ranges_hook, sep="--")
-
-    latexify = compose_hooks(
-        escape_special_characters_hook, normalize_ranges_call
+        return _latex_re.sub(_latexify_date_repl, value)
+    return _latex_re.sub(_latexify_repl, value)
+
+
+def _escape_special_characters_column(
+    tag: str, values: list[str]
+) -> list[str]:
+    return _sub_column(
+        _special_char_re,
+        r"\\\1",
+        escape_special_characters_hook,
+        tag,
+        values,
     )
 
-    return latexify(tag, value)
-
 
+@column_variant(_escape_special_characters_column)
+@pure
 def escape_special_characters_hook(tag: str, value: str) -> str:
-    return re.sub(rf"([&%#])", r"\\\1", value)
+    return _special_char_re.sub(r"\\\1", value)
+
+
+def _normalize_ranges_column(tag: str, values: list[str]) -> list[str]:
+    return _sub_column(
+        _range_re, r"\1--\2", normalize_ranges_hook, tag, values
+    )
 
 
+@column_variant(_normalize_ranges_column)
+@pure
 def normalize_ranges_hook(tag: str, value: str, *, sep: str = "--") -> str:
-    return re.sub(r"(\d+)-(\d+)", rf"\1{sep}\2", value)
+    return _range_re.sub(rf"\1{sep}\2", value)
 
 
 # Pre-defined hooks
 
 
+@pure
 def strip_outer_square_brackets_hook(tag: str, value: str) -> str:
     # (Square brackets used to mark the additions made by the cataloger.)
-    return re.sub(rf"^\[(.*)\]\s?[{terminal_chars}]?$", r"\1", value)
+    return re.sub(rf"^\[(.*)\]\s?[{ISBD_TERMINAL_CHARS}]?$", r"\1", value)
 
 
+@pure
 def protect_uppercase_letters_hook(tag: str, value: str) -> str:
     return re.sub(r"([A-Z]{1,})", r"{\1}", value)
@@ -0,0 +1,426 @@
+"""Incremental conversion of a catalogue converted before.
+
+When a catalogue is converted over and over again with only a few
+records changed in between, most of the work is redone for nothing.
+:class:`IncrementalConverter` keeps a state (an SQLite database) which
+maps the control number (field 001) of each record to a hash of its
+raw bytes, a fingerprint of the conversion arguments and the converted
+entry. On the next run, only new or changed records are converted,
+the entries of the rest are taken from the state, and the records
+missing from the input are reported as deleted::
+
+    report = convert_file_incremental(
+        "catalogue.mrc", "catalogue.bib", "catalogue.state"
+    )
+    print(report.converted, report.reused, report.deleted)
+
+The fingerprint covers the tag-functions and hooks (by their code),
+the rest of the arguments and the version of the package, so the
+records are converted again after any of them changes. Each run is
+expected to read the whole catalogue: records not seen in a run are
+treated as deleted.
+"""
+
+import hashlib
+import os
+import sqlite3
+import types
+from functools import partial
+from typing import (
+    BinaryIO,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    TextIO,
+    Union,
+)
+
+from .bibkeys import BibkeyRegistry
+from .core import Converter
+from .iso2709 import RawRecord, decode_record, split_records
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    control_number TEXT PRIMARY KEY,
+    digest BLOB NOT NULL,
+    fingerprint TEXT NOT NULL,
+    entry TEXT NOT NULL,
+    run INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# The number of state updates made at once.
+UPDATE_BATCH_SIZE = 1000
+
+# Options which do not affect the output.
+_NOT_FINGERPRINTED = ("stats", "hook_cache", "diagnostics")
+
+
+def _package_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("marc2bib")
+    except Exception:
+        return "unknown"
+
+
+def _cell_contents(cell):
+    try:
+        return cell.cell_contents
+    except ValueError:
+        # An empty cell.
+        return None
+
+
+# The types of globals described by value.
+_DATA_TYPES = (str, bytes, int, float, bool, type(None), tuple, frozenset)
+
+
+def _global_names(code: types.CodeType) -> List[str]:
+    # The names of the globals (and attributes) read by code, also by
+    # the functions nested in it.
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names.update(_global_names(const))
+    return sorted(names)
+
+
+def _describe_globals(func: types.FunctionType, depth: int) -> str:
+    items = []
+    for name in _global_names(func.__code__):
+        if name not in func.__globals__:
+            continue
+        # E.g. a function decorated with lru_cache().
+        value = getattr(func.__globals__[name], "__wrapped__", None)
+        if not isinstance(value, types.FunctionType):
+            value = func.__globals__[name]
+        if isinstance(value, types.FunctionType):
+            # Only the code of the functions called, so that a chain of
+            # calls does not describe a whole module.
+            description = _describe(value.__code__, depth)
+        elif isinstance(value, _DATA_TYPES + (types.ModuleType,)):
+            description = _describe(value, depth)
+        else:
+            # The state of other objects may differ between runs.
+            cls = type(value)
+            description = f"{cls.__module__}.{cls.__qualname__}"
+        items.append(f"{name}={description}")
+    return f"[{', '.join(items)}]"
+
+
+def _describe(obj, depth: int = 0) -> str:
+    # A deterministic description of an object, with functions
+    # described by their code rather than by their address.
+    if depth > 10:
+        return "..."
+    depth += 1
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return repr(obj)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        items = [_describe(item, depth) for item in obj]
+        if isinstance(obj, (set, frozenset)):
+            items.sort()
+        return f"[{', '.join(items)}]"
+    if isinstance(obj, dict):
+        items = sorted(
+            f"{_describe(key, depth)}: {_describe(value, depth)}"
+            for key, value in obj.items()
+        )
+        return f"{{{', '.join(items)}}}"
+    if isinstance(obj, partial):
+        return (
+            f"partial({_describe(obj.func, depth)}, "
+            f"{_describe(obj.args, depth)}, "
+            f"{_describe(obj.keywords, depth)})"
+        )
+    if isinstance(obj, types.CodeType):
+        consts = [_describe(const, depth) for const in obj.co_consts]
+        # The names of the methods and globals called, e.g. upper() or
+        # lower(), are not part of the bytecode.
+        return (
+            f"code({obj.co_code.hex()}, {', '.join(consts)}, "
+            f"{', '.join(obj.co_names)})"
+        )
+    if isinstance(obj, types.FunctionType):
+        closure = [_cell_contents(cell) for cell in obj.__closure__ or ()]
+        return (
+            f"{obj.__module__}.{obj.__qualname__}"
+            f"({_describe(obj.__code__, depth)}, "
+            f"{_describe(closure, depth)}, "
+            f"{_describe(obj.__defaults__, depth)}, "
+            f"{_describe_globals(obj, depth)})"
+        )
+    if isinstance(obj, types.ModuleType):
+        return f"module({obj.__name__})"
+    if isinstance(obj, (types.BuiltinFunctionType, type)):
+        return f"{obj.__module__}.{obj.__qualname__}"
+    cls = type(obj)
+    state = getattr(obj, "__dict__", None)
+    if state is None:
+        return f"{cls.__module__}.{cls.__qualname__}({obj!r})"
+    return f"{cls.__module__}.{cls.__qualname__}({_describe(state, depth)})"
+
+
+def options_fingerprint(options: dict) -> str:
+    """Return a fingerprint of the conversion arguments.
+
+    The fingerprint is computed from the tag-functions and hooks as
+    resolved by :class:`marc2bib.Converter`, so it covers the default
+    ones too.
+    """
+    options = {
+        key: value
+        for key, value in options.items()
+        if key not in _NOT_FINGERPRINTED
+    }
+    converter = Converter(**options)
+    description = _describe(
+        [
+            _package_version(),
+            options,
+            converter._pipeline,
+            converter._editor_pipeline,
+            converter.output_format,
+        ]
+    )
+    return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+
+def record_digest(data: bytes) -> bytes:
+    """Return a hash of the raw bytes of a record."""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def control_number(data: bytes) -> Optional[str]:
+    """Return the control number (field 001) of a raw record."""
+    field = RawRecord(data, ("001",))["001"]
+    if field is None:
+        return None
+    return field.value().strip() or None
+
+
+class IncrementalReport(NamedTuple):
+    """The summary of an incremental conversion run."""
+
+    # The number of records converted, because they are new or
+    # changed, or have no control number.
+    converted: int
+    # The number of records with entries reused from the state.
+    reused: int
+    # The control numbers of the records missing from the input.
+    deleted: List[str]
+
+
+class IncrementalConverter:
+    """Converts records reusing the entries from a state of a past run.
+
+    Use it as a context manager, or call :meth:`finish` (or
+    :meth:`close` to discard the run) at the end::
+
+        with IncrementalConverter("catalogue.state") as converter:
+            for bibtex in converter.iter_convert("catalogue.mrc"):
+                ...
+        print(converter.report)
+
+    Args:
+        state: A path to the state database, created if missing.
+        lazy: If True, decode records with
+            :class:`marc2bib.iso2709.RawRecord`.
+        **options: Keyword arguments passed to
+            :class:`marc2bib.Converter`.
+
+    Attributes:
+        report: The :class:`IncrementalReport` of the run, once
+            finished.
+    """
+
+    def __init__(
+        self,
+        state: Union[str, os.PathLike],
+        lazy: bool = False,
+        **options,
+    ) -> None:
+        if isinstance(options.get("bibkey"), BibkeyRegistry):
+            # The keys of the reused entries would not be registered.
+            raise ValueError(
+                "a bibkey registry is not supported with incremental runs"
+            )
+        self.converter = Converter(**options)
+        self.fingerprint = options_fingerprint(options)
+        self.lazy = lazy
+        self.converted = 0
+        self.reused = 0
+        self.report: Optional[IncrementalReport] = None
+
+        self._db = sqlite3.connect(os.fspath(state))
+        self._db.executescript(SCHEMA)
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'run'"
+        ).fetchone()
+        self.run = int(row[0]) + 1 if row else 1
+        self._updates: List[tuple] = []
+        self._seen: List[tuple] = []
+
+    def __enter__(self) -> "IncrementalConverter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.finish()
+        else:
+            self.close()
+
+    def convert_raw(self, data: bytes) -> str:
+        """Convert a raw record unless it is unchanged since the past run.
+
+        Raises:
+            MARC2BibError: If the record is invalid.
+        """
+        number = control_number(data)
+        if number is None:
+            # Cannot be tracked; always converted.
+            entry = self._convert(data)
+            self.converted += 1
+            return entry
+
+        digest = record_digest(data)
+        row = self._db.execute(
+            "SELECT digest, fingerprint, entry FROM records "
+            "WHERE control_number = ?",
+            (number,),
+        ).fetchone()
+        if row is not None and row[0] == digest and row[1] == self.fingerprint:
+            self.reused += 1
+            self._seen.append((self.run, number))
+            entry = row[2]
+        else:
+            if row is not None:
+                # Still in the input, even if it fails to convert below.
+                self._seen.append((self.run, number))
+            entry = self._convert(data)
+            self.converted += 1
+            self._updates.append(
+                (number, digest, self.fingerprint, entry, self.run)
+            )
+
+        if len(self._seen) + len(self._updates) >= UPDATE_BATCH_SIZE:
+            self._flush()
+        return entry
+
+    def iter_convert(
+        self, source: Union[str, os.PathLike, BinaryIO]
+    ) -> Iterator[str]:
+        """Convert all records from a MARC file or binary stream."""
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                yield from self.iter_convert(f)
+            return
+
+        for data in split_records(source):
+            yield self.convert_raw(data)
+
+    def _convert(self, data: bytes) -> str:
+        record = decode_record(data, self.converter.marc_tags, self.lazy)
+        return self.converter.convert(record)
+
+    def _flush(self) -> None:
+        # Not committed until the run is finished.
+        self._db.executemany(
+            "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)",
+            self._updates,
+        )
+        self._db.executemany(
+            "UPDATE records SET run = ? WHERE control_number = ?",
+            self._seen,
+        )
+        self._updates.clear()
+        self._seen.clear()
+
+    def finish(self) -> IncrementalReport:
+        """Remove the records not seen in this run and save the state.
+
+        Returns:
+            The report of the run, also available as ``report``.
+        """
+        if self.report is not None:
+            return self.report
+        self._flush()
+        with self._db:
+            deleted = [
+                row[0]
+                for row in self._db.execute(
+                    "SELECT control_number FROM records WHERE run != ? "
+                    "ORDER BY control_number",
+                    (self.run,),
+                )
+            ]
+            self._db.execute("DELETE FROM records WHERE run != ?", (self.run,))
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('run', ?)",
+                (str(self.run),),
+            )
+        self.report = IncrementalReport(self.converted, self.reused, deleted)
+        self._db.close()
+        return self.report
+
+    def close(self) -> None:
+        """Close the state without saving the run, unless finished."""
+        if self.report is None:
+            self._db.rollback()
+            self._db.close()
+
+
+def convert_file_incremental(
+    src: Union[str, os.PathLike, BinaryIO],
+    dst: Union[str, os.PathLike, TextIO, BinaryIO],
+    state: Union[str, os.PathLike],
+    *,
+    lazy: bool = False,
+    buffer_size: Optional[int] = None,
+    **options,
+) -> IncrementalReport:
+    """Converts a MARC file reusing the entries from a past run.
+
+    All entries are written to ``dst``, as with
+    :func:`marc2bib.convert_file()`, but only new or changed records
+    are converted. See :class:`IncrementalConverter` for the rest of
+    the arguments.
+
+    Returns:
+        The :class:`IncrementalReport` of the run.
+
+    Raises:
+        MARC2BibError: If a record cannot be read or converted. The
+            state is not changed then.
+    """
+    from .writer import DEFAULT_BUFFER_SIZE, EntryWriter
+
+    if isinstance(dst, (str, os.PathLike)):
+        with open(dst, "w", encoding="utf-8") as f:
+            return convert_file_incremental(
+                src,
+                f,
+                state,
+                lazy=lazy,
+                buffer_size=buffer_size,
+                **options,
+            )
+
+    with IncrementalConverter(state, lazy, **options) as converter:
+        writer = EntryWriter(
+            dst,
+            converter.converter,
+            buffer_size=buffer_size or DEFAULT_BUFFER_SIZE,
+        )
+        with writer:
+            for bibtex in converter.iter_convert(src):
+                writer.write(bibtex)
+    return converter.report
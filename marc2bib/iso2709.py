@@ -0,0 +1,268 @@
+"""A lightweight reader of MARC records in ISO 2709 format [1].
+
+Decoding all fields of a record into :class:`pymarc.Field` objects
+often costs more than the conversion itself, while the tag-functions
+read only about ten fields out of dozens. :class:`RawRecord` parses
+only the leader and the directory of a record up front and decodes the
+fields of a tag the first time they are looked up.
+
+It is used for conversion when ``lazy=True`` is passed to
+:func:`marc2bib.iter_convert()`, :func:`marc2bib.convert_file()` or
+:func:`marc2bib.parallel.iter_convert_parallel()`.
+
+[1] https://www.loc.gov/marc/specifications/specrecstruc.html
+"""
+
+import os
+from typing import (
+    BinaryIO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pymarc import Field, Record  # type: ignore
+from pymarc.constants import (  # type: ignore
+    DIRECTORY_ENTRY_LEN,
+    END_OF_RECORD,
+    LEADER_LEN,
+    SUBFIELD_INDICATOR,
+)
+from pymarc.marc8 import marc8_to_unicode  # type: ignore
+from pymarc.record import normalize_subfield_code  # type: ignore
+
+from .core import MARC2BibError
+from .fieldindex import FieldIndex
+
+
+# The length of the record length at the start of the leader.
+RECORD_LENGTH_LEN = 5
+
+_SUBFIELD_INDICATOR = SUBFIELD_INDICATOR.encode("ascii")
+_END_OF_RECORD = ord(END_OF_RECORD)
+
+
+def split_records(stream: BinaryIO) -> Iterator[bytes]:
+    """Yield raw records from a binary stream of MARC records.
+
+    Records are split using the record length stored in the first
+    five bytes of the leader.
+
+    Raises:
+        MARC2BibError: If a record length is invalid or a record is
+            truncated. Record boundaries cannot be found after that.
+    """
+    while True:
+        first5 = stream.read(RECORD_LENGTH_LEN)
+        if not first5:
+            return
+
+        try:
+            length = int(first5)
+        except ValueError:
+            raise MARC2BibError(f"invalid record length: {first5!r}")
+        if length <= RECORD_LENGTH_LEN:
+            raise MARC2BibError(f"invalid record length: {first5!r}")
+
+        chunk = first5 + stream.read(length - RECORD_LENGTH_LEN)
+        if len(chunk) < length:
+            raise MARC2BibError("truncated record at the end of the input")
+
+        yield chunk
+
+
+def iter_raw_data(
+    source: Union[BinaryIO, Iterable[Union[bytes, memoryview]]],
+) -> Iterable[Union[bytes, memoryview]]:
+    """Return the raw records of a binary stream or an iterable of them.
+
+    An iterable of raw records, e.g. a :class:`marc2bib.mapped.MappedFile`,
+    is returned as is.
+    """
+    if hasattr(source, "read"):
+        return split_records(source)
+    return source
+
+
+class RawRecord(FieldIndex):
+    """A record-like view of a raw record decoding fields on demand.
+
+    It provides the same interface as :class:`FieldIndex` and is
+    passed as is to all tag-functions. Any other attribute, e.g.
+    ``fields`` or ``title()``, is taken from a :class:`pymarc.Record`
+    which is decoded in full when first needed.
+
+    Args:
+        data: A record in ISO 2709 format, as bytes or a memoryview
+            (e.g. of a memory-mapped file, see :mod:`marc2bib.mapped`),
+            from which only the looked up fields are copied.
+        tags: If given, only fields with these tags are available.
+
+    Raises:
+        MARC2BibError: If the leader or the directory is invalid.
+    """
+
+    __slots__ = ("data", "leader", "_record", "_utf8", "_directory")
+
+    def __init__(
+        self,
+        data: Union[bytes, memoryview],
+        tags: Optional[Iterable[str]] = None,
+    ) -> None:
+        self.data = data
+        self._record = None
+        self._fields = {}
+
+        if len(data) < LEADER_LEN or data[-1] != _END_OF_RECORD:
+            raise MARC2BibError("invalid or truncated record")
+
+        try:
+            # bytes() copies only a memoryview, not bytes.
+            self.leader = bytes(data[:LEADER_LEN]).decode("ascii")
+            base_address = int(bytes(data[12:17]))
+            directory = bytes(data[LEADER_LEN : base_address - 1])
+            directory = directory.decode("ascii")
+        except ValueError as e:
+            raise MARC2BibError(f"invalid record leader: {e}")
+        if not 0 < base_address < len(data):
+            raise MARC2BibError("invalid base address")
+        if len(directory) % DIRECTORY_ENTRY_LEN != 0:
+            raise MARC2BibError("invalid record directory")
+
+        self._utf8 = self.leader[9] == "a"
+
+        # Tag -> list of (position, start, end) of the field data.
+        entries: Dict[str, List[Tuple[int, int, int]]] = {}
+        if tags is not None:
+            tags = frozenset(tags)
+        for position in range(len(directory) // DIRECTORY_ENTRY_LEN):
+            entry_start = position * DIRECTORY_ENTRY_LEN
+            tag = directory[entry_start : entry_start + 3]
+            if tags is not None and tag not in tags:
+                continue
+            try:
+                length = int(directory[entry_start + 3 : entry_start + 7])
+                offset = int(directory[entry_start + 7 : entry_start + 12])
+            except ValueError:
+                raise MARC2BibError("invalid record directory")
+            start = base_address + offset
+            # The field data ends with an end of field character.
+            entry = (position, start, start + length - 1)
+            if tag in entries:
+                entries[tag].append(entry)
+            else:
+                entries[tag] = [entry]
+        self._directory = entries
+
+    @property
+    def record(self) -> Record:
+        """The record decoded in full with pymarc."""
+        if self._record is None:
+            self._record = Record(bytes(self.data))
+        return self._record
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self._directory
+
+    def _get(self, tag: str) -> Optional[List[Field]]:
+        try:
+            return self._fields[tag]
+        except KeyError:
+            pass
+        entries = self._directory.get(tag)
+        fields = self._decode(tag, entries) if entries else None
+        self._fields[tag] = fields
+        return fields
+
+    def _in_record_order(self, tags: tuple[str, ...]) -> List[Field]:
+        found = []
+        for tag in dict.fromkeys(tags):
+            fields = self._get(tag)
+            if fields:
+                positions = (entry[0] for entry in self._directory[tag])
+                found.extend(zip(positions, fields))
+        found.sort(key=lambda item: item[0])
+        return [field for _, field in found]
+
+    def _decode(
+        self, tag: str, entries: List[Tuple[int, int, int]]
+    ) -> List[Field]:
+        # See pymarc.Record.decode_marc(), which this mirrors.
+        data = self.data
+        if tag < "010" and tag.isdigit():
+            encoding = "utf-8" if self._utf8 else "iso8859-1"
+            return [
+                Field(tag=tag, data=bytes(data[start:end]).decode(encoding))
+                for _, start, end in entries
+            ]
+
+        fields = []
+        for _, start, end in entries:
+            subs = bytes(data[start:end]).split(_SUBFIELD_INDICATOR)
+            indicators = subs[0].decode("ascii")
+            # Missing indicators are blanks and extra ones are dropped.
+            indicators = [indicators[0:1] or " ", indicators[1:2] or " "]
+
+            subfields = []
+            for subfield in subs[1:]:
+                if not subfield:
+                    continue
+                try:
+                    code = subfield[0:1].decode("ascii")
+                    skip_bytes = 1
+                except UnicodeDecodeError:
+                    code, skip_bytes = normalize_subfield_code(subfield)
+                value = subfield[skip_bytes:]
+                if self._utf8:
+                    value = value.decode("utf-8")
+                else:
+                    value = marc8_to_unicode(value)
+                subfields.append(code)
+                subfields.append(value)
+
+            fields.append(
+                Field(tag=tag, indicators=indicators, subfields=subfields)
+            )
+        return fields
+
+
+def decode_record(
+    data: Union[bytes, memoryview],
+    tags: Optional[Iterable[str]] = None,
+    lazy: bool = False,
+) -> Union[Record, RawRecord]:
+    """Decode a raw record with pymarc or, if lazy, as a RawRecord.
+
+    Raises:
+        MARC2BibError: If the record is invalid or truncated.
+    """
+    if lazy:
+        return RawRecord(data, tags)
+    if not data or data[-1] != _END_OF_RECORD:
+        raise MARC2BibError("end of record not found")
+    return Record(bytes(data))
+
+
+def iter_raw_records(
+    source: Union[str, os.PathLike, BinaryIO, Iterable[bytes]],
+    tags: Optional[Iterable[str]] = None,
+) -> Iterator[RawRecord]:
+    """Yield :class:`RawRecord` objects from a MARC file or stream.
+
+    The source can also be an iterable of raw records, see
+    :func:`iter_raw_data`. See :class:`RawRecord` for the rest of the
+    arguments.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from iter_raw_records(f, tags)
+        return
+
+    if tags is not None:
+        tags = frozenset(tags)
+    for data in iter_raw_data(source):
+        yield RawRecord(data, tags)
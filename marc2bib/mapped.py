@@ -0,0 +1,249 @@
+"""Reading of large MARC files through a memory map.
+
+:class:`MappedFile` maps a MARC file into memory and yields its
+records as :class:`memoryview` slices of the map, found by the record
+lengths in the leaders, without reading the file through a buffer or
+copying the records. Together with
+:class:`marc2bib.iso2709.RawRecord` (``lazy=True``), only the leader,
+the directory and the fields looked up by the tag-functions are copied
+out of the map::
+
+    with MappedFile("catalogue.mrc") as mapped:
+        for bibtex in iter_convert(mapped, lazy=True):
+            ...
+        mapped.index.save("catalogue.idx")
+
+The offsets of the records are collected into a :class:`RecordIndex`
+on the first pass. Saved next to the file, it lets later runs go to
+record N, or split the file across workers (see
+:func:`marc2bib.parallel.iter_convert_mapped`), with no scanning::
+
+    with MappedFile("catalogue.mrc", index="catalogue.idx") as mapped:
+        record = mapped[100_000]
+"""
+
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from typing import Iterator, List, Optional, Union
+
+from .core import MARC2BibError
+from .iso2709 import RECORD_LENGTH_LEN
+
+
+class RecordIndex:
+    """The offsets of the records of a MARC file.
+
+    Args:
+        offsets: The start offset of each record followed by the end
+            of the last one, i.e. the size of the file.
+    """
+
+    # The header of a saved index, followed by the number of offsets
+    # and the offsets themselves as native 64-bit integers.
+    MAGIC = b"M2BIDX01"
+
+    def __init__(self, offsets: array) -> None:
+        if not offsets:
+            offsets = array("q", [0])
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RecordIndex):
+            return NotImplemented
+        return self.offsets == other.offsets
+
+    @property
+    def size(self) -> int:
+        """The size of the indexed file in bytes."""
+        return self.offsets[-1]
+
+    def span(self, n: int) -> tuple:
+        """Return the start and end offsets of record ``n``."""
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError(f"record index out of range: {n}")
+        return self.offsets[n], self.offsets[n + 1]
+
+    def split(self, parts: int) -> List[range]:
+        """Split the records into ranges of about the same size in bytes.
+
+        Returns:
+            Up to ``parts`` non-empty ranges of record numbers.
+        """
+        if parts < 1:
+            raise ValueError(f"parts should be positive, got {parts}")
+        offsets = self.offsets
+        count = len(self)
+        bounds = [0]
+        for part in range(1, parts):
+            target = self.size * part // parts
+            # The record boundary closest to the target.
+            bound = bisect_left(offsets, target, bounds[-1], count)
+            if bound > bounds[-1] and (
+                target - offsets[bound - 1] < offsets[bound] - target
+            ):
+                bound -= 1
+            bounds.append(bound)
+        bounds.append(count)
+        return [
+            range(start, stop)
+            for start, stop in zip(bounds, bounds[1:])
+            if start < stop
+        ]
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        with open(path, "wb") as f:
+            f.write(self.MAGIC)
+            array("q", [len(self.offsets)]).tofile(f)
+            self.offsets.tofile(f)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> "RecordIndex":
+        """Load an index saved with :meth:`save`.
+
+        Raises:
+            MARC2BibError: If the file is not a saved index.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise MARC2BibError(f"not a record index: {path}")
+            count = array("q")
+            offsets = array("q")
+            try:
+                count.fromfile(f, 1)
+                offsets.fromfile(f, count[0])
+            except EOFError:
+                raise MARC2BibError(f"truncated record index: {path}")
+        return cls(offsets)
+
+
+def _scan(data, offsets: array) -> Iterator[memoryview]:
+    # Yield records from the start of the data, appending the start
+    # offset of each record and the end of the last one.
+    view = memoryview(data)
+    size = len(view)
+    position = 0
+    while position < size:
+        first5 = bytes(view[position : position + RECORD_LENGTH_LEN])
+        try:
+            length = int(first5)
+        except ValueError:
+            raise MARC2BibError(f"invalid record length: {first5!r}")
+        if length <= RECORD_LENGTH_LEN:
+            raise MARC2BibError(f"invalid record length: {first5!r}")
+        end = position + length
+        if end > size:
+            raise MARC2BibError("truncated record at the end of the input")
+
+        offsets.append(position)
+        yield view[position:end]
+        position = end
+    offsets.append(size)
+
+
+class MappedFile:
+    """A MARC file mapped into memory with its records as memoryviews.
+
+    Iterating over the file yields the records in order; indexing it
+    returns record ``n``. The records are read-only slices of the map,
+    so they should not be kept after the file is closed.
+
+    Args:
+        path: A path to the MARC file.
+        index: A :class:`RecordIndex` of the file or a path to a saved
+            one. If not given, the index is built on the first pass
+            over the records, or on the first access by number.
+
+    Attributes:
+        view: A read-only memoryview of the whole file.
+        index: The :class:`RecordIndex` of the file, once known.
+
+    Raises:
+        MARC2BibError: If the given index does not match the file.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        index: Optional[Union[RecordIndex, str, os.PathLike]] = None,
+    ) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size:
+            self._mmap: Optional[mmap.mmap] = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+            self.view = memoryview(self._mmap)
+        else:
+            # An empty file cannot be mapped.
+            self._mmap = None
+            self.view = memoryview(b"")
+
+        if index is not None and not isinstance(index, RecordIndex):
+            index = RecordIndex.load(index)
+        if index is not None and index.size != size:
+            raise MARC2BibError(
+                f"the record index does not match {path}: the file size "
+                f"is {size}, indexed {index.size}"
+            )
+        self.index: Optional[RecordIndex] = index
+
+    def __enter__(self) -> "MappedFile":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[memoryview]:
+        if self.index is not None:
+            return self.records()
+        return self._scan()
+
+    def _scan(self) -> Iterator[memoryview]:
+        offsets = array("q")
+        yield from _scan(self.view, offsets)
+        self.index = RecordIndex(offsets)
+
+    def build_index(self) -> RecordIndex:
+        """Return the index of the records, scanning the file if needed."""
+        if self.index is None:
+            for _ in self._scan():
+                pass
+        return self.index
+
+    def __len__(self) -> int:
+        return len(self.build_index())
+
+    def __getitem__(self, n: int) -> memoryview:
+        start, end = self.build_index().span(n)
+        return self.view[start:end]
+
+    def records(self, start: int = 0, stop: Optional[int] = None):
+        """Yield the records from number ``start`` up to ``stop``."""
+        offsets = self.build_index().offsets
+        view = self.view
+        stop = len(self.index) if stop is None else min(stop, len(self.index))
+        for n in range(start, stop):
+            yield view[offsets[n] : offsets[n + 1]]
+
+    def split(self, parts: int) -> List[range]:
+        """See :meth:`RecordIndex.split`."""
+        return self.build_index().split(parts)
+
+    def close(self) -> None:
+        self.view.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Records are still referenced; the map is closed
+                # once they are garbage collected.
+                pass
+        self._file.close()
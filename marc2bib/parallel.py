@@ -0,0 +1,477 @@
+"""Conversion of MARC files in parallel using a pool of workers.
+
+The input is split into chunks of raw records at record boundaries,
+which are found from the record length stored in the first five bytes
+of the leader [1]. The chunks are then decoded and converted in worker
+processes, each of which creates its own :class:`marc2bib.Converter`
+once. Errors are caught per record and returned with the results, so
+a single bad record does not stop the pool.
+
+All of the conversion arguments are sent to the workers, so the
+tag-functions and hooks should be picklable, i.e. defined at the top
+level of a module (not lambdas or nested functions).
+
+A memory-mapped file with an index of record offsets (see
+:mod:`marc2bib.mapped`) is converted with
+:func:`iter_convert_mapped` instead, where the workers map the file
+themselves and are sent only ranges of offsets.
+
+Each worker process counts the ``diagnostics`` of a chunk in its own
+:class:`marc2bib.diagnostics.Diagnostics`, which is sent back with the
+results of the chunk and merged into the given one.
+
+With ``pool="thread"``, the chunks are converted in a pool of threads
+sharing a single converter instead, so nothing needs to be picklable
+and ``stats`` can be collected. The conversion is
+CPU-bound, so threads run it in parallel only on free-threaded builds
+of Python (or while tag-functions wait for I/O); otherwise they save
+only the start-up of the processes and the pickling of the results.
+
+A :class:`marc2bib.bibkeys.BibkeyRegistry` given as the ``bibkey``
+is not sent to the workers: they make the base keys with its template,
+and the registry makes them unique in the main process.
+
+[1] https://www.loc.gov/marc/bibliographic/bdleader.html
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import traceback
+from collections import deque
+from functools import partial
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .bibkeys import BibkeyRegistry, split_registry
+from .core import DEFAULT_CHUNK_SIZE, POOLS, Converter, MARC2BibError
+from .diagnostics import Diagnostics
+from .errors import FailedRecord
+from .iso2709 import decode_record, split_records
+
+# The executors are imported with the first pool, so that converting
+# chunks in the calling process does not load multiprocessing.
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+
+class RecordResult(NamedTuple):
+    """The result of converting one record."""
+
+    # The position of the record in the input, starting from zero.
+    index: int
+    bibtex: Optional[str]
+    error: Optional[Exception]
+    # The record with a summary of the error, for a dead-letter sink.
+    failed: Optional[FailedRecord] = None
+
+
+def iter_chunks(
+    stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[List[bytes]]:
+    """Yield lists of at most ``chunk_size`` raw records.
+
+    If the stream cannot be read further, the records read before are
+    yielded before the error is raised.
+    """
+    chunk = []
+    try:
+        for raw in split_records(stream):
+            chunk.append(raw)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+    except Exception:
+        if chunk:
+            yield chunk
+        raise
+    if chunk:
+        yield chunk
+
+
+# The converter of a worker process, see _init_worker().
+_converter: Optional[Converter] = None
+
+
+def _init_worker(options: dict) -> None:
+    global _converter
+    _converter = Converter(**options)
+
+
+# The memory-mapped file of a worker process, see _init_mapped_worker().
+_mapped = None
+
+
+def _init_mapped_worker(options: dict, path: str) -> None:
+    global _mapped
+    from .mapped import MappedFile
+
+    _init_worker(options)
+    # The offsets are sent with each chunk, so no index is needed.
+    _mapped = MappedFile(path)
+
+
+def _picklable(error: Exception) -> Exception:
+    # Not all exceptions survive pickling; replace such ones with a
+    # summary of the original exception.
+    try:
+        pickle.loads(pickle.dumps(error))
+    except Exception:
+        summary = "".join(traceback.format_exception_only(type(error), error))
+        return MARC2BibError(summary.strip())
+    return error
+
+
+# The results of a chunk with the diagnostics of a worker process.
+ChunkResult = Tuple[List[RecordResult], Optional[Diagnostics]]
+
+
+def _worker_result(results: List[RecordResult]) -> ChunkResult:
+    # Send the events of the chunk along and count the next one anew.
+    diagnostics = _converter.diagnostics
+    if diagnostics is None or not diagnostics.counts:
+        return results, None
+    _converter.diagnostics = Diagnostics(diagnostics.samples)
+    return results, diagnostics
+
+
+def _convert_chunk(start: int, chunk: List[bytes], lazy: bool) -> ChunkResult:
+    return _worker_result(convert_chunk(_converter, chunk, start, lazy))
+
+
+def _convert_mapped_chunk(
+    start: int, offsets: Sequence[int], lazy: bool
+) -> ChunkResult:
+    view = _mapped.view
+    chunk = [view[a:b] for a, b in zip(offsets, offsets[1:])]
+    return _worker_result(convert_chunk(_converter, chunk, start, lazy))
+
+
+def _convert_chunk_with(
+    converter: Converter, start: int, chunk: List[bytes], lazy: bool
+) -> ChunkResult:
+    # The threads report to the shared diagnostics directly.
+    return convert_chunk(converter, chunk, start, lazy), None
+
+
+def convert_chunk(
+    converter: Converter,
+    chunk: List[bytes],
+    start: int = 0,
+    lazy: bool = False,
+) -> List[RecordResult]:
+    """Convert a chunk of raw records catching errors per record.
+
+    Args:
+        converter: A converter to use.
+        chunk: A list of raw records.
+        start: The index of the first record in the chunk.
+        lazy: If True, decode records with
+            :class:`marc2bib.iso2709.RawRecord`.
+    """
+    results = []
+    for index, raw in enumerate(chunk, start):
+        try:
+            record = decode_record(raw, converter.marc_tags, lazy)
+            bibtex = converter.convert(record)
+        except Exception as e:
+            failed = FailedRecord.from_exception(index, raw, e)
+            results.append(RecordResult(index, None, _picklable(e), failed))
+        else:
+            results.append(RecordResult(index, bibtex, None))
+    return results
+
+
+def _rekeyed(
+    results: Iterator[RecordResult], registry: BibkeyRegistry
+) -> Iterator[RecordResult]:
+    for result in results:
+        if result.bibtex is not None:
+            result = result._replace(bibtex=registry.rekey(result.bibtex))
+        yield result
+
+
+def _check_picklable(options: dict) -> None:
+    try:
+        pickle.dumps(options)
+    except Exception as e:
+        msg = (
+            "tag-functions and hooks should be picklable (defined at the "
+            f"top level of a module) to be used with workers: {e}"
+        )
+        raise ValueError(msg) from e
+
+
+def _numbered(chunks: Iterable[List[bytes]]) -> Iterator[Tuple[int, list]]:
+    # Pair each chunk with the index of its first record.
+    start = 0
+    for chunk in chunks:
+        yield start, chunk
+        start += len(chunk)
+
+
+def _offset_chunks(
+    offsets: Sequence[int], chunk_size: int
+) -> Iterator[Tuple[int, Sequence[int]]]:
+    # The offsets of the records of each chunk, with the end offset of
+    # the last one.
+    count = len(offsets) - 1
+    for start in range(0, count, chunk_size):
+        yield start, offsets[start : min(start + chunk_size, count) + 1]
+
+
+def _check_pool(pool: str, options: dict) -> None:
+    if pool not in POOLS:
+        raise ValueError(f"pool should be one of {POOLS}, got {pool!r}")
+    if pool == "process":
+        if options.get("stats") is not None:
+            # Each worker would collect them in its own copy.
+            raise ValueError("stats cannot be collected with worker processes")
+        diagnostics = options.get("diagnostics")
+        if diagnostics is not None and diagnostics.callback is not None:
+            raise ValueError(
+                "a diagnostics callback cannot be called from worker "
+                "processes"
+            )
+
+
+def _worker_options(options: dict) -> dict:
+    # Each worker counts the events in a Diagnostics of its own.
+    diagnostics = options.get("diagnostics")
+    if diagnostics is None:
+        return options
+    return {**options, "diagnostics": Diagnostics(diagnostics.samples)}
+
+
+def _submit_chunks(
+    executor: Executor,
+    convert: Callable[[int, Sequence, bool], ChunkResult],
+    chunks: Iterable[Tuple[int, Sequence]],
+    workers: int,
+    ordered: bool,
+    lazy: bool,
+    diagnostics: Optional[Diagnostics] = None,
+) -> Iterator[RecordResult]:
+    # Only a few chunks per worker are submitted ahead of the results.
+    max_pending = 2 * workers
+    pending = deque()
+    for start, chunk in chunks:
+        pending.append(executor.submit(convert, start, chunk, lazy))
+        yield from _collect(pending, ordered, max_pending, diagnostics)
+    yield from _collect(pending, ordered, 0, diagnostics)
+
+
+def iter_convert_parallel(
+    source: Union[str, os.PathLike, BinaryIO],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ordered: bool = True,
+    lazy: bool = False,
+    pool: str = "process",
+    **options,
+) -> Iterator[RecordResult]:
+    """Converts all records from a MARC file using a pool of workers.
+
+    Only a few chunks per worker are read ahead of the results, so the
+    memory usage does not depend on the size of the input.
+
+    Args:
+        source: A path to a MARC file or a binary stream to read
+            records from.
+        workers: The number of workers. Defaults to the number of
+            CPUs.
+        chunk_size: The number of records sent to a worker at once.
+        ordered: If True, yield results in the input order. Otherwise,
+            yield them as soon as they are ready (and the keys of a
+            bibkey registry depend on the order of the results).
+        lazy: If True, decode only the fields looked up by the
+            tag-functions. See :mod:`marc2bib.iso2709` for details.
+        pool: 'process' to convert records in worker processes, or
+            'thread' to convert them in threads sharing a single
+            converter. Threads need no pickling and start at once,
+            but run the conversion in parallel only on free-threaded
+            Python builds or while the tag-functions wait for I/O.
+            ``stats`` are collected only with threads, and
+            ``diagnostics`` with a callback as well.
+        **options: Keyword arguments passed to
+            :class:`marc2bib.Converter`.
+
+    Yields:
+        A :class:`RecordResult` for each record. The failed records
+        have an exception instead of a BibTeX entry.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from iter_convert_parallel(
+                f, workers, chunk_size, ordered, lazy, pool, **options
+            )
+        return
+
+    options, registry = split_registry(options)
+    if registry is not None:
+        yield from _rekeyed(
+            iter_convert_parallel(
+                source, workers, chunk_size, ordered, lazy, pool, **options
+            ),
+            registry,
+        )
+        return
+
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size should be positive, got {chunk_size}")
+    _check_pool(pool, options)
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    # Fail early in the main process instead of in every worker.
+    converter = Converter(**options)
+    workers = workers or os.cpu_count() or 1
+    chunks = _numbered(iter_chunks(source, chunk_size))
+
+    if pool == "thread":
+        convert = partial(_convert_chunk_with, converter)
+        with ThreadPoolExecutor(workers) as executor:
+            yield from _submit_chunks(
+                executor, convert, chunks, workers, ordered, lazy
+            )
+        return
+
+    worker_options = _worker_options(options)
+    _check_picklable(worker_options)
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(worker_options,)
+    ) as executor:
+        yield from _submit_chunks(
+            executor,
+            _convert_chunk,
+            chunks,
+            workers,
+            ordered,
+            lazy,
+            options.get("diagnostics"),
+        )
+
+
+def iter_convert_mapped(
+    path: Union[str, os.PathLike],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ordered: bool = True,
+    lazy: bool = False,
+    index=None,
+    pool: str = "process",
+    **options,
+) -> Iterator[RecordResult]:
+    """Converts all records from a memory-mapped MARC file in parallel.
+
+    Each worker process maps the file itself, and only the offsets of
+    the records of a chunk are sent to it, so the records are neither
+    read nor copied in the main process. Threads share a single map.
+
+    Args:
+        path: A path to a MARC file.
+        index: A :class:`marc2bib.mapped.RecordIndex` of the file or
+            a path to a saved one. If not given, the file is scanned
+            for the records first.
+
+    See :func:`iter_convert_parallel` for the rest of the arguments.
+
+    Yields:
+        A :class:`RecordResult` for each record.
+    """
+    from .mapped import MappedFile
+
+    options, registry = split_registry(options)
+    if registry is not None:
+        yield from _rekeyed(
+            iter_convert_mapped(
+                path,
+                workers,
+                chunk_size,
+                ordered,
+                lazy,
+                index,
+                pool,
+                **options,
+            ),
+            registry,
+        )
+        return
+
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size should be positive, got {chunk_size}")
+    _check_pool(pool, options)
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    converter = Converter(**options)
+    workers = workers or os.cpu_count() or 1
+
+    if pool == "thread":
+        convert = partial(_convert_chunk_with, converter)
+        with MappedFile(path, index) as mapped:
+            offsets = mapped.build_index().offsets
+            view = mapped.view
+            chunks = (
+                (start, [view[a:b] for a, b in zip(chunk, chunk[1:])])
+                for start, chunk in _offset_chunks(offsets, chunk_size)
+            )
+            with ThreadPoolExecutor(workers) as executor:
+                yield from _submit_chunks(
+                    executor, convert, chunks, workers, ordered, lazy
+                )
+        return
+
+    worker_options = _worker_options(options)
+    _check_picklable(worker_options)
+    with MappedFile(path, index) as mapped:
+        offsets = mapped.build_index().offsets
+    chunks = _offset_chunks(offsets, chunk_size)
+
+    with ProcessPoolExecutor(
+        workers,
+        initializer=_init_mapped_worker,
+        initargs=(worker_options, os.fspath(path)),
+    ) as executor:
+        yield from _submit_chunks(
+            executor,
+            _convert_mapped_chunk,
+            chunks,
+            workers,
+            ordered,
+            lazy,
+            options.get("diagnostics"),
+        )
+
+
+def _collect(
+    pending: deque,
+    ordered: bool,
+    max_pending: int,
+    diagnostics: Optional[Diagnostics] = None,
+) -> Iterator[RecordResult]:
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    # Yield results until no more than `max_pending` chunks are left.
+    while len(pending) > max_pending:
+        if ordered:
+            done = [pending.popleft()]
+        else:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+        for future in done:
+            results, events = future.result()
+            if events is not None and diagnostics is not None:
+                diagnostics.update(events)
+            yield from results
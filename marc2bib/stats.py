@@ -0,0 +1,168 @@
+"""Timing instrumentation of the conversion.
+
+Pass an instance of :class:`ConversionStats` as the ``stats`` argument
+of :func:`marc2bib.convert()`, :func:`marc2bib.map_tags()`,
+:class:`marc2bib.Converter` or :func:`marc2bib.iter_convert()` to
+collect the number of calls, the cumulative time and the slowest
+records of each tag-function and hook::
+
+    stats = ConversionStats()
+    convert_file("file.mrc", "file.bib", stats=stats)
+    print(stats.to_json(indent=2))
+
+The tag-functions and hooks are wrapped with timing code only when
+stats are collected, so there is no overhead otherwise.
+
+The stats can be shared by converters running in several threads: the
+record being timed is kept per thread, and the totals are updated
+under a lock.
+"""
+
+import heapq
+import threading
+import time
+from functools import partial, wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def callable_name(func: Callable) -> str:
+    if isinstance(func, partial):
+        return callable_name(func.func)
+    return getattr(func, "__qualname__", None) or repr(func)
+
+
+class _Timing:
+    """Timings of a single tag-function, hook or of whole records."""
+
+    __slots__ = ("calls", "total", "slowest", "_lock")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.total = 0.0
+        # A min-heap of (seconds, record id) of the slowest calls.
+        self.slowest: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+
+    def add(self, elapsed: float, record_id: str, keep: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.total += elapsed
+            if len(self.slowest) < keep:
+                heapq.heappush(self.slowest, (elapsed, record_id))
+            elif keep and elapsed > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, (elapsed, record_id))
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "total": self.total,
+            "mean": self.total / self.calls if self.calls else 0.0,
+            "slowest": [
+                {"seconds": seconds, "record": record_id}
+                for seconds, record_id in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+
+class _CurrentRecord(threading.local):
+    # The record being timed in a thread.
+    record_id = ""
+    start = 0.0
+
+
+class ConversionStats:
+    """Collects call counts and timings of tag-functions and hooks.
+
+    Args:
+        slowest: The number of the slowest records to keep for each
+            tag-function and hook.
+        clock: A function returning the current time in seconds.
+    """
+
+    def __init__(
+        self,
+        slowest: int = 5,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.slowest = slowest
+        self.clock = clock
+        self.records = _Timing()
+        self.tagfuncs: Dict[str, _Timing] = {}
+        self.hooks: Dict[str, _Timing] = {}
+        self._current = _CurrentRecord()
+
+    def start_record(self, record) -> None:
+        """Start timing a record, which is identified by its field 001."""
+        current = self._current
+        try:
+            current.record_id = record["001"].value()
+        except (AttributeError, KeyError, TypeError):
+            current.record_id = f"#{self.records.calls}"
+        current.start = self.clock()
+
+    def end_record(self) -> None:
+        current = self._current
+        elapsed = self.clock() - current.start
+        self.records.add(elapsed, current.record_id, self.slowest)
+
+    def timed_tagfunc(self, tag: str, func: Callable) -> Callable:
+        """Wrap a tag-function to be timed."""
+        key = f"{tag}:{callable_name(func)}"
+        timing = self.tagfuncs.setdefault(key, _Timing())
+        clock = self.clock
+        current = self._current
+
+        @wraps(func)
+        def timed(record):
+            start = clock()
+            try:
+                return func(record)
+            finally:
+                timing.add(clock() - start, current.record_id, self.slowest)
+
+        return timed
+
+    def timed_hook(self, hook: Callable) -> Callable:
+        """Wrap a hook to be timed."""
+        timing = self.hooks.setdefault(callable_name(hook), _Timing())
+        clock = self.clock
+        current = self._current
+
+        def timed(tag: str, value: str) -> str:
+            start = clock()
+            try:
+                return hook(tag, value)
+            finally:
+                timing.add(clock() - start, current.record_id, self.slowest)
+
+        return timed
+
+    def as_dict(self) -> dict:
+        """Return the collected totals as a JSON-serializable dict."""
+        return {
+            "records": self.records.as_dict(),
+            "tagfuncs": {
+                key: timing.as_dict() for key, timing in self.tagfuncs.items()
+            },
+            "hooks": {
+                key: timing.as_dict() for key, timing in self.hooks.items()
+            },
+        }
+
+    def to_json(self, **kwargs) -> str:
+        """Return the collected totals as JSON; see :meth:`as_dict`."""
+        import json
+
+        return json.dumps(self.as_dict(), **kwargs)
+
+    def hotspots(self, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return tag-functions and hooks sorted by the cumulative time."""
+        totals = [
+            (f"tagfunc {key}", timing.total)
+            for key, timing in self.tagfuncs.items()
+        ]
+        totals += [
+            (f"hook {key}", timing.total) for key, timing in self.hooks.items()
+        ]
+        totals.sort(key=lambda item: item[1], reverse=True)
+        return totals[:limit]
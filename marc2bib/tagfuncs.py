@@ -1,11 +1,74 @@
 """Here are all currently defined tag-functions."""
 
+from __future__ import annotations
+
 import re
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, FrozenSet, Iterable, Optional
+
+if TYPE_CHECKING:
+    from pymarc import Record  # type: ignore
+
+
+def indexed(func: Callable[[Record], str]) -> Callable[[Record], str]:
+    """Mark a tag-function to receive a field index instead of a record.
+
+    When called by :func:`marc2bib.map_tags()`, the marked tag-function
+    gets a :class:`marc2bib.fieldindex.FieldIndex` of the record, which
+    is built once per record and looks up fields by tag without
+    scanning all of them. It provides ``get_fields()``, item access by
+    tag, ``publisher()``, ``pubyear()`` and ``isbn()``, and takes the
+    rest of the attributes from the record. Example usage::
+
+        @indexed
+        def tagfunc(record):
+            return record["500"]["a"]
+    """
+    func.uses_field_index = True
+    return func
+
+
+def reads(*tags: str) -> Callable:
+    """Declare the MARC fields (by tag) a tag-function reads.
+
+    The decorated tag-function is also marked with :func:`indexed`.
+    If all of the tag-functions used for conversion declare their
+    fields, only these fields are indexed (and decoded, when records
+    are read lazily, see :mod:`marc2bib.iso2709`). All of the default
+    tag-functions declare their fields. Example usage::
 
-from pymarc import Record  # type: ignore
+        @reads("500")
+        def tagfunc(record):
+            return record["500"]["a"]
 
+    Note that the declared fields must cover all of the fields the
+    tag-function looks up: others are treated as missing.
+    """
 
+    def decorator(func: Callable[[Record], str]) -> Callable[[Record], str]:
+        func.marc_tags = frozenset(tags)
+        return indexed(func)
+
+    return decorator
+
+
+def declared_tags(
+    tagfuncs: Iterable[Callable[[Record], str]]
+) -> Optional[FrozenSet[str]]:
+    """Return the tags of all fields read by the given tag-functions.
+
+    Returns None if some of the tag-functions do not declare their
+    fields with :func:`reads`, i.e. all fields may be read.
+    """
+    tags: FrozenSet[str] = frozenset()
+    for func in tagfuncs:
+        func_tags = getattr(func, "marc_tags", None)
+        if func_tags is None:
+            return None
+        tags |= func_tags
+    return tags
+
+
+@reads("260", "264")
 def get_address(record: Record) -> Optional[str]:
     # https://www.loc.gov/marc/bibliographic/bd25x28x.html
     fields = record.get_fields("260", "264")
@@ -16,6 +79,7 @@ def get_address(record: Record) -> Optional[str]:
         return None
 
 
+@reads("100", "110", "400", "600", "800")
 def get_author(record: Record) -> Optional[str]:
     # https://www.loc.gov/marc/bibliographic/bd1xx.html
     # https://www.loc.gov/marc/bibliographic/bd400.html
@@ -34,6 +98,7 @@ def get_author(record: Record) -> Optional[str]:
         return None
 
 
+@reads("250")
 def get_edition(record: Record) -> Optional[str]:
     # https://www.loc.gov/marc/bibliographic/bd250.html
     field = record["250"]
@@ -43,6 +108,7 @@ def get_edition(record: Record) -> Optional[str]:
         return None
 
 
+@reads("700")
 def get_editor(record: Record) -> Optional[str]:
     editors = []
 
@@ -61,10 +127,12 @@ def get_editor(record: Record) -> Optional[str]:
         return None
 
 
+@reads("260", "264")
 def get_publisher(record: Record) -> Optional[str]:
     return record.publisher()
 
 
+@reads("245")
 def get_title(record: Record) -> Optional[str]:
     # https://www.loc.gov/marc/bibliographic/bd245.html
     field = record["245"]
@@ -74,6 +142,7 @@ def get_title(record: Record) -> Optional[str]:
         return None
 
 
+@reads("245")
 def get_subtitle(record: Record) -> Optional[str]:
     # https://www.loc.gov/marc/bibliographic/bd245.html
     field = record["245"]
@@ -83,6 +152,7 @@ def get_subtitle(record: Record) -> Optional[str]:
         return None
 
 
+@reads("260", "264")
 def get_year(record: Record) -> Optional[str]:
     # https://www.loc.gov/marc/bibliographic/bd25x28x.html
     year = record.pubyear()
@@ -92,6 +162,7 @@ def get_year(record: Record) -> Optional[str]:
         return None
 
 
+@reads("300")
 def get_volume(record: Record) -> Optional[str]:
     # https://www.loc.gov/marc/bibliographic/bd300.html
     field = record["300"]
@@ -104,11 +175,12 @@ def get_volume(record: Record) -> Optional[str]:
             r"|".join((as_roman_numeral_re, with_abbrev_re))
         )
         m = volume_number_pa.search(field["a"])
-        return m.group(1) or m.group(2)
+        return (m.group(1) or m.group(2)) if m else None
     else:
         return None
 
 
+@reads("300")
 def get_volumes(record: Record) -> Optional[str]:
     # https://www.loc.gov/marc/bibliographic/bd300.html
     field = record["300"]
@@ -119,6 +191,7 @@ def get_volumes(record: Record) -> Optional[str]:
         return None
 
 
+@reads("300")
 def get_pages(record: Record) -> Optional[str]:
     # https://www.loc.gov/marc/bibliographic/bd300.html
     field = record["300"]
@@ -129,10 +202,12 @@ def get_pages(record: Record) -> Optional[str]:
         return None
 
 
+@reads()
 def get_note(record: Record) -> Optional[str]:
     raise NotImplementedError
 
 
+@reads("490")
 def get_series(record: Record) -> Optional[str]:
     # https://www.loc.gov/marc/bibliographic/bd490.html
     field = record["490"]
@@ -140,3 +215,9 @@ def get_series(record: Record) -> Optional[str]:
         return field["a"]
     else:
         return None
+
+
+@reads("020")
+def get_isbn(record: Record) -> Optional[str]:
+    # https://www.loc.gov/marc/bibliographic/bd020.html
+    return record.isbn()
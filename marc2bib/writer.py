@@ -0,0 +1,126 @@
+"""A buffered writer of converted entries to a stream.
+
+Writing each entry to a file as it is converted makes a system call
+per entry, while collecting all of them first takes memory as large as
+the output. :class:`EntryWriter` keeps a buffer of entries up to a
+number of characters and writes it out with a single call::
+
+    converter = Converter(include=["edition"])
+    with open("file.bib", "w", encoding="utf-8") as f:
+        with EntryWriter(f, converter) as writer:
+            for record in reader:
+                writer.write_record(record)
+
+It is used by :func:`marc2bib.convert_file()` and the command-line
+interface.
+"""
+
+from __future__ import annotations
+
+import io
+from typing import TYPE_CHECKING, BinaryIO, List, Optional, TextIO, Union
+
+from .core import Converter
+from .formats import OutputFormat
+
+if TYPE_CHECKING:
+    from pymarc import Record  # type: ignore
+
+
+# The number of characters buffered before writing them out.
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+def _is_binary(stream: Union[TextIO, BinaryIO]) -> bool:
+    if isinstance(stream, io.TextIOBase):
+        return False
+    if isinstance(stream, (io.RawIOBase, io.BufferedIOBase)):
+        return True
+    return "b" in getattr(stream, "mode", "")
+
+
+class EntryWriter:
+    """Writes entries to a stream in the output format.
+
+    Entries are separated by a blank line for BibTeX, see
+    :class:`marc2bib.formats.OutputFormat` for the others.
+
+    Args:
+        stream: A text stream, or a binary one to write UTF-8 encoded
+            entries to.
+        converter: A :class:`marc2bib.Converter` used to convert
+            records passed to :meth:`write_record`.
+        buffer_size: The number of characters buffered before writing
+            them to the stream.
+        output_format: The format of the entries. Defaults to the one
+            of the converter, or BibTeX.
+
+    Attributes:
+        count: The number of entries written so far.
+    """
+
+    def __init__(
+        self,
+        stream: Union[TextIO, BinaryIO],
+        converter: Optional[Converter] = None,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        output_format: Optional[OutputFormat] = None,
+    ) -> None:
+        if output_format is None and converter is not None:
+            output_format = converter.output_format
+        self.output_format = output_format or OutputFormat()
+        self.stream = stream
+        self.converter = converter
+        self.buffer_size = buffer_size
+        self.count = 0
+        self._binary = _is_binary(stream)
+        self._buffer: List[str] = [self.output_format.header]
+        self._buffered = 0
+        self._closed = False
+
+    def __enter__(self) -> "EntryWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(self, entry: str) -> None:
+        """Write a formatted entry, e.g. a BibTeX one."""
+        buffer = self._buffer
+        if self.count:
+            buffer.append(self.output_format.separator)
+        buffer.append(entry)
+        self.count += 1
+        self._buffered += len(entry) + 1
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def write_record(self, record: Record) -> None:
+        """Convert a record with the converter and write it."""
+        if self.converter is None:
+            raise ValueError("a converter is required to write records")
+        self.write(self.converter.convert(record))
+
+    def flush(self) -> None:
+        """Write the buffered entries out to the stream."""
+        if not self._buffer:
+            return
+        data = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        if not data:
+            return
+        if self._binary:
+            self.stream.write(data.encode("utf-8"))
+        else:
+            self.stream.write(data)
+
+    def close(self) -> None:
+        """Write the footer of the format and flush the buffer.
+
+        The stream itself is not closed.
+        """
+        if not self._closed:
+            self._closed = True
+            self._buffer.append(self.output_format.footer)
+        self.flush()
@@ -13,7 +13,14 @@ setup(
     install_requires=[
         "pymarc",
     ],
-    py_modules=["marc2bib"],
+    extras_require={
+        "pandas": ["pandas"],
+        "pyarrow": ["pyarrow"],
+    },
+    packages=["marc2bib"],
+    entry_points={
+        "console_scripts": ["marc2bib = marc2bib.cli:main"],
+    },
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -1,3 +1,5 @@
+import io
+
 import pytest
 from pymarc import MARCReader
 
@@ -45,3 +47,13 @@ def rec_clusters(request):
     reader = MARCReader(open("tests/records/clusters.mrc", "rb"))
     request.addfinalizer(reader.close)
     return next(reader)
+
+
+@pytest.fixture(scope="function")
+def records_stream():
+    # All of the bundled records concatenated into a single MARC file.
+    data = b""
+    for name in ("hargittai2009", "tsing2015", "sholokhov", "clusters"):
+        with open(f"tests/records/{name}.mrc", "rb") as f:
+            data += f.read()
+    return io.BytesIO(data)
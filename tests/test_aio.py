@@ -0,0 +1,148 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from marc2bib import MARC2BibError, convert, iter_convert
+from marc2bib.aio import aconvert, aconvert_stream
+from marc2bib.bibkeys import BibkeyRegistry
+from marc2bib.iso2709 import split_records
+from marc2bib.stats import ConversionStats
+
+
+def no_name(record):
+    return None
+
+
+async def aiter_records(items, delay=0.0):
+    for item in items:
+        await asyncio.sleep(delay)
+        yield item
+
+
+async def collect(stream):
+    return [bibtex async for bibtex in stream]
+
+
+@pytest.fixture
+def raw_records(records_stream):
+    return list(split_records(records_stream))
+
+
+def test_aconvert(rec_hargittai):
+    bibtex = asyncio.run(aconvert(rec_hargittai))
+    assert bibtex == convert(rec_hargittai)
+
+
+def test_ordered_stream(raw_records):
+    expected = list(iter_convert(io.BytesIO(b"".join(raw_records))))
+    stream = aconvert_stream(aiter_records(raw_records), concurrency=2)
+    assert asyncio.run(collect(stream)) == expected
+
+
+def test_unordered_stream(raw_records):
+    expected = list(iter_convert(io.BytesIO(b"".join(raw_records))))
+    stream = aconvert_stream(
+        aiter_records(raw_records), concurrency=3, ordered=False
+    )
+    assert sorted(asyncio.run(collect(stream))) == sorted(expected)
+
+
+def test_stream_of_records(rec_hargittai, rec_tsing):
+    stream = aconvert_stream(
+        aiter_records([rec_hargittai, rec_tsing]), lazy=True
+    )
+    assert asyncio.run(collect(stream)) == [
+        convert(rec_hargittai),
+        convert(rec_tsing),
+    ]
+
+
+def test_backpressure(raw_records):
+    taken = []
+    concurrency = 2
+
+    async def source():
+        for item in raw_records:
+            taken.append(item)
+            yield item
+
+    async def consume():
+        async for _ in aconvert_stream(source(), concurrency=concurrency):
+            # The source is not read ahead of the output.
+            assert len(taken) <= concurrency
+            break
+
+    asyncio.run(consume())
+
+
+def test_errors_are_raised(raw_records):
+    tagfuncs = {"author": no_name, "editor": no_name}
+    stream = aconvert_stream(aiter_records(raw_records), tagfuncs=tagfuncs)
+    with pytest.raises(MARC2BibError):
+        asyncio.run(collect(stream))
+
+
+def test_invalid_concurrency(raw_records):
+    stream = aconvert_stream(aiter_records(raw_records), concurrency=0)
+    with pytest.raises(ValueError):
+        asyncio.run(collect(stream))
+
+
+def test_stats_with_concurrency(raw_records):
+    stats = ConversionStats()
+    stream = aconvert_stream(
+        aiter_records(raw_records), concurrency=4, stats=stats
+    )
+    asyncio.run(collect(stream))
+    assert stats.records.calls == len(raw_records)
+
+
+def test_process_executor(raw_records):
+    expected = list(iter_convert(io.BytesIO(b"".join(raw_records))))
+    with ProcessPoolExecutor(2) as executor:
+        stream = aconvert_stream(
+            aiter_records(raw_records),
+            executor=executor,
+            include=["edition"],
+        )
+        result = asyncio.run(collect(stream))
+    assert len(result) == len(expected)
+    assert "edition" in result[0]
+
+
+def test_process_executor_with_registry(raw_records):
+    records = raw_records[1:2] * 6
+    expected = list(
+        iter_convert(io.BytesIO(b"".join(records)), bibkey=BibkeyRegistry())
+    )
+    with ProcessPoolExecutor(2) as executor:
+        stream = aconvert_stream(
+            aiter_records(records),
+            executor=executor,
+            bibkey=BibkeyRegistry(),
+        )
+        assert asyncio.run(collect(stream)) == expected
+
+
+def slow_title_hook(tag, value):
+    if tag == "title" and value.startswith("Slow"):
+        time.sleep(0.05)
+    return value
+
+
+def test_thread_executor_with_registry(rec_tsing):
+    # The first record is converted last, but gets the first key.
+    fast = rec_tsing.as_marc()
+    rec_tsing["245"]["a"] = "Slow " + rec_tsing["245"]["a"]
+    records = [rec_tsing.as_marc(), fast]
+    options = dict(post_hooks=[slow_title_hook], bibkey=BibkeyRegistry())
+    expected = list(iter_convert(io.BytesIO(b"".join(records)), **options))
+    with ThreadPoolExecutor(2) as executor:
+        options["bibkey"] = BibkeyRegistry()
+        stream = aconvert_stream(
+            aiter_records(records), executor=executor, **options
+        )
+        assert asyncio.run(collect(stream)) == expected
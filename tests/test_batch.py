@@ -0,0 +1,57 @@
+import io
+
+import pytest
+
+from marc2bib import Converter, convert, convert_file, iter_convert, map_tags
+
+
+def test_iter_convert_all_records(records_stream):
+    entries = list(iter_convert(records_stream))
+    assert len(entries) == 4
+    assert entries[0].startswith("@book{hargittai2009,")
+    assert entries[3].startswith("@book{jellinek")
+
+
+def test_iter_convert_same_as_convert(records_stream, rec_tsing):
+    entries = list(
+        iter_convert(records_stream, include=["address", "edition"], indent=2)
+    )
+    assert entries[1] == convert(
+        rec_tsing, include=["address", "edition"], indent=2
+    )
+
+
+def test_iter_convert_from_path():
+    entries = list(iter_convert("tests/records/tsing2015.mrc"))
+    assert len(entries) == 1
+
+
+def test_convert_file_in_chunks(records_stream):
+    output = io.StringIO()
+    count = convert_file(records_stream, output, chunk_size=3)
+    assert count == 4
+
+    expected = "\n".join(iter_convert(io.BytesIO(records_stream.getvalue())))
+    assert output.getvalue() == expected
+
+
+def test_converter_reuse(rec_hargittai, rec_clusters):
+    converter = Converter(include=["edition"])
+    assert converter.convert(rec_hargittai) == convert(
+        rec_hargittai, include=["edition"]
+    )
+    # The editor fallback does not affect the next records.
+    assert "editor = " in converter.convert(rec_clusters)
+    assert "author = " in converter.convert(rec_hargittai)
+
+
+def test_converter_map_tags(rec_tsing):
+    converter = Converter(include=["subtitle"], latexify=False)
+    assert converter.map_tags(rec_tsing) == map_tags(
+        rec_tsing, include=["subtitle"], latexify=False
+    )
+
+
+def test_converter_validates_on_creation():
+    with pytest.raises(ValueError):
+        Converter(include=["non-existent"])
@@ -1,3 +1,6 @@
+import subprocess
+import sys
+
 import pytest
 from marc2bib import convert
 
@@ -114,3 +117,24 @@ def test_callable_bibkey(rec_hargittai):
     func = lambda tags: tags["author"].split(",")[0]
     output = convert(rec_hargittai, bibkey=func)
     assert "@book{Hargittai," in output
+
+
+def test_lazy_imports():
+    # Heavy and optional modules are imported only when used.
+    code = (
+        "import sys, marc2bib\n"
+        "loaded = {'pymarc', 'json', 'marc2bib.parallel'} & set(sys.modules)\n"
+        "assert not loaded, loaded\n"
+        "assert marc2bib.parallel.iter_convert_parallel\n"
+        "assert marc2bib.Record.__module__ == 'pymarc.record'"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+    # Also for the command, e.g. with --help.
+    code = (
+        "import sys, marc2bib.cli\n"
+        "heavy = {'pymarc', 'json', 'sqlite3', 'multiprocessing'}\n"
+        "loaded = heavy & set(sys.modules)\n"
+        "assert not loaded, loaded"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,104 @@
+import io
+
+import pytest
+
+from marc2bib import Converter, convert, iter_convert
+from marc2bib.bibkeys import BibkeyRegistry, BibkeyTemplate, normalize_key
+from marc2bib.cli import main
+from marc2bib.incremental import IncrementalConverter
+from marc2bib.parallel import iter_convert_parallel
+
+
+TSING = "tests/records/tsing2015.mrc"
+
+
+def test_normalize_key():
+    assert normalize_key("Dvořák") == "dvorak"
+    assert normalize_key("Groß-Øster") == "grossoster"
+    assert normalize_key("Шолохов") == "шолохов"
+
+
+def test_template():
+    tags = {
+        "author": "Schrödinger, Erwin and Born, Max",
+        "year": "c1944.",
+        "title": "The What is life?",
+        "edition": "2nd",
+    }
+    assert BibkeyTemplate()(tags) == "schrodinger1944"
+    template = BibkeyTemplate("{author}{year}{title:.3}-{edition}")
+    assert template(tags) == "schrodinger1944wha-2nd"
+    assert BibkeyTemplate("{author}:{year}")({"editor": "Smith"}) == "smith:"
+    with pytest.raises(ValueError, match="invalid bibkey template field"):
+        BibkeyTemplate("{0}{year}")
+
+
+def test_suffixes():
+    registry = BibkeyRegistry()
+    keys = [registry.assign("smith2001") for _ in range(29)]
+    assert keys[:4] == ["smith2001", "smith2001a", "smith2001b", "smith2001c"]
+    assert keys[26:] == ["smith2001z", "smith2001aa", "smith2001ab"]
+    assert len(set(keys)) == 29
+    assert registry.duplicates == 28
+    assert len(registry) == 1
+
+
+def test_no_clashes_with_suffixed_keys():
+    registry = BibkeyRegistry()
+    keys = [registry.assign(base) for base in ["x1", "x1", "x1a", "x1a"]]
+    assert keys == ["x1", "x1a", "x1aa", "x1ab"]
+    keys += [registry.assign("x1") for _ in range(30)]
+    assert len(set(keys)) == len(keys)
+    keys = [registry.assign(base) for base in ["y2b", "y2", "y2", "y2"]]
+    assert keys == ["y2b", "y2", "y2a", "y2c"]
+
+
+def test_rekey():
+    registry = BibkeyRegistry()
+    entry = "@book{smith2001,\n title = {A}\n}\n"
+    assert registry.rekey(entry) == entry
+    assert registry.rekey(entry) == "@book{smith2001a,\n title = {A}\n}\n"
+    with pytest.raises(ValueError, match="no bibkey"):
+        registry.rekey("no entry")
+
+
+def test_converter(rec_tsing):
+    converter = Converter(bibkey=BibkeyRegistry("{author}{year}{title}"))
+    first, second = converter.convert(rec_tsing), converter.convert(rec_tsing)
+    assert first.startswith("@book{tsing2015mushroom,")
+    assert second.startswith("@book{tsing2015mushrooma,")
+
+
+def test_parallel_matches_serial(records_stream):
+    data = records_stream.getvalue() * 3
+    serial = list(iter_convert(io.BytesIO(data), bibkey=BibkeyRegistry()))
+    results = iter_convert_parallel(
+        io.BytesIO(data), workers=2, chunk_size=1, bibkey=BibkeyRegistry()
+    )
+    assert [r.bibtex for r in results] == serial
+    keys = [entry.split(",")[0] for entry in serial]
+    assert len(set(keys)) == len(keys) == 12
+
+
+def test_parallel_only_bibtex(records_stream):
+    with pytest.raises(ValueError, match="BibTeX and BibLaTeX"):
+        list(
+            iter_convert_parallel(
+                records_stream,
+                bibkey=BibkeyRegistry(),
+                output_format="csl-json",
+            )
+        )
+
+
+def test_not_incremental(tmp_path):
+    with pytest.raises(ValueError, match="not supported with incremental"):
+        IncrementalConverter(tmp_path / "state", bibkey=BibkeyRegistry())
+
+
+def test_cli_unique_keys(tmp_path, rec_tsing):
+    output = tmp_path / "output.bib"
+    main([TSING, TSING, "-o", str(output), "-q", "--unique-keys"])
+    entry = convert(rec_tsing)
+    expected = entry + "\n" + entry.replace("{tsing2015,", "{tsing2015a,")
+    assert output.read_text(encoding="utf-8") == expected
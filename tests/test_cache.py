@@ -0,0 +1,105 @@
+import pickle
+from functools import partial
+
+import pytest
+
+from marc2bib import Converter, convert, iter_convert
+from marc2bib.cache import HookCache
+from marc2bib.hooks import (
+    apply_not_for,
+    compose_hooks,
+    is_pure,
+    latexify_hook,
+    pure,
+    remove_isbd_punctuation_hook,
+)
+
+
+def test_default_hooks_are_pure():
+    assert is_pure(remove_isbd_punctuation_hook)
+    assert is_pure(latexify_hook)
+    assert is_pure(partial(remove_isbd_punctuation_hook, abbreviations=()))
+
+
+def test_composed_hooks_purity():
+    def impure_hook(tag, value):
+        return value
+
+    assert is_pure(compose_hooks(latexify_hook))
+    assert not is_pure(compose_hooks(latexify_hook, impure_hook))
+    assert is_pure(apply_not_for(latexify_hook, ["title"]))
+    assert not is_pure(apply_not_for(impure_hook, ["title"]))
+
+
+def test_cache_hits_and_misses():
+    calls = []
+
+    @pure
+    def hook(tag, value):
+        calls.append(value)
+        return value.upper()
+
+    cache = HookCache()
+    cached = cache.wrap([hook])
+    assert cached("title", "a") == "A"
+    assert cached("title", "a") == "A"
+    assert cached("author", "a") == "A"
+    assert calls == ["a", "a"]
+    assert cache.info() == (1, 2, cache.maxsize, 2)
+
+
+def test_cache_is_bounded():
+    cache = HookCache(maxsize=2)
+    cached = cache.wrap([latexify_hook])
+    for value in ["a", "b", "a", "c", "b"]:
+        cached("title", value)
+    # "b" is evicted as the least recently used one before "c".
+    assert cache.info() == (1, 4, 2, 2)
+
+
+def test_cache_keyed_on_hooks():
+    cache = HookCache()
+    assert cache.wrap([latexify_hook])("title", "1-2") == "1--2"
+    assert cache.wrap([])("title", "1-2") == "1-2"
+
+
+def test_cache_maxsize_positive():
+    with pytest.raises(ValueError):
+        HookCache(maxsize=0)
+
+
+def test_converter_with_cache_same_output(records_stream):
+    include = ["address", "edition", "pages"]
+    expected = list(iter_convert(records_stream, include=include))
+    records_stream.seek(0)
+
+    cache = HookCache()
+    entries = list(
+        iter_convert(records_stream, include=include, hook_cache=cache)
+    )
+    assert entries == expected
+    assert cache.misses > 0
+
+
+def test_converter_with_impure_hook_not_cached(rec_tsing):
+    def hook(tag, value):
+        return value
+
+    cache = HookCache()
+    converter = Converter(post_hooks=[hook], hook_cache=cache)
+    assert not converter.caches_hooks
+    assert converter.convert(rec_tsing) == convert(rec_tsing)
+    assert cache.info().misses == 0
+
+    converter = Converter(post_hooks=[pure(hook)], hook_cache=cache)
+    assert converter.caches_hooks
+    converter.convert(rec_tsing)
+    converter.convert(rec_tsing)
+    assert cache.info().hits == 4
+
+
+def test_cache_pickled_empty():
+    cache = HookCache(maxsize=5)
+    cache.wrap([latexify_hook])("title", "a")
+    copy = pickle.loads(pickle.dumps(cache))
+    assert copy.info() == (0, 0, 5, 0)
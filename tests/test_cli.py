@@ -0,0 +1,133 @@
+import json
+
+import pytest
+
+from marc2bib import convert
+from marc2bib.cli import main
+from marc2bib.errors import read_dead_letters
+
+
+HARGITTAI = "tests/records/hargittai2009.mrc"
+TSING = "tests/records/tsing2015.mrc"
+
+
+def test_convert_files_to_output(tmp_path, rec_hargittai, rec_tsing):
+    output = tmp_path / "output.bib"
+    assert main([HARGITTAI, TSING, "-o", str(output), "-q"]) == 0
+    expected = convert(rec_hargittai) + "\n" + convert(rec_tsing)
+    assert output.read_text(encoding="utf-8") == expected
+
+
+def test_conversion_options(tmp_path, rec_tsing):
+    output = tmp_path / "output.bib"
+    args = [TSING, "-o", str(output), "-q", "--indent", "2", "--align"]
+    args += ["--include", "address,subtitle", "--no-latexify"]
+    main(args)
+    expected = convert(
+        rec_tsing,
+        include=["address", "subtitle"],
+        indent=2,
+        do_align=True,
+        latexify=False,
+    )
+    assert output.read_text(encoding="utf-8") == expected
+
+
+def test_bibkey_style(tmp_path):
+    output = tmp_path / "output.bib"
+    main([TSING, "-o", str(output), "-q", "--bibkey-style", "authoryeartitle"])
+    assert output.read_text().startswith("@book{tsing2015mushroom,")
+
+
+def test_workers(tmp_path):
+    serial, parallel = tmp_path / "serial.bib", tmp_path / "parallel.bib"
+    main([HARGITTAI, TSING, "-o", str(serial), "-q"])
+    args = ["-o", str(parallel), "-q", "--workers", "2", "--chunk-size", "1"]
+    main([HARGITTAI, TSING] + args)
+    assert parallel.read_text() == serial.read_text()
+
+
+def test_summary(tmp_path, capsys):
+    main([HARGITTAI, TSING, "-o", str(tmp_path / "output.bib")])
+    assert "Converted 2 records, 0 errors" in capsys.readouterr().err
+
+
+def test_diagnostics_with_workers(tmp_path, capsys):
+    args = [HARGITTAI, TSING, "-o", str(tmp_path / "output.bib")]
+    args += ["--include", "edition", "-j", "2", "--chunk-size", "1"]
+    assert main(args) == 0
+    assert "edition: 1 record(s)" in capsys.readouterr().err
+
+
+def test_unknown_include_tag():
+    with pytest.raises(SystemExit):
+        main([HARGITTAI, "--include", "unknown"])
+
+
+def test_include_all(tmp_path, capsys):
+    output = tmp_path / "output.bib"
+    assert main([TSING, "--include", "all", "-o", str(output), "-q"]) == 0
+    assert main([TSING, "--include", "note", "-o", str(output)]) == 1
+    assert "record 0: NotImplementedError" in capsys.readouterr().err
+
+
+def test_entries_written_before_an_error(tmp_path):
+    source, output = tmp_path / "input.mrc", tmp_path / "output.bib"
+    with open(HARGITTAI, "rb") as f, open(TSING, "rb") as g:
+        source.write_bytes(f.read() + g.read() + b"00100broken")
+    assert main([str(source), "-o", str(output), "-q"]) == 2
+    assert output.read_text(encoding="utf-8").count("@book{") == 2
+
+
+def test_stats(tmp_path):
+    output, stats = tmp_path / "output.bib", tmp_path / "stats.json"
+    assert main([TSING, "-o", str(output), "-q", "--stats", str(stats)]) == 0
+    totals = json.loads(stats.read_text(encoding="utf-8"))
+    assert totals["records"]["calls"] == 1
+    assert "title:get_title" in totals["tagfuncs"]
+
+
+def test_stats_with_threads(tmp_path):
+    output, stats = tmp_path / "output.bib", tmp_path / "stats.json"
+    args = ["-j", "2", "--pool", "thread", "--stats", str(stats)]
+    assert main([HARGITTAI, TSING, "-o", str(output), "-q", *args]) == 0
+    totals = json.loads(stats.read_text(encoding="utf-8"))
+    assert totals["records"]["calls"] == 2
+
+
+def test_output_format(tmp_path):
+    output = tmp_path / "output.json"
+    assert main([TSING, "-o", str(output), "-q", "--to", "csl-json"]) == 0
+    items = json.loads(output.read_text(encoding="utf-8"))
+    assert items[0]["id"] == "tsing2015"
+
+
+def test_incremental(tmp_path, capsys, rec_hargittai, rec_tsing):
+    output, state = tmp_path / "output.bib", tmp_path / "state"
+    deleted = tmp_path / "deleted.txt"
+    args = ["-o", str(output), "--state", str(state)]
+    args += ["--deleted", str(deleted)]
+    assert main([HARGITTAI, TSING, *args]) == 0
+
+    assert main([TSING, HARGITTAI, *args]) == 0
+    assert "Reused 2 records, converted 0, deleted 0" in capsys.readouterr().err
+    expected = convert(rec_tsing) + "\n" + convert(rec_hargittai)
+    assert output.read_text(encoding="utf-8") == expected
+
+    assert main([TSING, *args]) == 0
+    assert deleted.read_text() == "15250341\n"
+
+
+def test_dead_letter(tmp_path):
+    bad = b"00026     2200025   4500\x1e\x1d"
+    source = tmp_path / "input.mrc"
+    with open(HARGITTAI, "rb") as f:
+        source.write_bytes(bad + f.read())
+    output, dead_letter = tmp_path / "output.bib", tmp_path / "failed.jsonl"
+    args = [str(source), "-o", str(output), "-q"]
+    assert main([*args, "--dead-letter", str(dead_letter)]) == 1
+
+    (failed,) = read_dead_letters(dead_letter)
+    assert failed.index == 0
+    assert failed.data == bad
+    assert output.read_text(encoding="utf-8").startswith("@book{hargittai")
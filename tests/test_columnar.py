@@ -0,0 +1,152 @@
+import io
+
+import pytest
+
+from marc2bib import MARC2BibError, map_tags, tags_to_bibtex
+from marc2bib.columnar import TagTable, map_tags_batch, to_table
+from marc2bib.hooks import (
+    apply_hook_to_column,
+    compose_hooks,
+    latexify_hook,
+    normalize_ranges_hook,
+    pure,
+)
+from marc2bib.iso2709 import iter_raw_records
+from marc2bib.stats import ConversionStats
+
+INCLUDE = ["address", "edition", "pages", "series", "subtitle", "isbn"]
+
+
+def records(stream):
+    return list(iter_raw_records(io.BytesIO(stream.getvalue())))
+
+
+def rows(columns):
+    count = len(next(iter(columns.values())))
+    return [
+        {tag: column[i] for tag, column in columns.items() if column[i]}
+        for i in range(count)
+    ]
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_same_as_map_tags(records_stream):
+    expected = [map_tags(r, include=INCLUDE) for r in records(records_stream)]
+    columns = map_tags_batch(records_stream, include=INCLUDE)
+    assert rows(columns) == expected
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_lazy_and_tag_order(records_stream):
+    columns = map_tags_batch(
+        records_stream, lazy=True, include=INCLUDE, tag_order=["year", "title"]
+    )
+    assert list(columns)[:2] == ["year", "title"]
+    assert all(len(column) == 4 for column in columns.values())
+    # The last record has no author, but an editor.
+    assert columns["author"][3] is None
+    assert columns["editor"][3]
+
+
+def test_empty_batch():
+    assert map_tags_batch([]) == {}
+
+
+def test_errors(records_stream):
+    with pytest.raises(MARC2BibError):
+        map_tags_batch(records_stream, tagfuncs={"author": lambda r: None})
+    with pytest.raises(ValueError):
+        map_tags_batch([], table="csv")
+    with pytest.raises(ValueError):
+        map_tags_batch([], stats=ConversionStats())
+
+
+def test_latexify_column():
+    values = ["10-20", "A & B", "plain", "1990-1991"]
+    assert apply_hook_to_column(latexify_hook, "pages", values) == [
+        latexify_hook("pages", value) for value in values
+    ]
+    assert apply_hook_to_column(latexify_hook, "date", values)[3] == (
+        "1990/1991"
+    )
+    # The separator of the values occurs in one of them.
+    values = ["1-2\x003-4", "5 & 6"]
+    assert apply_hook_to_column(normalize_ranges_hook, "pages", values) == [
+        "1--2\x003--4",
+        "5 & 6",
+    ]
+
+
+def test_pure_hooks_called_once_per_value():
+    calls = []
+
+    @pure
+    def hook(tag, value):
+        calls.append(value)
+        return value.upper()
+
+    def impure_hook(tag, value):
+        calls.append(value)
+        return value
+
+    values = ["a", "b", "a", "a"]
+    composed = compose_hooks(hook, impure_hook)
+    assert apply_hook_to_column(composed, "title", values) == [
+        "A",
+        "B",
+        "A",
+        "A",
+    ]
+    assert calls == ["a", "b", "A", "B", "A", "A"]
+
+
+def test_composed_hooks_check_types():
+    with pytest.raises(TypeError):
+        apply_hook_to_column(compose_hooks(lambda t, v: 1), "title", ["a"])
+
+
+def test_pandas_table(records_stream):
+    pandas = pytest.importorskip("pandas")
+    columns = map_tags_batch(records_stream)
+    frame = to_table(columns, "pandas")
+    assert isinstance(frame, pandas.DataFrame)
+    assert list(frame.columns) == list(columns)
+
+
+def test_pyarrow_table(records_stream):
+    pytest.importorskip("pyarrow")
+    columns = map_tags_batch(records_stream, table="pyarrow")
+    assert columns.num_rows == 4
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_tag_table(records_stream):
+    expected = [map_tags(r, include=INCLUDE) for r in records(records_stream)]
+    table = map_tags_batch(records_stream, include=INCLUDE, table="tags")
+    assert len(table) == 4
+    assert list(table) == expected
+    assert table[-1] == expected[-1]
+    assert [list(row) for row in table] == [list(tags) for tags in expected]
+    assert "author" not in table[3] and table[3].get("editor")
+    with pytest.raises(KeyError):
+        table[3]["author"]
+    with pytest.raises(IndexError):
+        table[4]
+    for row, tags in zip(table, expected):
+        assert tags_to_bibtex(row, do_align=True) == tags_to_bibtex(
+            tags, do_align=True
+        )
+
+
+def test_tag_table_from_rows():
+    rows = [
+        {"author": "Tsing", "publisher": "Princeton"},
+        {"editor": "Smith", "publisher": "Princeton"},
+    ]
+    table = TagTable(rows)
+    assert table.tags == ["author", "publisher", "editor"]
+    assert list(table) == rows
+    assert table.distinct_values == 3
+    assert table.column("editor") == [None, "Smith"]
+    assert TagTable.from_columns(table.to_columns())[1] == rows[1]
+    assert len(table[1]) == 2
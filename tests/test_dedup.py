@@ -0,0 +1,169 @@
+import copy
+import io
+
+import pytest
+
+from marc2bib import convert_file, iter_convert
+from marc2bib.dedup import (
+    Deduplicator,
+    Duplicate,
+    normalize_isbn,
+    normalize_lccn,
+)
+
+
+def test_normalize_isbn():
+    assert normalize_isbn("0-691-16275-1") == "9780691162751"
+    assert normalize_isbn("978-0-691-16275-1 (pbk.)") == "9780691162751"
+    assert normalize_isbn("3540620001") == "9783540620006"
+    assert normalize_isbn("12") is None
+
+
+@pytest.mark.parametrize(
+    "lccn, expected",
+    [
+        ("n78-89035", "n78089035"),
+        ("n 78890351 ", "n78890351"),
+        ("   85000002 ", "85000002"),
+        ("85-2 ", "85000002"),
+        ("2001-000002", "2001000002"),
+        ("75-425165//r75", "75425165"),
+        (" 79139101 /AC/r932", "79139101"),
+    ],
+)
+def test_normalize_lccn(lccn, expected):
+    # The examples of https://www.loc.gov/marc/lccn-namespace.html
+    assert normalize_lccn(lccn) == expected
+
+
+def test_drop(records_stream):
+    expected = list(iter_convert(io.BytesIO(records_stream.getvalue())))
+    data = records_stream.getvalue() * 2
+    dedup = Deduplicator()
+    assert list(iter_convert(io.BytesIO(data), dedup=dedup)) == expected
+    assert dedup.duplicates[0] == Duplicate(4, 0, "isbn", "9781402056277")
+    assert dedup.counts == {"isbn": 3, "lccn": 1}
+    assert dedup.summary() == "isbn: 3 duplicate(s)\nlccn: 1 duplicate(s)"
+
+
+def test_work_key_and_lazy(records_stream):
+    data = records_stream.getvalue() * 2
+    dedup = Deduplicator(keys=["work"])
+    entries = list(iter_convert(io.BytesIO(data), lazy=True, dedup=dedup))
+    assert len(entries) == 4
+    assert [d.kept for d in dedup.duplicates] == [0, 1, 2, 3]
+    assert (
+        dedup.duplicates[1].value == "themushroomattheendoftheworld/tsing/2015"
+    )
+
+
+def test_custom_key(records_stream):
+    def control_number(record, tags):
+        return record["001"].value()
+
+    control_number.marc_tags = frozenset(("001",))
+    data = records_stream.getvalue() * 2
+    dedup = Deduplicator(keys=[control_number])
+    assert len(list(iter_convert(io.BytesIO(data), lazy=True, dedup=dedup)))
+    assert dedup.counts == {"control_number": 4}
+
+
+def test_undeclared_key_reads_all_fields(records_stream):
+    def cataloguing_agency(record, tags):
+        return record["040"]["a"]
+
+    counts = []
+    for lazy in (False, True):
+        dedup = Deduplicator(keys=[cataloguing_agency])
+        data = io.BytesIO(records_stream.getvalue())
+        list(iter_convert(data, lazy=lazy, dedup=dedup))
+        counts.append(dedup.counts)
+    assert counts[0] == counts[1] == {"cataloguing_agency": 2}
+
+
+def test_keys_lead_to_the_kept_record(rec_tsing):
+    # A(lccn), B(isbn, lccn) and C(isbn) are all the same work.
+    rec_a, rec_c = copy.deepcopy(rec_tsing), copy.deepcopy(rec_tsing)
+    rec_a.remove_fields("020")
+    rec_c.remove_fields("010")
+    data = rec_a.as_marc() + rec_tsing.as_marc() + rec_c.as_marc()
+    for mode in ("drop", "merge"):
+        dedup = Deduplicator(keys=["isbn", "lccn"], mode=mode)
+        assert len(list(iter_convert(io.BytesIO(data), dedup=dedup))) == 1
+        assert [(d.index, d.kept) for d in dedup.duplicates] == [
+            (1, 0),
+            (2, 0),
+        ]
+
+
+def test_merge(rec_tsing):
+    with_isbn = rec_tsing.as_marc()
+    rec_tsing.remove_fields("020")
+    data = rec_tsing.as_marc() + with_isbn
+    dedup = Deduplicator(keys=["lccn"], mode="merge")
+    entries = iter_convert(io.BytesIO(data), include=["isbn"], dedup=dedup)
+    expected = iter_convert(io.BytesIO(with_isbn), include=["isbn"])
+    assert list(entries) == list(expected)
+    assert dedup.duplicates == [Duplicate(1, 0, "lccn", "2014037624")]
+
+
+def test_sqlite_index(tmp_path, records_stream):
+    data = records_stream.getvalue() * 3
+    dedup = Deduplicator(index=tmp_path / "keys.db")
+    output = io.StringIO()
+    assert convert_file(io.BytesIO(data), output, dedup=dedup) == 4
+    assert len(dedup) == 8
+    assert len(dedup._index) == 11
+    dedup.close()
+
+    # The keys of the earlier run, with other indexes, are removed.
+    data = data[int(data[:5]) :]
+    dedup = Deduplicator(index=tmp_path / "keys.db")
+    assert convert_file(io.BytesIO(data), io.StringIO(), dedup=dedup) == 4
+    assert len(dedup) == 7
+    dedup.close()
+
+
+def test_errors_are_collected(records_stream):
+    data = records_stream.getvalue() + b"00026     2200025   4500\x1e\x1d"
+    failed = []
+    entries = iter_convert(
+        io.BytesIO(data),
+        dedup=Deduplicator(),
+        errors="collect",
+        dead_letter=failed,
+    )
+    assert len(list(entries)) == 4
+    assert [f.index for f in failed] == [4]
+
+
+@pytest.mark.parametrize("mode", ["drop", "merge"])
+def test_failed_record_is_not_indexed(rec_tsing, mode):
+    calls = []
+
+    def failing_once(tags):
+        calls.append(tags)
+        if len(calls) == 1:
+            raise KeyError("year")
+        return "tsing2015"
+
+    failed = []
+    entries = iter_convert(
+        io.BytesIO(rec_tsing.as_marc() * 2),
+        bibkey=failing_once,
+        dedup=Deduplicator(mode=mode),
+        errors="collect",
+        dead_letter=failed,
+    )
+    assert len(list(entries)) == 1
+    assert [f.index for f in failed] == [0]
+
+
+def test_invalid_arguments(records_stream):
+    with pytest.raises(ValueError, match="unknown dedup key"):
+        Deduplicator(keys=["oclc"])
+    with pytest.raises(ValueError, match="mode should be one of"):
+        Deduplicator(mode="keep")
+    with pytest.raises(ValueError, match="not supported with workers"):
+        convert_file(records_stream, io.StringIO(), workers=2, dedup=True)
+    assert convert_file(records_stream, io.StringIO(), workers=2, dedup=None)
@@ -0,0 +1,82 @@
+import pickle
+import warnings
+
+import pytest
+
+from marc2bib import Converter, iter_convert
+from marc2bib.diagnostics import NONE_VALUE, Diagnostics
+
+INCLUDE = ["edition", "pages", "isbn"]
+
+
+def test_counts_instead_of_warnings(records_stream):
+    diagnostics = Diagnostics()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        entries = list(
+            iter_convert(
+                records_stream, include=INCLUDE, diagnostics=diagnostics
+            )
+        )
+    assert len(entries) == 4
+    assert diagnostics.counts[(NONE_VALUE, "edition")] == 3
+    assert diagnostics.counts[(NONE_VALUE, "isbn")] == 1
+    assert len(diagnostics) == 5
+    assert diagnostics.examples[(NONE_VALUE, "isbn")] == ["7023063"]
+
+
+def test_warnings_by_default(rec_sholokhov):
+    with pytest.warns(UserWarning, match="tag `edition` is None"):
+        Converter(include=INCLUDE).map_tags(rec_sholokhov)
+
+
+def test_sampling_and_lazy_records(records_stream):
+    diagnostics = Diagnostics(samples=1)
+    list(
+        iter_convert(
+            records_stream, include=INCLUDE, lazy=True, diagnostics=diagnostics
+        )
+    )
+    assert diagnostics.examples[(NONE_VALUE, "edition")] == ["18354671"]
+
+
+def test_callback(rec_sholokhov):
+    events = []
+    diagnostics = Diagnostics(
+        callback=lambda kind, tag, record: events.append((kind, tag))
+    )
+    Converter(include=INCLUDE, diagnostics=diagnostics).map_tags(rec_sholokhov)
+    assert (NONE_VALUE, "isbn") in events
+
+
+def test_summary(rec_sholokhov):
+    diagnostics = Diagnostics()
+    converter = Converter(include=INCLUDE, diagnostics=diagnostics)
+    converter.map_tags(rec_sholokhov)
+    converter.map_tags(rec_sholokhov)
+    assert "isbn: 2 record(s), the tag-function returned None" in (
+        diagnostics.summary()
+    )
+    assert diagnostics.as_dict()[NONE_VALUE]["isbn"] == {
+        "count": 2,
+        "examples": ["7023063", "7023063"],
+    }
+    diagnostics.clear()
+    assert len(diagnostics) == 0
+
+
+def test_update(rec_sholokhov, rec_tsing):
+    diagnostics = Diagnostics(samples=2)
+    Converter(include=INCLUDE, diagnostics=diagnostics).map_tags(rec_tsing)
+    # E.g. sent back from a worker process.
+    worker = pickle.loads(pickle.dumps(Diagnostics(samples=2)))
+    converter = Converter(include=INCLUDE, diagnostics=worker)
+    converter.map_tags(rec_sholokhov)
+    converter.map_tags(rec_sholokhov)
+    diagnostics.update(worker)
+    assert diagnostics.counts[(NONE_VALUE, "edition")] == 3
+    assert diagnostics.examples[(NONE_VALUE, "edition")] == [
+        "18354671",
+        "7023063",
+    ]
+    assert diagnostics.counts[(NONE_VALUE, "isbn")] == 2
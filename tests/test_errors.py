@@ -0,0 +1,104 @@
+import io
+
+import pytest
+
+from marc2bib import MARC2BibError, convert_file, iter_convert
+from marc2bib.errors import DeadLetterFile, FailedRecord, read_dead_letters
+from marc2bib.iso2709 import split_records
+from marc2bib.tagfuncs import get_title
+
+
+def title_or_fail(record):
+    # Fails on the second of the bundled records.
+    title = get_title(record)
+    if "mushroom" in title.lower():
+        raise AttributeError("'NoneType' object has no attribute 'group'")
+    return title
+
+
+TAGFUNCS = {"title": title_or_fail}
+
+
+def expected_entries(records_stream):
+    entries = list(iter_convert(io.BytesIO(records_stream.getvalue())))
+    return entries[:1] + entries[2:]
+
+
+def test_raise_by_default(records_stream):
+    with pytest.raises(AttributeError):
+        list(iter_convert(records_stream, tagfuncs=TAGFUNCS))
+
+
+def test_skip(records_stream):
+    entries = list(
+        iter_convert(records_stream, tagfuncs=TAGFUNCS, errors="skip")
+    )
+    assert entries == expected_entries(records_stream)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_collect(records_stream, lazy):
+    raw = list(split_records(io.BytesIO(records_stream.getvalue())))
+    failed = []
+    entries = list(
+        iter_convert(
+            records_stream,
+            tagfuncs=TAGFUNCS,
+            lazy=lazy,
+            errors="collect",
+            dead_letter=failed,
+        )
+    )
+    assert entries == expected_entries(records_stream)
+    assert len(failed) == 1
+    assert failed[0].index == 1
+    assert failed[0].control_number == "18354671"
+    assert failed[0].data == raw[1]
+    assert failed[0].error.startswith("AttributeError: 'NoneType'")
+    assert "title_or_fail" in failed[0].traceback
+
+
+def test_invalid_policy(records_stream):
+    with pytest.raises(ValueError):
+        list(iter_convert(records_stream, errors="ignore"))
+    with pytest.raises(ValueError):
+        convert_file(records_stream, io.StringIO(), errors="collect")
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_convert_file_to_dead_letter_file(tmp_path, records_stream, workers):
+    path = tmp_path / "failed.jsonl"
+    output = io.StringIO()
+    with DeadLetterFile(path) as dead_letter:
+        count = convert_file(
+            records_stream,
+            output,
+            workers=workers,
+            chunk_size=1,
+            tagfuncs=TAGFUNCS,
+            errors="collect",
+            dead_letter=dead_letter,
+        )
+    assert count == 3
+    assert dead_letter.count == 1
+    assert output.getvalue() == "\n".join(expected_entries(records_stream))
+
+    (failed,) = read_dead_letters(path)
+    assert failed.index == 1
+    assert list(iter_convert(io.BytesIO(failed.data)))
+
+
+def test_unreadable_record():
+    data = b"00026     2200025   4500\x1e\x1d"
+    failed = []
+    entries = iter_convert(
+        io.BytesIO(data), errors="collect", dead_letter=failed
+    )
+    assert list(entries) == []
+    assert failed[0].control_number is None
+    assert failed[0].data == data
+
+
+def test_failed_record_json():
+    failed = FailedRecord(3, "123", b"\x00\xff", "Error: x", "  File ...")
+    assert FailedRecord.from_json(failed.to_json()) == failed
@@ -0,0 +1,54 @@
+import pytest
+from pymarc import MARCReader, Record
+
+from marc2bib import convert
+from marc2bib.fieldindex import FieldIndex
+from marc2bib.tagfuncs import indexed
+
+
+def read_records(path):
+    with open(path, "rb") as f:
+        return list(MARCReader(f))
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "tests/records/tsing2015.mrc",
+        "tests/records/clusters.mrc",
+        "tests/validation/TestBibsWithIsbdPunctuation.mrc",
+    ],
+)
+def test_same_as_record(path):
+    tags = [("100", "110", "400", "600", "800"), ("260", "264"), ("245",)]
+    tags += [("700", "700"), ("950",), ()]
+    for record in read_records(path):
+        index = FieldIndex(record)
+        for args in tags:
+            assert index.get_fields(*args) == record.get_fields(*args)
+        assert index["245"] is record["245"]
+        assert index["950"] is record["950"]
+        assert ("245" in index) == ("245" in record)
+        assert index.publisher() == record.publisher()
+        assert index.pubyear() == record.pubyear()
+        assert index.isbn() == record.isbn()
+        assert index.leader == record.leader
+
+
+def test_opt_in_tagfunc(rec_tsing):
+    received = {}
+
+    @indexed
+    def indexed_tagfunc(record):
+        received["indexed"] = record
+        return record["245"]["c"]
+
+    def tagfunc(record):
+        received["not_indexed"] = record
+        return "Test"
+
+    tagfuncs = {"indexed": indexed_tagfunc, "not_indexed": tagfunc}
+    output = convert(rec_tsing, tagfuncs=tagfuncs)
+    assert "indexed = {Anna Lowenhaupt Tsing}" in output
+    assert isinstance(received["indexed"], FieldIndex)
+    assert isinstance(received["not_indexed"], Record)
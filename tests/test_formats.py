@@ -0,0 +1,165 @@
+import io
+import json
+
+import pytest
+
+from marc2bib import Converter, convert, convert_file, iter_convert
+from marc2bib.bibkeys import BibkeyRegistry
+from marc2bib.formats import (
+    BibLaTeXFormat,
+    CSLJSONFormat,
+    NDJSONFormat,
+    make_format,
+    write_formats,
+)
+
+
+def ampersand_publisher(record):
+    return "Smith & Sons"
+
+
+def test_biblatex_version(rec_tsing):
+    bibtex = convert(
+        rec_tsing, include=["address", "pages"], version="biblatex"
+    )
+    assert "location = {Princeton}" in bibtex
+    assert "pagetotal = {331}" in bibtex
+    assert "address" not in bibtex
+
+
+def test_unknown_version(rec_tsing):
+    with pytest.raises(ValueError):
+        convert(rec_tsing, version="bibtex2")
+
+
+def test_biblatex_format(rec_tsing):
+    converter = Converter(include=["address"], output_format="biblatex")
+    expected = convert(rec_tsing, include=["address"], version="biblatex")
+    assert converter.convert(rec_tsing) == expected
+
+
+def test_csl_json_format(rec_tsing):
+    converter = Converter(
+        include=["address", "pages", "subtitle"], output_format="csl-json"
+    )
+    item = json.loads(converter.convert(rec_tsing))
+    assert item["id"] == "tsing2015"
+    assert item["type"] == "book"
+    assert item["author"] == [{"family": "Tsing", "given": "Anna Lowenhaupt"}]
+    assert item["issued"] == {"date-parts": [[2015]]}
+    assert item["publisher-place"] == "Princeton"
+    assert item["number-of-pages"] == "331"
+    assert item["title"].startswith("The mushroom at the end of the world: ")
+
+
+def test_csl_json_corporate_name():
+    entry = CSLJSONFormat().format_entry(
+        {"author": "NASA", "year": "c2000"}, "misc", "key"
+    )
+    item = json.loads(entry)
+    assert item["type"] == "document"
+    assert item["author"] == [{"literal": "NASA"}]
+    assert item["issued"] == {"literal": "c2000"}
+
+
+def test_json_formats_not_latexified(rec_tsing):
+    tagfuncs = {"publisher": ampersand_publisher}
+    entry = Converter(tagfuncs=tagfuncs, output_format="ndjson").convert(
+        rec_tsing
+    )
+    assert json.loads(entry)["tags"]["publisher"] == "Smith & Sons"
+    assert r"Smith \& Sons" in convert(rec_tsing, tagfuncs=tagfuncs)
+
+
+def test_ndjson_format(rec_tsing):
+    entry = NDJSONFormat().format_entry({"title": "Title"}, "book", "key")
+    assert entry.endswith("\n")
+    assert json.loads(entry) == {
+        "bibtype": "book",
+        "bibkey": "key",
+        "tags": {"title": "Title"},
+    }
+
+
+def test_make_format():
+    output_format = make_format("biblatex", indent=2)
+    assert isinstance(output_format, BibLaTeXFormat)
+    assert output_format.indent == 2
+    with pytest.raises(ValueError):
+        make_format("ris")
+
+
+def test_convert_file_csl_json(records_stream):
+    output = io.StringIO()
+    convert_file(records_stream, output, output_format="csl-json")
+    items = json.loads(output.getvalue())
+    assert len(items) == 4
+
+
+def test_write_formats(records_stream):
+    include = ["address", "edition"]
+    tagfuncs = {"publisher": ampersand_publisher}
+    bib, biblatex, csl, ndjson = (io.StringIO() for _ in range(4))
+    count = write_formats(
+        records_stream,
+        {
+            bib: "bibtex",
+            biblatex: "biblatex",
+            csl: "csl-json",
+            ndjson: "ndjson",
+        },
+        include=include,
+        tagfuncs=tagfuncs,
+    )
+    assert count == 4
+
+    records_stream.seek(0)
+    entries = list(
+        iter_convert(records_stream, include=include, tagfuncs=tagfuncs)
+    )
+    assert bib.getvalue() == "\n".join(entries)
+    assert "location = {" in biblatex.getvalue()
+
+    items = json.loads(csl.getvalue())
+    assert [item["publisher"] for item in items] == ["Smith & Sons"] * 4
+    lines = ndjson.getvalue().splitlines()
+    assert len(lines) == 4
+    assert json.loads(lines[0])["tags"]["publisher"] == "Smith & Sons"
+
+
+def test_write_formats_to_paths(tmp_path):
+    bib, csl = tmp_path / "out.bib", tmp_path / "out.json"
+    write_formats(
+        "tests/records/tsing2015.mrc", {bib: "bibtex", csl: CSLJSONFormat()}
+    )
+    assert bib.read_text(encoding="utf-8").startswith("@book{tsing2015,")
+    assert json.loads(csl.read_text(encoding="utf-8"))[0]["id"] == "tsing2015"
+
+
+def test_write_formats_with_registry():
+    bib, ndjson = io.StringIO(), io.StringIO()
+    write_formats(
+        "tests/records/tsing2015.mrc",
+        {bib: "bibtex", ndjson: "ndjson"},
+        bibkey=BibkeyRegistry(),
+    )
+    assert bib.getvalue().startswith("@book{tsing2015,")
+    assert json.loads(ndjson.getvalue())["bibkey"] == "tsing2015"
+
+
+def escaped_publisher_hook(tag, value):
+    return r"Smith \& Sons" if tag == "publisher" else value
+
+
+def test_write_formats_runs_hooks_in_order(records_stream):
+    # The post hooks run after the LaTeX conversion, as with convert().
+    options = dict(
+        tagfuncs={"publisher": ampersand_publisher},
+        post_hooks=[escaped_publisher_hook],
+    )
+    bib, ndjson = io.StringIO(), io.StringIO()
+    write_formats(records_stream, {bib: "bibtex", ndjson: "ndjson"}, **options)
+    records_stream.seek(0)
+    assert bib.getvalue() == "\n".join(iter_convert(records_stream, **options))
+    tags = json.loads(ndjson.getvalue().splitlines()[0])["tags"]
+    assert tags["publisher"] == r"Smith \& Sons"
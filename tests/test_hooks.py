@@ -30,6 +30,10 @@ class TestHookFunctions:
     def test_protect_uppercase_letters_hook(self):
         assert "{A}b {AB}" == protect_uppercase_letters_hook("tag", "Ab AB")
 
+    def test_strip_outer_square_brackets_hook(self):
+        assert "Test" == strip_outer_square_brackets_hook("tag", "[Test] ;")
+        assert "A [b]" == strip_outer_square_brackets_hook("tag", "A [b]")
+
     def test_escape_special_characters(self):
         assert r"A \& B" == escape_special_characters_hook("tag", "A & B")
 
@@ -42,6 +46,13 @@ class TestHookFunctions:
     def test_latexify_hook(self):
         assert r"A \& B, 12--34" == latexify_hook("tag", "A & B, 12-34")
 
+    def test_latexify_hook_date(self):
+        assert r"2000/2022 \#1" == latexify_hook("date", "2000-2022 #1")
+
+    def test_latexify_hook_nothing_to_convert(self):
+        value = "A title - with a hyphen"
+        assert value is latexify_hook("tag", value)
+
 
 class TestHooksOnRecords:
     def test_conditional_post_hook(self, rec_tsing):
@@ -0,0 +1,160 @@
+import io
+import subprocess
+import sys
+
+import pytest
+
+from marc2bib import MARC2BibError, iter_convert
+from marc2bib.incremental import (
+    IncrementalConverter,
+    control_number,
+    convert_file_incremental,
+    options_fingerprint,
+)
+
+
+def title_tagfunc(record):
+    return "Title"
+
+
+def other_title_tagfunc(record):
+    return "Other title"
+
+
+def records_bytes(*records):
+    return b"".join(record.as_marc() for record in records)
+
+
+def test_control_number(rec_tsing):
+    assert control_number(rec_tsing.as_marc()) == "18354671"
+
+
+def test_first_run_converts_all(tmp_path, records_stream):
+    output = io.StringIO()
+    report = convert_file_incremental(
+        records_stream, output, tmp_path / "state"
+    )
+    assert report == (4, 0, [])
+
+    records_stream.seek(0)
+    assert output.getvalue() == "\n".join(iter_convert(records_stream))
+
+
+def test_unchanged_records_reused(tmp_path, records_stream):
+    state = tmp_path / "state"
+    first = io.StringIO()
+    convert_file_incremental(records_stream, first, state)
+
+    records_stream.seek(0)
+    second = io.StringIO()
+    report = convert_file_incremental(records_stream, second, state)
+    assert report == (0, 4, [])
+    assert second.getvalue() == first.getvalue()
+
+
+def test_changed_new_and_deleted_records(
+    tmp_path, rec_hargittai, rec_tsing, rec_sholokhov
+):
+    state = tmp_path / "state"
+    data = records_bytes(rec_hargittai, rec_tsing)
+    convert_file_incremental(io.BytesIO(data), io.StringIO(), state)
+
+    rec_tsing["245"]["a"] = "Changed title /"
+    data = records_bytes(rec_tsing, rec_sholokhov)
+    output = io.StringIO()
+    report = convert_file_incremental(io.BytesIO(data), output, state)
+    assert report == (2, 0, ["15250341"])
+    assert "Changed title" in output.getvalue()
+
+    # The deleted record is removed from the state.
+    report = convert_file_incremental(io.BytesIO(data), io.StringIO(), state)
+    assert report == (0, 2, [])
+
+
+def test_changed_options_convert_again(tmp_path, rec_tsing):
+    state = tmp_path / "state"
+    data = records_bytes(rec_tsing)
+    convert_file_incremental(io.BytesIO(data), io.StringIO(), state)
+
+    output = io.StringIO()
+    report = convert_file_incremental(
+        io.BytesIO(data), output, state, include=["address"]
+    )
+    assert report.converted == 1
+    assert "address = {Princeton}" in output.getvalue()
+
+
+def test_fingerprint():
+    assert options_fingerprint({}) == options_fingerprint({})
+    assert options_fingerprint({}) != options_fingerprint({"indent": 2})
+    title = {"tagfuncs": {"title": title_tagfunc}}
+    other = {"tagfuncs": {"title": other_title_tagfunc}}
+    assert options_fingerprint(title) != options_fingerprint(other)
+
+
+TITLE_PREFIX = "Title: "
+
+
+def prefix_title(record):
+    return TITLE_PREFIX + record.title()
+
+
+def test_fingerprint_covers_names_and_globals():
+    # The functions differ only in the names they read.
+    upper = {"post_hooks": [lambda tag, value: value.upper()]}
+    lower = {"post_hooks": [lambda tag, value: value.lower()]}
+    assert options_fingerprint(upper) != options_fingerprint(lower)
+    title = {"tagfuncs": {"title": lambda r: r.title()}}
+    isbn = {"tagfuncs": {"title": lambda r: r.isbn()}}
+    assert options_fingerprint(title) != options_fingerprint(isbn)
+
+    prefixed = {"tagfuncs": {"title": prefix_title}}
+    before = options_fingerprint(prefixed)
+    global TITLE_PREFIX
+    TITLE_PREFIX, prefix = "", TITLE_PREFIX
+    try:
+        assert options_fingerprint(prefixed) != before
+    finally:
+        TITLE_PREFIX = prefix
+
+
+def test_failed_run_does_not_change_state(tmp_path, rec_tsing, rec_hargittai):
+    state = tmp_path / "state"
+    data = records_bytes(rec_tsing, rec_hargittai)
+    convert_file_incremental(io.BytesIO(data), io.StringIO(), state)
+
+    with pytest.raises(MARC2BibError):
+        convert_file_incremental(
+            io.BytesIO(records_bytes(rec_tsing) + b"00100broken"),
+            io.StringIO(),
+            state,
+        )
+
+    with IncrementalConverter(state) as converter:
+        list(converter.iter_convert(io.BytesIO(data)))
+    assert converter.report == (0, 2, [])
+
+
+def test_failed_record_is_not_deleted(tmp_path, rec_tsing, rec_hargittai):
+    state = tmp_path / "state"
+    data = records_bytes(rec_tsing, rec_hargittai)
+    convert_file_incremental(io.BytesIO(data), io.StringIO(), state)
+
+    # Still in the input, but no longer converts without an author.
+    rec_hargittai.remove_fields("100", "700")
+    data = records_bytes(rec_tsing, rec_hargittai)
+    with IncrementalConverter(state) as converter:
+        with pytest.raises(MARC2BibError):
+            list(converter.iter_convert(io.BytesIO(data)))
+    assert converter.report == (0, 1, [])
+
+
+def test_fingerprint_is_stable_between_runs():
+    code = (
+        "from marc2bib.incremental import options_fingerprint\n"
+        "print(options_fingerprint({'include': 'all'}))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True
+    ).stdout
+    assert output.decode().strip() == options_fingerprint({"include": "all"})
@@ -0,0 +1,88 @@
+import io
+
+import pytest
+from pymarc import MARCReader
+
+from marc2bib import MARC2BibError, convert, iter_convert
+from marc2bib.iso2709 import RawRecord, iter_raw_records, split_records
+
+
+RECORD_FILES = [
+    "tests/records/hargittai2009.mrc",
+    "tests/records/tsing2015.mrc",
+    "tests/records/sholokhov.mrc",
+    "tests/records/clusters.mrc",
+    "tests/validation/TestBibsWithIsbdPunctuation.mrc",
+]
+
+
+def test_split_records(records_stream):
+    raws = list(split_records(records_stream))
+    assert len(raws) == 4
+    assert b"".join(raws) == records_stream.getvalue()
+
+
+def test_split_records_invalid_length():
+    with pytest.raises(MARC2BibError):
+        list(split_records(io.BytesIO(b"abcde")))
+
+
+def test_split_records_truncated(records_stream):
+    data = records_stream.getvalue()[:-10]
+    with pytest.raises(MARC2BibError):
+        list(split_records(io.BytesIO(data)))
+
+
+@pytest.mark.parametrize("path", RECORD_FILES)
+def test_same_as_record(path):
+    with open(path, "rb") as f:
+        records = list(MARCReader(f))
+    raw_records = list(iter_raw_records(path))
+
+    tags = [("100", "110", "400", "600", "800"), ("260", "264"), ("245",)]
+    tags += [("020",), ("001",), ("650", "245", "100")]
+    for record, raw_record in zip(records, raw_records):
+        for args in tags:
+            fields = [str(f) for f in record.get_fields(*args)]
+            assert [str(f) for f in raw_record.get_fields(*args)] == fields
+        assert raw_record.publisher() == record.publisher()
+        assert raw_record.pubyear() == record.pubyear()
+        assert raw_record.isbn() == record.isbn()
+        assert raw_record.leader == record.leader
+        # Other attributes are taken from the fully decoded record.
+        assert raw_record.title() == record.title()
+
+
+def test_only_given_tags():
+    raw_record = next(iter_raw_records(RECORD_FILES[0], tags=["245"]))
+    assert raw_record["245"] is not None
+    assert "100" not in raw_record
+    assert raw_record["100"] is None
+
+
+def test_fields_decoded_on_demand():
+    raw_record = next(iter_raw_records(RECORD_FILES[0]))
+    assert "100" in raw_record
+    assert raw_record._fields == {}
+    raw_record["100"]
+    assert list(raw_record._fields) == ["100"]
+
+
+def test_invalid_record():
+    with pytest.raises(MARC2BibError):
+        RawRecord(b"00010abcde")
+
+
+def test_lazy_conversion_is_the_same(records_stream):
+    include = ["address", "edition", "isbn", "pages", "subtitle"]
+    lazy = list(iter_convert(records_stream, include=include, lazy=True))
+    records_stream.seek(0)
+    assert lazy == list(iter_convert(records_stream, include=include))
+
+
+def test_not_indexed_tagfunc(rec_tsing):
+    raw_record = next(iter_raw_records("tests/records/tsing2015.mrc"))
+    tagfuncs = {"statement": lambda record: record.title()}
+    assert convert(raw_record, tagfuncs=tagfuncs) == convert(
+        rec_tsing, tagfuncs=tagfuncs
+    )
@@ -0,0 +1,100 @@
+import io
+
+import pytest
+
+from marc2bib import MARC2BibError, iter_convert
+from marc2bib.iso2709 import split_records
+from marc2bib.mapped import MappedFile, RecordIndex
+from marc2bib.parallel import iter_convert_mapped
+
+
+@pytest.fixture
+def mrc_path(tmp_path, records_stream):
+    path = tmp_path / "records.mrc"
+    path.write_bytes(records_stream.getvalue())
+    return path
+
+
+def test_records_and_index(mrc_path, records_stream):
+    raw = list(split_records(records_stream))
+    with MappedFile(mrc_path) as mapped:
+        assert mapped.index is None
+        assert [bytes(record) for record in mapped] == raw
+        assert len(mapped.index) == 4
+        assert bytes(mapped[2]) == raw[2]
+        assert bytes(mapped[-1]) == raw[-1]
+        assert [bytes(r) for r in mapped.records(1, 3)] == raw[1:3]
+        with pytest.raises(IndexError):
+            mapped[4]
+
+
+def test_saved_index(tmp_path, mrc_path):
+    index_path = tmp_path / "records.idx"
+    with MappedFile(mrc_path) as mapped:
+        mapped.build_index().save(index_path)
+        index = mapped.index
+
+    assert RecordIndex.load(index_path) == index
+    with MappedFile(mrc_path, index=index_path) as mapped:
+        assert mapped.index == index
+
+    with open(mrc_path, "ab") as f:
+        f.write(b"0")
+    with pytest.raises(MARC2BibError):
+        MappedFile(mrc_path, index=index_path)
+    with pytest.raises(MARC2BibError):
+        RecordIndex.load(mrc_path)
+
+
+def test_split():
+    index = RecordIndex(array_of([0, 10, 20, 30, 100]))
+    assert index.split(1) == [range(0, 4)]
+    assert index.split(2) == [range(0, 3), range(3, 4)]
+    assert index.split(10) == [range(0, 1), range(1, 2), range(2, 3)] + [
+        range(3, 4)
+    ]
+    assert RecordIndex(array_of([])).split(3) == []
+
+
+def array_of(offsets):
+    from array import array
+
+    return array("q", offsets)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_iter_convert(mrc_path, lazy):
+    expected = list(iter_convert(str(mrc_path)))
+    with MappedFile(mrc_path) as mapped:
+        assert list(iter_convert(mapped, lazy=lazy)) == expected
+
+
+def test_invalid_records(tmp_path):
+    path = tmp_path / "invalid.mrc"
+    path.write_bytes(b"00100xxxx")
+    with MappedFile(path) as mapped:
+        with pytest.raises(MARC2BibError):
+            list(mapped)
+
+    path.write_bytes(b"")
+    with MappedFile(path) as mapped:
+        assert list(mapped) == []
+        assert len(mapped) == 0
+
+
+def test_convert_in_workers(mrc_path):
+    expected = list(iter_convert(str(mrc_path)))
+    results = list(
+        iter_convert_mapped(mrc_path, workers=2, chunk_size=1, lazy=True)
+    )
+    assert [r.index for r in results] == [0, 1, 2, 3]
+    assert [r.bibtex for r in results] == expected
+
+
+def test_convert_in_threads(mrc_path):
+    expected = list(iter_convert(str(mrc_path)))
+    results = iter_convert_mapped(
+        mrc_path, workers=2, chunk_size=3, ordered=False, pool="thread"
+    )
+    results = sorted(results, key=lambda r: r.index)
+    assert [r.bibtex for r in results] == expected
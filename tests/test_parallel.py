@@ -0,0 +1,140 @@
+import io
+
+import pytest
+from pymarc import MARCReader
+
+from marc2bib import MARC2BibError, convert_file, iter_convert
+from marc2bib.bibkeys import BibkeyRegistry
+from marc2bib.diagnostics import Diagnostics
+from marc2bib.parallel import iter_convert_parallel
+from marc2bib.stats import ConversionStats
+
+
+def no_name(record):
+    return None
+
+
+def test_ordered_results(records_stream):
+    expected = list(iter_convert(io.BytesIO(records_stream.getvalue())))
+    results = list(
+        iter_convert_parallel(records_stream, workers=2, chunk_size=1)
+    )
+    assert [r.index for r in results] == [0, 1, 2, 3]
+    assert [r.bibtex for r in results] == expected
+
+
+def test_unordered_results(records_stream):
+    expected = list(iter_convert(io.BytesIO(records_stream.getvalue())))
+    results = list(
+        iter_convert_parallel(
+            records_stream, workers=2, chunk_size=1, ordered=False
+        )
+    )
+    results.sort(key=lambda r: r.index)
+    assert [r.bibtex for r in results] == expected
+
+
+def test_errors_are_returned(records_stream):
+    tagfuncs = {"author": no_name, "editor": no_name}
+    results = list(
+        iter_convert_parallel(records_stream, workers=2, tagfuncs=tagfuncs)
+    )
+    assert len(results) == 4
+    assert all(isinstance(r.error, MARC2BibError) for r in results)
+
+
+def test_unpicklable_tagfuncs(records_stream):
+    with pytest.raises(ValueError):
+        next(
+            iter_convert_parallel(
+                records_stream, workers=2, tagfuncs={"x": lambda _: "x"}
+            )
+        )
+
+
+def test_convert_file_with_workers(records_stream):
+    serial, parallel = io.StringIO(), io.StringIO()
+    convert_file(io.BytesIO(records_stream.getvalue()), serial)
+    convert_file(records_stream, parallel, workers=2, chunk_size=1)
+    assert parallel.getvalue() == serial.getvalue()
+
+
+def test_lazy_workers(records_stream):
+    expected = list(iter_convert(io.BytesIO(records_stream.getvalue())))
+    results = iter_convert_parallel(records_stream, workers=2, lazy=True)
+    assert [r.bibtex for r in results] == expected
+
+
+def test_thread_pool(records_stream):
+    data = records_stream.getvalue()
+    include = ["edition", "pages", "isbn"]
+    serial = Diagnostics()
+    expected = list(
+        iter_convert(io.BytesIO(data), include=include, diagnostics=serial)
+    )
+    stats, diagnostics = ConversionStats(), Diagnostics()
+    results = iter_convert_parallel(
+        records_stream,
+        workers=2,
+        chunk_size=1,
+        pool="thread",
+        include=include,
+        # Nothing is pickled, so lambdas are fine.
+        post_hooks=[lambda tag, value: value],
+        stats=stats,
+        diagnostics=diagnostics,
+    )
+    assert [r.bibtex for r in results] == expected
+    assert stats.records.calls == 4
+    # Each record is timed in the thread converting it.
+    ids = sorted(record["001"].value() for record in MARCReader(data))
+    assert sorted(r for _, r in stats.records.slowest) == ids
+    assert serial.counts
+    assert diagnostics.counts == serial.counts
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_diagnostics_with_workers(records_stream, ordered):
+    data = records_stream.getvalue()
+    include = ["edition", "pages", "isbn"]
+    serial = Diagnostics(samples=2)
+    list(iter_convert(io.BytesIO(data), include=include, diagnostics=serial))
+    diagnostics = Diagnostics(samples=2)
+    results = iter_convert_parallel(
+        records_stream,
+        workers=2,
+        chunk_size=1,
+        ordered=ordered,
+        include=include,
+        diagnostics=diagnostics,
+    )
+    assert all(r.error is None for r in results)
+    assert diagnostics.counts == serial.counts
+    if ordered:
+        assert diagnostics.examples == serial.examples
+    else:
+        assert diagnostics.examples.keys() == serial.examples.keys()
+
+
+def test_thread_pool_with_registry(records_stream):
+    data = records_stream.getvalue() * 2
+    serial = BibkeyRegistry()
+    expected = list(iter_convert(io.BytesIO(data), bibkey=serial))
+    results = iter_convert_parallel(
+        io.BytesIO(data),
+        workers=2,
+        chunk_size=3,
+        pool="thread",
+        bibkey=BibkeyRegistry(),
+    )
+    assert [r.bibtex for r in results] == expected
+
+
+def test_invalid_pool(records_stream):
+    with pytest.raises(ValueError, match="pool should be one of"):
+        next(iter_convert_parallel(records_stream, pool="fiber"))
+    with pytest.raises(ValueError, match="worker processes"):
+        next(iter_convert_parallel(records_stream, stats=ConversionStats()))
+    diagnostics = Diagnostics(callback=print)
+    with pytest.raises(ValueError, match="worker processes"):
+        next(iter_convert_parallel(records_stream, diagnostics=diagnostics))
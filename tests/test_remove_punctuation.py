@@ -62,3 +62,24 @@ def test_common_abbreviation():
 
 def test_common_abbreviation_capitalized():
     assert "Co." == remove_isbd_punctuation_hook("", "Co.")
+
+
+def test_custom_abbreviations():
+    abbreviations = ("abbrev.", "ed.")
+    hook = remove_isbd_punctuation_hook
+    assert "Test abbrev." == hook(
+        "", "Test abbrev.", abbreviations=abbreviations
+    )
+    assert "Test Abbrev." == hook(
+        "", "Test Abbrev.", abbreviations=abbreviations
+    )
+    assert "Test" == hook("", "Test.", abbreviations=abbreviations)
+    # Common abbreviations are not kept if not listed.
+    assert "co" == hook("", "co.", abbreviations=abbreviations)
+
+
+def test_only_terminal_punctuation_removed():
+    assert "A, B" == remove_isbd_punctuation_hook("", "A, B")
+    assert "" == remove_isbd_punctuation_hook("", "")
+    assert "" == remove_isbd_punctuation_hook("", " .")
+    assert "Test:" == remove_isbd_punctuation_hook("", "Test:.")
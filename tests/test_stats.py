@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from marc2bib import Converter, convert, iter_convert, map_tags
+from marc2bib.stats import ConversionStats
+
+
+def fake_clock():
+    # Every call advances the time by one second.
+    now = 0.0
+
+    def clock():
+        nonlocal now
+        now += 1.0
+        return now
+
+    return clock
+
+
+def test_stats_count_tagfunc_and_hook_calls(rec_hargittai):
+    stats = ConversionStats()
+    convert(rec_hargittai, include=["edition"], stats=stats)
+
+    totals = stats.as_dict()
+    assert totals["records"]["calls"] == 1
+    assert totals["tagfuncs"]["title:get_title"]["calls"] == 1
+    assert totals["tagfuncs"]["edition:get_edition"]["calls"] == 1
+    # Five tags pass through each of the hooks.
+    assert totals["hooks"]["remove_isbd_punctuation_hook"]["calls"] == 5
+    assert totals["hooks"]["latexify_hook"]["calls"] == 5
+
+
+def test_stats_time_each_post_hook(rec_hargittai):
+    def first_hook(tag, value):
+        return value
+
+    def second_hook(tag, value):
+        return value
+
+    stats = ConversionStats()
+    map_tags(rec_hargittai, post_hooks=[first_hook, second_hook], stats=stats)
+    hooks = stats.as_dict()["hooks"]
+    assert hooks[first_hook.__qualname__]["calls"] == 4
+    assert hooks[second_hook.__qualname__]["calls"] == 4
+
+
+def test_stats_slowest_records(records_stream):
+    stats = ConversionStats(slowest=2, clock=fake_clock())
+    list(iter_convert(records_stream, stats=stats))
+
+    records = stats.as_dict()["records"]
+    assert records["calls"] == 4
+    assert len(records["slowest"]) == 2
+    # Identified by the control number (001).
+    assert all(item["record"] for item in records["slowest"])
+    assert records["slowest"][0]["seconds"] >= records["slowest"][1]["seconds"]
+
+
+def test_stats_lazy_records_are_identified(records_stream, rec_tsing):
+    stats = ConversionStats()
+    list(iter_convert(records_stream, lazy=True, stats=stats))
+    ids = {item["record"] for item in stats.as_dict()["records"]["slowest"]}
+    assert rec_tsing["001"].value() in ids
+
+
+def test_stats_same_output(rec_tsing):
+    assert convert(rec_tsing, stats=ConversionStats()) == convert(rec_tsing)
+
+
+def test_stats_as_json(rec_tsing):
+    stats = ConversionStats()
+    convert(rec_tsing, stats=stats)
+    assert json.loads(stats.to_json()) == stats.as_dict()
+
+
+def test_stats_hotspots(rec_tsing):
+    stats = ConversionStats()
+    convert(rec_tsing, stats=stats)
+    hotspots = stats.hotspots(3)
+    assert len(hotspots) == 3
+    assert hotspots[0][1] >= hotspots[1][1] >= hotspots[2][1]
+
+
+def test_no_stats_no_wrapping():
+    converter = Converter()
+    assert converter.stats is None
+    assert "map_tags" not in vars(converter)
+
+
+def test_stats_with_workers_not_supported(records_stream):
+    from marc2bib.parallel import iter_convert_parallel
+
+    with pytest.raises(ValueError):
+        list(iter_convert_parallel(records_stream, 2, stats=ConversionStats()))
@@ -1,6 +1,6 @@
 import pytest
-from marc2bib import convert
-from marc2bib.tagfuncs import get_volume, get_volumes, get_pages
+from marc2bib import Converter, convert
+from marc2bib.tagfuncs import get_volume, get_volumes, get_pages, reads
 
 
 def test_required_book_tags(rec_hargittai):
@@ -104,3 +104,47 @@ def test_get_volumes_abbreviated():
 
 def test_get_volumes_non_abbreviated():
     assert "2" == get_volumes({"300": {"a": "2 volumes"}})
+
+
+def test_declared_tags_for_include():
+    converter = Converter(include=["pages", "isbn"])
+    # fmt: off
+    assert converter.marc_tags == {
+        "100", "110", "400", "600", "800",  # author
+        "700",  # editor, if no author
+        "260", "264",  # publisher, year
+        "245",  # title
+        "300",  # pages
+        "020",  # isbn
+    }
+    # fmt: on
+
+
+def test_undeclared_tagfunc_reads_all_tags():
+    converter = Converter(tagfuncs={"note": lambda record: "Test"})
+    assert converter.marc_tags is None
+
+
+def test_declared_user_tagfunc(rec_tsing):
+    @reads("245")
+    def get_statement(record):
+        return record["245"]["c"]
+
+    converter = Converter(tagfuncs={"statement": get_statement})
+    assert "245" in converter.marc_tags
+    output = converter.convert(rec_tsing)
+    assert "statement = {Anna Lowenhaupt Tsing}" in output
+
+
+def test_declared_tagfunc_sees_only_declared_fields(rec_tsing):
+    @reads("245")
+    def get_nothing(record):
+        return record["250"]
+
+    converter = Converter(tagfuncs={"nothing": get_nothing})
+    with pytest.warns(UserWarning):
+        assert "nothing" not in converter.map_tags(rec_tsing)
+
+
+def test_get_volume_without_number():
+    assert get_volume({"300": {"a": "300 p. ; 24 cm."}}) is None
@@ -0,0 +1,87 @@
+import io
+
+import pytest
+
+from marc2bib import Converter, convert, convert_file, iter_convert
+from marc2bib import tags_to_bibtex
+from marc2bib.writer import EntryWriter
+
+
+TAGS = {"title": "Title", "author": "Doe, Jane", "year": "2022"}
+
+
+def test_tags_to_bibtex_sorted():
+    assert tags_to_bibtex(TAGS, bibkey="key") == (
+        "@book{key,\n author = {Doe, Jane},\n title = {Title},\n"
+        " year = {2022}\n}\n"
+    )
+
+
+def test_tags_to_bibtex_tag_order():
+    bibtex = tags_to_bibtex(TAGS, bibkey="key", tag_order=["title", "year"])
+    # The tags not in the order follow alphabetically.
+    assert bibtex == (
+        "@book{key,\n title = {Title},\n year = {2022},\n"
+        " author = {Doe, Jane}\n}\n"
+    )
+
+
+def test_tags_to_bibtex_tag_order_aligned():
+    bibtex = tags_to_bibtex(
+        TAGS, bibkey="key", indent=2, do_align=True, tag_order=["year"]
+    )
+    assert bibtex == (
+        "@book{key,\n  year   = {2022},\n  author = {Doe, Jane},\n"
+        "  title  = {Title}\n}\n"
+    )
+
+
+def test_converter_tag_order(rec_tsing):
+    order = ["title", "author", "year", "publisher"]
+    bibtex = Converter(tag_order=order).convert(rec_tsing)
+    assert bibtex == convert(rec_tsing, tag_order=order)
+    lines = bibtex.splitlines()[1:-1]
+    assert [line.split()[0] for line in lines] == order
+
+
+def test_writer_text_stream(records_stream):
+    entries = list(iter_convert(records_stream))
+    output = io.StringIO()
+    with EntryWriter(output, buffer_size=1) as writer:
+        for bibtex in entries:
+            writer.write(bibtex)
+    assert writer.count == 4
+    assert output.getvalue() == "\n".join(entries)
+
+
+def test_writer_binary_stream_buffered(rec_hargittai, rec_sholokhov):
+    output = io.BytesIO()
+    writer = EntryWriter(output, Converter())
+    writer.write_record(rec_hargittai)
+    writer.write_record(rec_sholokhov)
+    # Nothing is written until the buffer is full or flushed.
+    assert output.getvalue() == b""
+    writer.flush()
+    expected = convert(rec_hargittai) + "\n" + convert(rec_sholokhov)
+    assert output.getvalue() == expected.encode("utf-8")
+
+
+def test_writer_record_without_converter(rec_tsing):
+    with pytest.raises(ValueError):
+        EntryWriter(io.StringIO()).write_record(rec_tsing)
+
+
+def test_convert_file_to_binary_stream(records_stream):
+    output = io.BytesIO()
+    assert convert_file(records_stream, output, buffer_size=10) == 4
+    records_stream.seek(0)
+    expected = "\n".join(iter_convert(records_stream))
+    assert output.getvalue().decode("utf-8") == expected
+
+
+@pytest.mark.parametrize("order", [None, ["year", "title"]])
+def test_converter_same_as_tags_to_bibtex(rec_hargittai, order):
+    converter = Converter(include=["edition", "pages"], tag_order=order)
+    tags = converter.map_tags(rec_hargittai)
+    expected = tags_to_bibtex(dict(sorted(tags.items())), tag_order=order)
+    assert converter.convert(rec_hargittai) == expected